@@ -1,6 +1,10 @@
+import threading
 from .cartera import *
 from .ventas_unified import *
 from .ventas import *
+from .fletes_index import *
+from .variaciones import *
+from .calendario import *
 from .evaluacion_analyzer import *
 from .transferencias import *
 from .proveedores_ventas import *
@@ -23,6 +27,10 @@ __all__ = [
 # Crear instancia global del analyzer unificado para uso compartido
 _unified_instance = None
 
+# Instancias compartidas por clase (ver get_analyzer)
+_analyzer_instances = {}
+_analyzer_lock = threading.RLock()
+
 
 def get_unified_analyzer():
     """
@@ -36,6 +44,28 @@ def get_unified_analyzer():
     return _unified_instance
 
 
+def get_analyzer(analyzer_class):
+    """
+    Obtener la instancia compartida (una por proceso) de un analyzer.
+    Así sus caches internas (_rfm_tables, _cache, _analisis_data, _df_fletes)
+    se reutilizan entre callbacks en lugar de empezar vacías en cada llamada.
+    Si el constructor falla no se guarda nada y se reintenta en la próxima llamada.
+    """
+    instance = _analyzer_instances.get(analyzer_class)
+
+    if instance is None:
+        # RLock: un constructor puede pedir a su vez otro analyzer compartido
+        with _analyzer_lock:
+            instance = _analyzer_instances.get(analyzer_class)
+
+            if instance is None:
+                instance = analyzer_class()
+                _analyzer_instances[analyzer_class] = instance
+                print(f"✅ Instancia compartida de {analyzer_class.__name__} creada")
+
+    return instance
+
+
 def reload_unified_data():
     """
     Forzar recarga de datos en la instancia unificada.
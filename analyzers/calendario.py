@@ -0,0 +1,240 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+DIAS_SEMANA_ES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+class CalendarioVentas:
+    """
+    Daily and day-of-week aggregates of the sales documents.
+
+    Built once per data version: per salesperson (or transfer agent) and
+    day, the number of rows, counted documents, net value and unique
+    clients, plus the same sums as persona × month × weekday tensors. The
+    weekday and daily-impact charts slice these arrays by month instead of
+    re-grouping the raw rows and formatting dates on every request.
+    """
+
+    def __init__(self, ventas_reales: pd.DataFrame, persona_col: str):
+        """
+        Constructor.
+
+        Args:
+            ventas_reales (pd.DataFrame): Sales documents with fecha,
+                cliente_completo, valor_neto, documento_id and `persona_col`.
+            persona_col (str): 'vendedor' or 'transferencista'.
+        """
+        ventas = ventas_reales.dropna(subset=['fecha'])
+
+        dias_doc = ventas['fecha'].to_numpy(dtype='datetime64[D]')
+        self.dias, dia_idx = np.unique(dias_doc, return_inverse=True)
+
+        # Etiquetas y posiciones de cada día (una sola vez por carga)
+        self.fechas_str = np.datetime_as_string(self.dias, unit='D').astype(object)
+        meses_dia = np.array([f[:7] for f in self.fechas_str], dtype=object)
+        self.meses, self._mes_por_dia = np.unique(meses_dia, return_inverse=True)
+        self._weekday_por_dia = (self.dias.astype(int) + 3) % 7  # 1970-01-01 fue jueves
+
+        persona_codes, personas = pd.factorize(ventas[persona_col], sort=True)
+        self.personas = np.asarray(personas, dtype=object)
+        self._fila_por_persona: Dict[str, int] = {p: i for i, p in enumerate(self.personas)}
+
+        # Fila extra al final: 'Todos' (incluye documentos sin persona)
+        n_filas = len(self.personas) + 1
+        todos = n_filas - 1
+        n_dias = len(self.dias)
+
+        valores = ventas['valor_neto'].to_numpy(dtype=float)
+        con_doc = ventas['documento_id'].notna().to_numpy(dtype=float)
+
+        def por_dia(codes, weights=None):
+            return np.bincount(
+                codes * n_dias + dia_idx, weights=weights,
+                minlength=n_filas * n_dias).reshape(n_filas, n_dias)
+
+        con_persona = persona_codes >= 0
+        filas_codes = np.where(con_persona, persona_codes, todos)
+
+        self.filas = por_dia(filas_codes).astype(float)
+        self.docs = por_dia(filas_codes, con_doc)
+        self.valor = por_dia(filas_codes, valores)
+
+        # 'Todos' = personas + documentos sin persona
+        for arr in (self.filas, self.docs, self.valor):
+            arr[todos] += arr[:todos].sum(axis=0)
+
+        # Clientes únicos por (persona, día) y por día
+        cliente_codes, _ = pd.factorize(ventas['cliente_completo'])
+        con_cliente = cliente_codes >= 0
+
+        self.clientes = np.zeros((n_filas, n_dias))
+
+        pares = pd.DataFrame({
+            'p': persona_codes[con_persona & con_cliente],
+            'd': dia_idx[con_persona & con_cliente],
+            'c': cliente_codes[con_persona & con_cliente],
+        }).drop_duplicates()
+        np.add.at(self.clientes, (pares['p'].to_numpy(), pares['d'].to_numpy()), 1)
+
+        pares = pd.DataFrame({
+            'd': dia_idx[con_cliente],
+            'c': cliente_codes[con_cliente],
+        }).drop_duplicates()
+        self.clientes[todos] = np.bincount(pares['d'].to_numpy(), minlength=n_dias)
+
+        # Tensores persona × mes × día de la semana
+        celdas = self._mes_por_dia * 7 + self._weekday_por_dia
+        forma = (n_filas, len(self.meses), 7)
+
+        def por_semana(arr):
+            tensor = np.zeros((n_filas, len(self.meses) * 7))
+            np.add.at(tensor, (slice(None), celdas), arr)
+            return tensor.reshape(forma)
+
+        self.semana_filas = por_semana(self.filas)
+        self.semana_docs = por_semana(self.docs)
+        self.semana_valor = por_semana(self.valor)
+
+    def _fila(self, persona: str):
+        if persona == 'Todos':
+            return len(self.personas)
+
+        return self._fila_por_persona.get(persona)
+
+    def _dias_del_mes(self, mes: str) -> np.ndarray:
+        """
+        Positions of the days of `mes` ('Todos' for every day).
+        """
+        if mes == 'Todos':
+            return np.arange(len(self.dias))
+
+        pos = np.searchsorted(self.meses, mes)
+
+        if pos == len(self.meses) or self.meses[pos] != mes:
+            return np.array([], dtype=int)
+
+        return np.flatnonzero(self._mes_por_dia == pos)
+
+    def por_dia_semana(self, persona: str = 'Todos', mes: str = 'Todos') -> pd.DataFrame:
+        """
+        Sales distribution by day of week.
+
+        Args:
+            persona (str): Salesperson / transfer agent or 'Todos'.
+            mes (str): 'YYYY-MM' or 'Todos'.
+
+        Returns:
+            pd.DataFrame: dia_semana_es (ordered categorical), valor_neto and
+            documento_id for the weekdays with documents.
+        """
+        fila = self._fila(persona)
+
+        if fila is None:
+            return pd.DataFrame()
+
+        if mes == 'Todos':
+            filas = self.semana_filas[fila].sum(axis=0)
+            docs = self.semana_docs[fila].sum(axis=0)
+            valor = self.semana_valor[fila].sum(axis=0)
+        else:
+            pos = np.searchsorted(self.meses, mes)
+
+            if pos == len(self.meses) or self.meses[pos] != mes:
+                return pd.DataFrame()
+
+            filas = self.semana_filas[fila, pos]
+            docs = self.semana_docs[fila, pos]
+            valor = self.semana_valor[fila, pos]
+
+        presentes = np.flatnonzero(filas > 0)
+
+        if not len(presentes):
+            return pd.DataFrame()
+
+        # Mismo índice que un groupby por nombre (orden alfabético) reordenado
+        nombres = np.array(DIAS_SEMANA_ES, dtype=object)[presentes]
+        orden = np.argsort(nombres, kind='stable')
+
+        resultado = pd.DataFrame({
+            'dia_semana_es': nombres[orden],
+            'valor_neto': valor[presentes][orden],
+            'documento_id': docs[presentes][orden].astype(int),
+        })
+
+        # Reorder by day of week
+        resultado['dia_semana_es'] = pd.Categorical(
+            resultado['dia_semana_es'],
+            categories=DIAS_SEMANA_ES,
+            ordered=True
+        )
+        return resultado.sort_values('dia_semana_es')
+
+    def impactos_por_dia(self, persona: str = 'Todos', mes: str = 'Todos') -> pd.DataFrame:
+        """
+        Unique clients impacted, net value and documents per day.
+
+        Returns:
+            pd.DataFrame: fecha_str, clientes_impactados, valor_neto and
+            num_facturas in chronological order.
+        """
+        fila = self._fila(persona)
+
+        if fila is None:
+            return pd.DataFrame()
+
+        dias = self._dias_del_mes(mes)
+        dias = dias[self.filas[fila, dias] > 0]
+
+        if not len(dias):
+            return pd.DataFrame()
+
+        return pd.DataFrame({
+            'fecha_str': self.fechas_str[dias],
+            'clientes_impactados': self.clientes[fila, dias].astype(int),
+            'valor_neto': self.valor[fila, dias],
+            'num_facturas': self.docs[fila, dias].astype(int),
+        })
+
+    def impactos_heatmap(self, mes: str = 'Todos'):
+        """
+        Personas (rows) × dates (cols), value = unique clients impacted.
+
+        Returns:
+            tuple: (pivot_df, dates_sorted, personas_sorted).
+        """
+        dias = self._dias_del_mes(mes)
+        filas = self.filas[:len(self.personas)][:, dias] > 0
+
+        activas = filas.any(axis=1)
+        con_datos = filas.any(axis=0)
+        filas = filas[np.ix_(activas, con_datos)]
+
+        activas = np.flatnonzero(activas)
+        dias = dias[con_datos]
+
+        if not len(activas) or not len(dias):
+            return pd.DataFrame(), [], []
+
+        clientes = self.clientes[np.ix_(activas, dias)]
+
+        # Como un pivot: enteros solo si no hay celdas vacías
+        if filas.all():
+            clientes = clientes.astype(int)
+
+        pivot = pd.DataFrame(
+            clientes,
+            index=pd.Index(self.personas[activas], name='vendedor'),
+            columns=pd.Index(self.fechas_str[dias], name='fecha_str')
+        )
+
+        # Sort personas by total descending (most active on top)
+        pivot['_total'] = pivot.sum(axis=1)
+        pivot = pivot.sort_values('_total', ascending=True).drop(columns='_total')
+
+        dates = pivot.columns.tolist()
+        vendedores = pivot.index.tolist()
+
+        return pivot, dates, vendedores
@@ -1,4 +1,3 @@
-import time
 import numpy as np
 import pandas as pd
 from datetime import datetime
@@ -13,51 +12,57 @@ class CarteraAnalyzer:
         self.df_documentos = pd.DataFrame()
         self.vendedores_list = ['Todos']
         self._last_update = None
+        self._data_version = 0
+
+    @property
+    def data_version(self) -> int:
+        """
+        Version of df_documentos; changes every time the data is rebuilt.
+        """
+        return self._data_version
 
     def reload_data(self):
         """
-        Force reloading of data from Firebase.
+        Force reloading of data from Firebase. The current data is only
+        replaced once the new download succeeded.
         """
         try:
-            self.df_documentos = pd.DataFrame()
-            self.vendedores_list = ['Todos']
+            db = self._get_db()
+
+            # Sin conexión: conservar los últimos datos válidos
+            if db is None:
+                print("⚠️ Base de datos no disponible, se conservan los datos de cartera actuales")
+                return self.df_documentos
+
+            data = db.get("cartera_actual")
+
+            if not data:
+                print("⚠️ No se pudo descargar cartera_actual, se conservan los datos actuales")
+                return self.df_documentos
+
+            result = self.process_data(data)
+
+            if result.empty:
+                self.df_documentos = pd.DataFrame()
+                self.vendedores_list = ['Todos']
+                self._data_version += 1
 
-            result = self.load_data_from_firebase()
             self._last_update = datetime.now()
 
             return result
 
         except Exception as e:
             print(f"❌ Error recargando datos de cartera: {e}")
-            return pd.DataFrame()
+            return self.df_documentos
 
     def _get_db(self):
         """
-        Get database instance with retry logic.
+        Get database instance. Returns None immediately while the
+        connection circuit is open (see server.ConnectionHealth).
         """
         from server import get_db
 
-        max_retries = 3
-
-        for attempt in range(max_retries):
-            try:
-                db = get_db()
-
-                if db:
-                    return db
-
-            except Exception as e:
-                print(
-                    f"⚠️ Intento {attempt + 1}/{max_retries}: Error conectando a DB: {e}")
-
-            # Wait until next attempt
-            if attempt < max_retries - 1:
-                time.sleep(1)
-
-        print(
-            "❌ No se pudo establecer conexión a la base de datos después de varios intentos")
-
-        return None
+        return get_db()
 
     def load_data_from_firebase(self, force_reload=False):
         """
@@ -131,13 +136,11 @@ class CarteraAnalyzer:
         if not documentos_list:
             return pd.DataFrame()
 
-        self.df_documentos = pd.DataFrame(documentos_list)
+        df = pd.DataFrame(documentos_list)
 
         # Process dates
-        self.df_documentos['fecha'] = pd.to_datetime(
-            self.df_documentos['fecha'], errors='coerce')
-        self.df_documentos['vencimiento'] = pd.to_datetime(
-            self.df_documentos['vencimiento'], errors='coerce')
+        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
+        df['vencimiento'] = pd.to_datetime(df['vencimiento'], errors='coerce')
 
         # Calculate overdue days safely
         hoy = datetime.now().date()
@@ -151,21 +154,25 @@ class CarteraAnalyzer:
             except:
                 return np.nan
 
-        self.df_documentos['dias_vencidos'] = self.df_documentos['vencimiento'].apply(
-            calcular_dias_vencidos)
+        df['dias_vencidos'] = df['vencimiento'].apply(calcular_dias_vencidos)
 
         # Create combined client-company name for display
-        self.df_documentos['cliente_completo'] = self.df_documentos.apply(
+        df['cliente_completo'] = df.apply(
             lambda row: f"{row['cliente_nombre']} – {row['razon_social']}"
             if row['razon_social'] and row['razon_social'].strip()
             else row['cliente_nombre'], axis=1
         )
 
         # List of salespeople
-        vendedores_unicos = self.df_documentos['vendedor'].dropna().unique()
+        vendedores_unicos = df['vendedor'].dropna().unique()
+
+        # Reemplazar los datos solo con el DataFrame ya procesado
+        self.df_documentos = df
         self.vendedores_list = [
             'Todos'] + sorted([v for v in vendedores_unicos if v != 'Sin Asignar'])
 
+        self._data_version += 1
+
         return self.df_documentos
 
     def filter_by_vendedor(self, vendedor):
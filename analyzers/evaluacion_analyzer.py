@@ -17,7 +17,8 @@ class EvaluacionAnalyzer:
         self._maestro_labs = {}
         self._last_analisis_update = None
 
-        self.__ventas_analyzer = VentasAnalyzer()
+        from . import get_analyzer
+        self.__ventas_analyzer = get_analyzer(VentasAnalyzer)
 
     def _get_db(self):
         """
@@ -239,8 +240,7 @@ class EvaluacionAnalyzer:
         Get quota compliance from existing VentasAnalyzer.
         """
         try:
-            from analyzers import VentasAnalyzer
-            analyzer = VentasAnalyzer()
+            analyzer = self.__ventas_analyzer
             data = analyzer.get_cumplimiento_cuotas(vendor_name, 'Todos')
             if not data.empty:
                 return data['cumplimiento_pct'].iloc[0]
@@ -282,8 +282,7 @@ class EvaluacionAnalyzer:
         Get return rate from existing data.
         """
         try:
-            from analyzers import VentasAnalyzer
-            analyzer = VentasAnalyzer()
+            analyzer = self.__ventas_analyzer
             resumen = analyzer.get_resumen_ventas(vendor_name, 'Todos')
             if resumen['total_ventas'] > 0:
                 return (resumen['total_devoluciones'] / resumen['total_ventas']) * 100
@@ -319,8 +318,7 @@ class EvaluacionAnalyzer:
         Get collection rate vs sales.
         """
         try:
-            from analyzers import VentasAnalyzer
-            analyzer = VentasAnalyzer()
+            analyzer = self.__ventas_analyzer
 
             # Get sales
             resumen = analyzer.get_resumen_ventas(vendor_name, 'Todos')
@@ -913,8 +911,7 @@ class EvaluacionAnalyzer:
         Get quota compliance for a specific month
         """
         try:
-            from analyzers import VentasAnalyzer
-            analyzer = VentasAnalyzer()
+            analyzer = self.__ventas_analyzer
             data = analyzer.get_cumplimiento_cuotas(vendor_name, month)
             if not data.empty:
                 return data['cumplimiento_pct'].iloc[0]
@@ -1153,8 +1150,7 @@ class EvaluacionAnalyzer:
         Obtain historical average compliance with fee
         """
         try:
-            from analyzers import VentasAnalyzer
-            analyzer = VentasAnalyzer()
+            analyzer = self.__ventas_analyzer
 
             # Obtener últimos 6 meses
             total_compliance = 0
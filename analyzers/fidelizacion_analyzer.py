@@ -19,6 +19,8 @@ class FidelizacionAnalyzer:
                 and (datetime.now() - self._last_update).seconds < 300):
             return self._cache
         db = self._get_db()
+        if not db:
+            return self._cache
         raw = db.get("fidelizacion") or {}
         self._cache = raw
         self._last_update = datetime.now()
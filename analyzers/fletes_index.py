@@ -0,0 +1,170 @@
+import re
+import bisect
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from utils import format_currency_int
+
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _normalize(text: Any) -> str:
+    """
+    Lowercase text without accents (e.g. 'Bogotá' -> 'bogota').
+    """
+    text = unicodedata.normalize('NFKD', str(text or ''))
+
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+class FletesIndex:
+    """
+    Prepared freight table for search and pagination.
+
+    Rows are normalized, formatted and tokenized once when the grouped
+    fletes frame is loaded. Search uses an inverted index over the tokens of
+    ciudad, depto, zona and transportadora with prefix lookup on the sorted
+    vocabulary, so each keystroke or page change only touches the matching
+    row ids and the visible page.
+    """
+
+    def __init__(self, df_fletes: pd.DataFrame, cache_size: int = 256):
+        """
+        Constructor.
+
+        Args:
+            df_fletes (pd.DataFrame): Fletes grouped by ciudad/depto/zona.
+            cache_size (int): Search results kept in memory.
+        """
+        df = df_fletes.sort_values(['ciudad', 'depto']).reset_index(drop=True) \
+            if not df_fletes.empty else df_fletes
+
+        self.rows: List[Dict[str, Any]] = []
+        self._by_ciudad: Dict[str, List[int]] = {}
+        postings: Dict[str, set] = {}
+
+        for row_id, row in enumerate(df.itertuples(index=False)):
+            transportadoras = list(row.transportadora)
+
+            self.rows.append(
+                {
+                    'ciudad': row.ciudad,
+                    'depto': row.depto,
+                    'zona': row.zona,
+                    'transportadoras': transportadoras,
+                    'pedido_minimo': format_currency_int(row.valor_pedido_minimo),
+                    'flete_unidad': format_currency_int(row.valor_flete_unidad),
+                }
+            )
+
+            self._by_ciudad.setdefault(row.ciudad, []).append(row_id)
+
+            text = ' '.join([str(row.ciudad), str(row.depto), str(row.zona)] +
+                            [str(t) for t in transportadoras])
+
+            for token in _TOKEN_RE.findall(_normalize(text)):
+                postings.setdefault(token, set()).add(row_id)
+
+        self._vocabulary = sorted(postings)
+        self._postings = [sorted(postings[token]) for token in self._vocabulary]
+        self._all_ids = tuple(range(len(self.rows)))
+
+        self._search = lru_cache(maxsize=cache_size)(self._search_uncached)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def cities(self) -> List[str]:
+        """
+        Sorted unique city names.
+        """
+        return sorted(self._by_ciudad)
+
+    def _prefix_ids(self, prefix: str) -> set:
+        """
+        Row ids having any token that starts with `prefix`.
+        """
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '￿', start)
+
+        ids = set()
+
+        for postings in self._postings[start:end]:
+            ids.update(postings)
+
+        return ids
+
+    def _search_uncached(self, query: str) -> Tuple[int, ...]:
+        tokens = _TOKEN_RE.findall(_normalize(query))
+
+        if not tokens:
+            return self._all_ids
+
+        ids = None
+
+        # Todas las palabras deben coincidir (AND), cada una por prefijo
+        for token in sorted(tokens, key=len, reverse=True):
+            matches = self._prefix_ids(token)
+            ids = matches if ids is None else ids & matches
+
+            if not ids:
+                return ()
+
+        return tuple(sorted(ids))
+
+    def search(self, ciudad: str | None = None, text: str | None = None) -> Tuple[int, ...]:
+        """
+        Row ids matching an exact city or a free-text prefix query.
+
+        Args:
+            ciudad (str | None): Exact city (dropdown value).
+            text (str | None): Free text typed by the user.
+
+        Returns:
+            Tuple[int, ...]: Matching row ids in table order.
+        """
+        if text and text.strip():
+            return self._search(text.strip())
+
+        if ciudad:
+            return tuple(self._by_ciudad.get(ciudad, ()))
+
+        return self._all_ids
+
+    def page(
+            self,
+            ciudad: str | None = None,
+            text: str | None = None,
+            page: int = 1,
+            per_page: int = 10) -> Dict[str, Any]:
+        """
+        One page of matching rows.
+
+        Args:
+            ciudad (str | None): Exact city filter.
+            text (str | None): Free-text filter.
+            page (int): Requested page (clamped to the valid range).
+            per_page (int): Rows per page.
+
+        Returns:
+            Dict[str, Any]: rows, page, total_pages and total_items.
+        """
+        ids = self.search(ciudad, text)
+
+        total_items = len(ids)
+        total_pages = max(1, (total_items + per_page - 1) // per_page)
+        page = max(1, min(page, total_pages))
+
+        start = (page - 1) * per_page
+
+        return \
+            {
+                'rows': [self.rows[i] for i in ids[start:start + per_page]],
+                'page': page,
+                'total_pages': total_pages,
+                'total_items': total_items,
+            }
@@ -21,8 +21,16 @@ class VentasProveedoresAnalyzer:
         self._meses_list = ['Todos']
 
         self._last_update = None
+        self._data_version = 0
         self._load_initial_data()
 
+    @property
+    def data_version(self) -> int:
+        """
+        Versión de los datos; cambia en cada recarga.
+        """
+        return self._data_version
+
     def _load_initial_data(self):
         """
         Carga inicial de datos desde Firebase.
@@ -67,6 +75,7 @@ class VentasProveedoresAnalyzer:
 
             self._update_lists()
             self._last_update = datetime.now()
+            self._data_version += 1
 
             return True
 
@@ -0,0 +1,269 @@
+import numpy as np
+import pandas as pd
+
+
+TREND_COLUMNS = \
+    [
+        'cliente_completo', 'cagr_6m', 'variacion_3m', 'variacion_reciente',
+        'tendencia_general', 'meses_activos', 'consistencia'
+    ]
+
+RFM_CATEGORIES = \
+    [
+        "🏆 Campeones Ascendentes",
+        "⚠️ Campeones en Declive",
+        "🚀 Clientes Estrella",
+        "💎 Leales Estables",
+        "📉 En Caída Libre",
+        "⭐ Potenciales con Momentum",
+        "🌱 Nuevos en Desarrollo",
+        "🔥 Oportunidades Calientes",
+        "⚠️ Atención Urgente",
+        "🆘 Rescate Inmediato",
+        "😴 Hibernando Estables",
+        "💸 Perdidos",
+    ]
+
+DEFAULT_CATEGORY = "🔄 Comportamiento Irregular"
+
+
+def _month_code(fechas: pd.Series) -> np.ndarray:
+    """
+    Mes como entero (año * 12 + mes - 1).
+    """
+    return (fechas.dt.year * 12 + fechas.dt.month - 1).to_numpy()
+
+
+def client_month_matrix(ventas: pd.DataFrame, by=('cliente_completo',)):
+    """
+    Pivotar ventas a una matriz densa cliente × mes.
+
+    Args:
+        ventas (pd.DataFrame): Ventas con las columnas `by`, fecha y valor_neto.
+        by: Columnas que identifican una fila de la matriz (p. ej.
+            ('vendedor', 'cliente_completo') para todos los vendedores a la vez).
+
+    Returns:
+        tuple: (claves, meses, valores, presentes). `claves` es un DataFrame
+        con las columnas `by` de cada fila, `meses` son códigos
+        año * 12 + mes - 1 ordenados, `valores` la venta neta por celda y
+        `presentes` si hubo algún documento ese mes (aunque la suma sea 0).
+    """
+    by = list(by)
+    ventas = ventas.dropna(subset=by)
+
+    row_codes, uniques = pd.MultiIndex.from_frame(ventas[by]).factorize()
+    claves = uniques.to_frame(index=False, name=by)
+    month_codes = _month_code(ventas['fecha'])
+
+    meses, month_idx = np.unique(month_codes, return_inverse=True)
+
+    shape = (len(claves), len(meses))
+    flat = row_codes * len(meses) + month_idx
+
+    valores = np.bincount(
+        flat,
+        weights=ventas['valor_neto'].to_numpy(dtype=float),
+        minlength=shape[0] * shape[1]
+    ).reshape(shape)
+
+    presentes = np.bincount(
+        flat, minlength=shape[0] * shape[1]).reshape(shape) > 0
+
+    return claves, meses, valores, presentes
+
+
+def _pick(valores, mask):
+    """
+    Valor de la única celda marcada por fila (0 si no hay ninguna).
+    """
+    return np.where(mask, valores, 0.0).sum(axis=1)
+
+
+def _pct_change(actual, base):
+    """
+    Variación porcentual; 100 si la base no es positiva y hay ventas, 0 si no.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = (actual - base) / base * 100
+
+    return np.where(base > 0, pct, np.where(actual > 0, 100.0, 0.0))
+
+
+def _cagr(primer, ultimo, periodos):
+    """
+    CAGR en %; 0 si el primer valor no es positivo o si la raíz no es real
+    (último valor negativo con más de un período).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (np.power(ultimo / primer, 1.0 / np.maximum(periodos, 1)) - 1) * 100
+
+    return np.nan_to_num(np.where((primer > 0) & (periodos > 0), cagr, 0.0), nan=0.0)
+
+
+def calculate_trends(ventas: pd.DataFrame, fecha_corte, by=('cliente_completo',)) -> pd.DataFrame:
+    """
+    Métricas de tendencia de todos los clientes a la vez.
+
+    Cada cliente se trata como la serie de sus meses con ventas (los meses
+    sin documentos no cuentan como 0), hasta el mes de `fecha_corte`:
+
+    - cagr_6m: desde el primer mes con ventas del año de corte hasta el
+      último; con menos de 2 meses en el año, sobre los últimos 6 meses.
+    - variacion_3m: últimos 3 meses cerrados vs los 3 anteriores.
+    - variacion_reciente: último mes vs promedio de los anteriores.
+    - consistencia: 100 - coeficiente de variación.
+
+    Args:
+        ventas (pd.DataFrame): Ventas reales hasta la fecha de corte.
+        fecha_corte: Último día del último mes cerrado.
+        by: Columnas que identifican cada serie (ver client_month_matrix).
+
+    Returns:
+        pd.DataFrame: Una fila por serie con las columnas `by` y TREND_COLUMNS.
+    """
+    columns = list(by) + TREND_COLUMNS[1:]
+
+    if ventas.empty:
+        return pd.DataFrame(columns=columns)
+
+    fecha_corte = pd.Timestamp(fecha_corte)
+    mes_corte = fecha_corte.year * 12 + fecha_corte.month - 1
+    mes_enero = fecha_corte.year * 12
+
+    ventas = ventas[_month_code(ventas['fecha']) <= mes_corte]
+
+    if ventas.empty:
+        return pd.DataFrame(columns=columns)
+
+    claves, meses, valores, presentes = client_month_matrix(ventas, by)
+
+    n = presentes.sum(axis=1)
+    pos = np.cumsum(presentes, axis=1)
+    last = presentes & (pos == n[:, None])
+    ultimo = _pick(valores, last)
+
+    # 1. CAGR: año de corte, o últimos 6 meses si hay menos de 2 en el año
+    en_anio = presentes & (meses >= mes_enero)
+    n_anio = en_anio.sum(axis=1)
+    primero_anio = en_anio & (np.cumsum(en_anio, axis=1) == 1)
+
+    n_recientes = np.minimum(6, n)
+    primero_reciente = presentes & (pos == (n - n_recientes + 1)[:, None])
+
+    usar_anio = n_anio >= 2
+    primer = np.where(usar_anio, _pick(valores, primero_anio),
+                      _pick(valores, primero_reciente))
+    periodos = np.where(usar_anio, n_anio, n_recientes) - 1
+
+    cagr = _cagr(primer, ultimo, periodos)
+
+    # 2. Últimos 3 meses cerrados vs los 3 anteriores
+    cerrados = presentes & (meses < mes_corte)
+    n_cerrados = cerrados.sum(axis=1)
+    pos_cerrados = np.cumsum(cerrados, axis=1)
+
+    ultimos_3m = np.where(
+        cerrados & (pos_cerrados > (n_cerrados - 3)[:, None]), valores, 0.0).sum(axis=1)
+    anteriores_3m = np.where(
+        cerrados & (pos_cerrados > (n_cerrados - 6)[:, None]) &
+        (pos_cerrados <= (n_cerrados - 3)[:, None]), valores, 0.0).sum(axis=1)
+
+    variacion_3m = np.where(
+        (n >= 6) & (n_cerrados >= 6),
+        _pct_change(ultimos_3m, anteriores_3m), 0.0)
+
+    # 3. Último mes vs promedio de los anteriores
+    suma = np.where(presentes, valores, 0.0).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        promedio_anterior = (suma - ultimo) / (n - 1)
+
+    variacion_reciente = np.where(
+        n >= 3, _pct_change(ultimo, promedio_anterior), 0.0)
+
+    # 4. Tendencia general
+    tendencia = np.select(
+        [
+            (cagr > 10) & (variacion_3m > 5),
+            (cagr > 0) & (variacion_3m >= 0),
+            (cagr < -10) & (variacion_3m < -5),
+            (cagr < 0) & (variacion_3m < 0),
+        ],
+        ['crecimiento_fuerte', 'crecimiento', 'decrecimiento_fuerte', 'decrecimiento'],
+        default='estable'
+    )
+
+    # 5. Consistencia (desviación estándar muestral sobre meses con ventas)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = suma / n
+        varianza = np.where(
+            presentes, (valores - media[:, None]) ** 2, 0.0).sum(axis=1) / (n - 1)
+        cv = np.where(media > 0, np.sqrt(varianza) / media * 100, 100.0)
+
+    consistencia = np.where(n >= 3, np.maximum(0, 100 - cv), 50.0)
+
+    trends = claves.assign(
+        cagr_6m=np.round(cagr, 2),
+        variacion_3m=np.round(variacion_3m, 2),
+        variacion_reciente=np.round(variacion_reciente, 2),
+        tendencia_general=tendencia,
+        meses_activos=n,
+        consistencia=np.round(consistencia, 1),
+    )
+
+    # Menos de 2 meses: valores neutros
+    neutral = n < 2
+
+    trends.loc[neutral, ['cagr_6m', 'variacion_3m', 'variacion_reciente', 'consistencia']] = 0
+    trends.loc[neutral, 'tendencia_general'] = 'estable'
+    trends.loc[neutral, 'meses_activos'] = 1
+
+    return trends
+
+
+def trend_scores(df: pd.DataFrame) -> np.ndarray:
+    """
+    Score de tendencia (1-5) según CAGR, variación reciente y consistencia.
+    """
+    cagr = df['cagr_6m'].to_numpy(dtype=float)
+    var_reciente = df['variacion_reciente'].to_numpy(dtype=float)
+    consistencia = df['consistencia'].to_numpy(dtype=float)
+
+    score = np.select(
+        [cagr >= 20, cagr >= 10, cagr >= 0, cagr >= -10],
+        [5.0, 4.0, 3.0, 2.0],
+        default=1.0
+    )
+
+    # Ajustes: variación reciente (±0.5) y consistencia (±0.3)
+    score += np.select([var_reciente > 15, var_reciente < -15], [0.5, -0.5], 0.0)
+    score += np.select([consistencia > 80, consistencia < 30], [0.3, -0.3], 0.0)
+
+    return np.rint(np.clip(score, 1, 5)).astype(int)
+
+
+def categorize(df: pd.DataFrame) -> np.ndarray:
+    """
+    Categoría RFM+ de cada cliente (en orden de prioridad).
+    """
+    R, F, M, T = (df[c].to_numpy() for c in ('R', 'F', 'M', 'T'))
+    cagr = df['cagr_6m'].to_numpy(dtype=float)
+
+    conditions = \
+        [
+            (R >= 4) & (F >= 4) & (M >= 4) & (T >= 4),
+            (R >= 4) & (F >= 4) & (M >= 4) & (T <= 2),
+            (F >= 4) & (M >= 4) & (T >= 4) & (cagr > 15),
+            (F >= 4) & (M >= 4) & (T >= 3),
+            (F >= 3) & (M >= 4) & (T <= 2) & (cagr < -10),
+            (R >= 4) & (T >= 4),
+            (R >= 4) & (F <= 2) & (T >= 3),
+            (T >= 4) & (M >= 3) & (F > 3),
+            (M >= 4) & (R <= 2) & (T <= 2),
+            (M >= 4) & (R <= 2) & (F >= 3) & (T <= 2),
+            (R <= 2) & (F <= 2) & (T == 3),
+            (R <= 2) & (F <= 2) & (T <= 2),
+        ]
+
+    return np.select(conditions, RFM_CATEGORIES, default=DEFAULT_CATEGORY)
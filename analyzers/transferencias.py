@@ -1,6 +1,7 @@
 
 import pandas as pd
-from datetime import datetime
+
+from .variaciones import VariacionesMatrix
 
 
 class TransferenciasAnalyzer:
@@ -30,6 +31,13 @@ class TransferenciasAnalyzer:
         """
         return self._unified_analyzer.meses_list
 
+    @property
+    def data_version(self):
+        """
+        Compatibilidad: versión de los datos compartidos.
+        """
+        return self._unified_analyzer.data_version
+
     def reload_data(self):
         """
         Force reload of ALL data from Firebase.
@@ -100,7 +108,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, mes)
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -118,7 +126,7 @@ class TransferenciasAnalyzer:
         """
         df = self.filter_data(vendedor, mes)
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -137,7 +145,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, mes)
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -161,7 +169,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, mes)
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -184,7 +192,7 @@ class TransferenciasAnalyzer:
         """
         df = self.filter_data(vendedor, 'Todos')
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return ['Seleccione un cliente']
@@ -200,7 +208,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, 'Todos')
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty or cliente == 'Seleccione un cliente':
             return pd.DataFrame()
@@ -229,7 +237,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, 'Todos')
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -266,7 +274,7 @@ class TransferenciasAnalyzer:
         df = self.filter_data(vendedor, 'Todos')
 
         ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+            df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame(), 0, 0
@@ -329,8 +337,7 @@ class TransferenciasAnalyzer:
             df = self.filter_data(vendedor, 'Todos')
 
             # Filter only sales
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
+            ventas_reales = df[df['es_remision']]
 
             if ventas_reales.empty:
                 return {'total': pd.DataFrame(), 'mensual': pd.DataFrame()}
@@ -404,86 +411,15 @@ class TransferenciasAnalyzer:
 
     def get_analisis_convenios(self, vendedor='Todos', mes='Todos'):
         """
-        Analyze compliance with agreements using correct field names.
+        Analyze compliance with agreements using correct field names
+        (cached per-NIT aggregates, see UnifiedVentasAnalyzer.get_analisis_convenios).
         """
-        # Load convenios
-        df_convenios = self.load_convenios_from_firebase()
-
-        if df_convenios.empty:
-            return pd.DataFrame()
-
-        # Get sales data
-        df_ventas = self.filter_data(vendedor, mes)
-        ventas_reales = df_ventas[df_ventas['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-
-        if ventas_reales.empty:
-            return pd.DataFrame()
-
-        # Group sales by NIT
-        ventas_por_nit = ventas_reales.groupby('nit').agg({
-            'valor_bruto': 'sum',
-            'descuento': lambda x: abs(x).sum(),
-            'cliente_completo': 'first',
-            'documento_id': 'count',
-            'transferencista': 'first'  # Usar transferencista en lugar de vendedor
-        }).reset_index()
-
-        # Calculate net value (valor_bruto - descuento) for target comparison
-        ventas_por_nit['valor_neto'] = ventas_por_nit['valor_bruto'] - \
-            ventas_por_nit['descuento']
-
-        # Calculate actual discount percentage (still using valor_bruto as denominator)
-        ventas_por_nit['descuento_real_pct'] = (
-            ventas_por_nit['descuento'] / ventas_por_nit['valor_bruto'] * 100
-        ).round(2)
-
-        # Merge with convenios using correct field names
-        resultado = pd.merge(
-            ventas_por_nit,
-            df_convenios[['nit', 'client_name', 'razon', 'seller_name',
-                          'rebate_pct', 'target_value', 'observations']],
-            on='nit',
-            how='inner'
+        return self._unified_analyzer.get_analisis_convenios(
+            mode="transferencista",
+            persona=vendedor,
+            mes=mes
         )
 
-        if resultado.empty:
-            return pd.DataFrame()
-
-        # Calculate compliance
-        resultado['cumplimiento_descuento'] = (
-            resultado['descuento_real_pct'] <= resultado['rebate_pct']
-        )
-        resultado['diferencia_descuento'] = (
-            resultado['descuento_real_pct'] - resultado['rebate_pct']
-        ).round(2)
-
-        # Calculate target compliance using valor_neto
-        resultado['cumplimiento_meta'] = (
-            resultado['valor_neto'] >= resultado['target_value']
-        )
-        resultado['diferencia_meta'] = (
-            resultado['valor_neto'] - resultado['target_value']
-        )
-
-        # Calculate progress percentage towards target using valor_neto
-        resultado['progreso_meta_pct'] = (
-            resultado['valor_neto'] / resultado['target_value'] * 100
-        ).round(1)
-
-        # Calculate expected sales based on days elapsed in the year
-        today = datetime.now()
-        days_elapsed = today.timetuple().tm_yday  # Day of year (1-365/366)
-        days_in_year = 366 if today.year % 4 == 0 else 365  # Check for leap year
-
-        resultado['dias_transcurridos'] = days_elapsed
-        resultado['ventas_esperadas'] = (
-            resultado['target_value'] / days_in_year * days_elapsed).round(0)
-        resultado['progreso_esperado_pct'] = round(
-            days_elapsed / days_in_year * 100, 2)
-
-        return resultado
-
     def load_recibos_from_firebase(self, force_reload=False):
         """
         Delegación al analyzer unificado.
@@ -514,117 +450,26 @@ class TransferenciasAnalyzer:
     def get_mapa_ventas_data(self, vendedor='Todos', mes='Todos', region_filter='Colombia'):
         return pd.DataFrame()
 
-    def get_variaciones_mensuales_clientes(self, vendedor='Todos', mes_inicio=1, mes_fin=12, filtro_tipo='todos'):
+    def get_variaciones_matrix(self):
         """
-        Obtener variaciones porcentuales mensuales de ventas por URL para heatmap
+        Matriz cliente × mes de transferencias para los heatmaps de
+        variaciones; se construye una vez por versión de datos.
         """
-        try:
-            df = self.filter_data(vendedor, 'Todos')
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Filtrar por rango de meses
-            ventas_reales = ventas_reales[
-                (ventas_reales['fecha'].dt.month >= mes_inicio) &
-                (ventas_reales['fecha'].dt.month <= mes_fin)
-            ]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Crear mes_año para agrupación
-            ventas_reales['mes_año'] = ventas_reales['fecha'].dt.strftime(
-                '%Y-%m')
-
-            # Agrupar por URL y mes
-            resultado = ventas_reales.groupby(['url', 'mes_año']).agg({
-                'valor_neto': 'sum'
-            }).reset_index()
-
-            # Crear tabla pivote con ventas por URL y mes
-            pivot_table = resultado.pivot(
-                index='url',
-                columns='mes_año',
-                values='valor_neto'
-            ).fillna(0)
-
-            if pivot_table.empty or pivot_table.shape[1] < 2:
-                return pd.DataFrame()
-
-            # Ordenar columnas cronológicamente
-            meses_ordenados = sorted(pivot_table.columns)
-            pivot_table = pivot_table[meses_ordenados]
-
-            # Calcular variaciones porcentuales mes a mes
-            variaciones = pd.DataFrame(index=pivot_table.index)
-
-            for i in range(1, len(meses_ordenados)):
-                mes_anterior = meses_ordenados[i-1]
-                mes_actual = meses_ordenados[i]
-
-                # Calcular variación porcentual correctamente
-                ventas_anterior = pivot_table[mes_anterior]
-                ventas_actual = pivot_table[mes_actual]
-
-                # Solo calcular variación si hay ventas en el mes anterior
-                variacion = pd.Series(index=pivot_table.index, dtype=float)
-
-                for url in pivot_table.index:
-                    anterior = ventas_anterior[url]
-                    actual = ventas_actual[url]
-
-                    if anterior > 0:  # Solo si hay ventas en mes anterior
-                        variacion[url] = ((actual - anterior) / anterior) * 100
-                    # Nueva venta (antes no había)
-                    elif actual > 0 and anterior == 0:
-                        variacion[url] = 100.0  # 100% de crecimiento desde 0
-                    else:
-                        variacion[url] = 0.0  # Sin cambios o ambos en 0
-
-                # Crear nombre de columna más legible
-                try:
-                    fecha_ant = pd.to_datetime(mes_anterior + '-01')
-                    fecha_act = pd.to_datetime(mes_actual + '-01')
-
-                    meses_esp = {
-                        1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr',
-                        5: 'May', 6: 'Jun', 7: 'Jul', 8: 'Ago',
-                        9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
-                    }
-
-                    nombre_col = f"{meses_esp[fecha_ant.month]} → {meses_esp[fecha_act.month]}"
-                except:
-                    nombre_col = f"{mes_anterior} → {mes_actual}"
-
-                variaciones[nombre_col] = variacion
+        def build():
+            source = self._unified_analyzer.df_transferencias
+            ventas_reales = source[source['es_remision']] if not source.empty else source
 
-            if variaciones.empty:
-                return pd.DataFrame()
+            return VariacionesMatrix(ventas_reales, 'transferencista')
 
-            # Filtrar URLs que tengan al menos una variación significativa
-            mask_activos = (variaciones.abs() > 0.1).any(axis=1)
-            variaciones = variaciones[mask_activos]
+        return self._unified_analyzer.get_versioned('variaciones_transferencista', build)
 
-            if variaciones.empty:
-                return pd.DataFrame()
-
-            # CORRECCIÓN: Calcular suma de variaciones porcentuales para ranking
-            variaciones['suma_variaciones'] = variaciones.sum(axis=1)
-
-            # Aplicar filtros CORRECTAMENTE por suma de variaciones
-            if filtro_tipo == 'top10':
-                variaciones = variaciones.nlargest(10, 'suma_variaciones')
-            elif filtro_tipo == 'bottom10':
-                variaciones = variaciones.nsmallest(10, 'suma_variaciones')
-            #     variaciones = variaciones #.nlargest(, 'suma_variaciones')
-
-            # Remover columna auxiliar antes de retornar
-            variaciones = variaciones.drop('suma_variaciones', axis=1)
-
-            return variaciones
+    def get_variaciones_mensuales_clientes(self, vendedor='Todos', mes_inicio=1, mes_fin=12, filtro_tipo='todos'):
+        """
+        Obtener variaciones porcentuales mensuales de ventas por URL para heatmap
+        """
+        try:
+            return self.get_variaciones_matrix().variaciones(
+                vendedor, mes_inicio, mes_fin, filtro_tipo)
 
         except Exception as e:
             print(f"❌ Error en get_variaciones_mensuales_clientes: {e}")
@@ -635,32 +480,8 @@ class TransferenciasAnalyzer:
     def get_clientes_con_variaciones(self, vendedor='Todos', mes_inicio=1, mes_fin=12):
         """Obtener lista de clientes (URLs) que tienen variaciones en el período"""
         try:
-            df = self.filter_data(vendedor, 'Todos')
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
-
-            if ventas_reales.empty:
-                return []
-
-            # Filtrar por rango de meses
-            ventas_reales = ventas_reales[
-                (ventas_reales['fecha'].dt.month >= mes_inicio) &
-                (ventas_reales['fecha'].dt.month <= mes_fin)
-            ]
-
-            if ventas_reales.empty:
-                return []
-
-            # Crear mes_año para agrupación
-            ventas_reales['mes_año'] = ventas_reales['fecha'].dt.strftime(
-                '%Y-%m')
-
-            # Obtener URLs que tienen ventas en al menos 2 meses diferentes
-            urls_por_mes = ventas_reales.groupby('url')['mes_año'].nunique()
-            urls_con_variaciones = urls_por_mes[urls_por_mes >= 2].index.tolist(
-            )
-
-            return urls_con_variaciones
+            return self.get_variaciones_matrix().clientes_con_variaciones(
+                vendedor, mes_inicio, mes_fin)
 
         except Exception as e:
             print(f"❌ Error obteniendo clientes con variaciones: {e}")
@@ -669,94 +490,8 @@ class TransferenciasAnalyzer:
     def get_variaciones_clientes_especificos(self, vendedor='Todos', mes_inicio=1, mes_fin=12, clientes_seleccionados=[]):
         """Obtener variaciones para clientes específicos seleccionados"""
         try:
-            if not clientes_seleccionados:
-                return pd.DataFrame()
-
-            # Obtener datos base
-            df = self.filter_data(vendedor, 'Todos')
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Filtrar por clientes seleccionados
-            ventas_reales = ventas_reales[ventas_reales['url'].isin(
-                clientes_seleccionados)]
-
-            # Filtrar por rango de meses
-            ventas_reales = ventas_reales[
-                (ventas_reales['fecha'].dt.month >= mes_inicio) &
-                (ventas_reales['fecha'].dt.month <= mes_fin)
-            ]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Crear mes_año para agrupación
-            ventas_reales['mes_año'] = ventas_reales['fecha'].dt.strftime(
-                '%Y-%m')
-
-            # Agrupar por URL y mes
-            resultado = ventas_reales.groupby(['url', 'mes_año']).agg({
-                'valor_neto': 'sum'
-            }).reset_index()
-
-            # Crear tabla pivote
-            pivot_table = resultado.pivot(
-                index='url',
-                columns='mes_año',
-                values='valor_neto'
-            ).fillna(0)
-
-            if pivot_table.empty or pivot_table.shape[1] < 2:
-                return pd.DataFrame()
-
-            # Ordenar columnas cronológicamente
-            meses_ordenados = sorted(pivot_table.columns)
-            pivot_table = pivot_table[meses_ordenados]
-
-            # Calcular variaciones porcentuales mes a mes
-            variaciones = pd.DataFrame(index=pivot_table.index)
-
-            for i in range(1, len(meses_ordenados)):
-                mes_anterior = meses_ordenados[i-1]
-                mes_actual = meses_ordenados[i]
-
-                ventas_anterior = pivot_table[mes_anterior]
-                ventas_actual = pivot_table[mes_actual]
-
-                variacion = pd.Series(index=pivot_table.index, dtype=float)
-
-                for url in pivot_table.index:
-                    anterior = ventas_anterior[url]
-                    actual = ventas_actual[url]
-
-                    if anterior > 0:
-                        variacion[url] = ((actual - anterior) / anterior) * 100
-                    elif actual > 0 and anterior == 0:
-                        variacion[url] = 100.0
-                    else:
-                        variacion[url] = 0.0
-
-                # Crear nombre de columna
-                try:
-                    fecha_ant = pd.to_datetime(mes_anterior + '-01')
-                    fecha_act = pd.to_datetime(mes_actual + '-01')
-
-                    meses_esp = {
-                        1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr',
-                        5: 'May', 6: 'Jun', 7: 'Jul', 8: 'Ago',
-                        9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
-                    }
-
-                    nombre_col = f"{meses_esp[fecha_ant.month]} → {meses_esp[fecha_act.month]}"
-                except:
-                    nombre_col = f"{mes_anterior} → {mes_actual}"
-
-                variaciones[nombre_col] = variacion
-
-            return variaciones
+            return self.get_variaciones_matrix().variaciones_clientes(
+                vendedor, mes_inicio, mes_fin, clientes_seleccionados)
 
         except Exception as e:
             print(f"❌ Error en variaciones clientes específicos: {e}")
@@ -0,0 +1,212 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .rfm_engine import client_month_matrix
+
+
+MESES_ESP = \
+    {
+        1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr',
+        5: 'May', 6: 'Jun', 7: 'Jul', 8: 'Ago',
+        9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
+    }
+
+
+class _Matrix:
+    """
+    Dense url × month sales block with the month presence mask.
+    """
+
+    def __init__(self, urls: np.ndarray, valores: np.ndarray, presentes: np.ndarray):
+        self.urls = urls
+        self.valores = valores
+        self.presentes = presentes
+        self._row_by_url = {url: i for i, url in enumerate(urls)}
+
+    def rows_for(self, urls: Sequence[str]) -> np.ndarray:
+        return np.array(sorted(self._row_by_url[u] for u in set(urls) if u in self._row_by_url), dtype=int)
+
+
+class VariacionesMatrix:
+    """
+    Client (url) × month sales matrix for the monthly-variation heatmaps.
+
+    Built once per data version from the sales documents: one block for all
+    clients and one per salesperson (or transfer agent), with rows sorted by
+    url and months in chronological order. Month-range sliders, variation
+    filters and client subsets are slices of these blocks, so no request
+    re-groups the raw rows or formats dates.
+    """
+
+    def __init__(self, ventas_reales: pd.DataFrame, persona_col: str):
+        """
+        Constructor.
+
+        Args:
+            ventas_reales (pd.DataFrame): Sales documents with url, fecha,
+                valor_neto and `persona_col`.
+            persona_col (str): 'vendedor' or 'transferencista'.
+        """
+        self._blocks: Dict[str, _Matrix] = {}
+        self.meses = np.array([], dtype=int)
+
+        ventas = ventas_reales.dropna(subset=['fecha'])
+
+        if ventas.empty:
+            return
+
+        # Meses comunes a todos los bloques (códigos año * 12 + mes - 1)
+        claves, self.meses, valores, presentes = \
+            client_month_matrix(ventas, by=(persona_col, 'url'))
+
+        self._blocks['Todos'] = self._merge_rows(
+            claves['url'].to_numpy(), valores, presentes)
+
+        for persona, rows in claves.groupby(persona_col, sort=False).indices.items():
+            self._blocks[persona] = self._merge_rows(
+                claves['url'].to_numpy()[rows], valores[rows], presentes[rows])
+
+    @staticmethod
+    def _merge_rows(urls: np.ndarray, valores: np.ndarray, presentes: np.ndarray) -> _Matrix:
+        """
+        Sum the rows that share a url and sort them by url.
+        """
+        codes, uniques = pd.factorize(urls, sort=True)
+
+        merged = np.zeros((len(uniques), valores.shape[1]))
+        np.add.at(merged, codes, valores)
+
+        merged_presentes = np.zeros((len(uniques), valores.shape[1]), dtype=bool)
+        np.logical_or.at(merged_presentes, codes, presentes)
+
+        return _Matrix(np.asarray(uniques), merged, merged_presentes)
+
+    def _slice(self, persona: str, mes_inicio: int, mes_fin: int, urls: Sequence[str] | None = None):
+        """
+        Rows and months that have sales for the persona, month-of-year range
+        and optional client subset.
+
+        Returns:
+            tuple: (urls, meses, valores, presentes) or None if there is no data.
+        """
+        block = self._blocks.get(persona)
+
+        if block is None or not len(self.meses):
+            return None
+
+        mes_del_anio = self.meses % 12 + 1
+        cols = np.flatnonzero((mes_del_anio >= mes_inicio) & (mes_del_anio <= mes_fin))
+
+        rows = block.rows_for(urls) if urls is not None else np.arange(len(block.urls))
+
+        presentes = block.presentes[np.ix_(rows, cols)]
+
+        # Solo filas y meses con algún documento (igual que un pivot de los datos)
+        rows_activas = presentes.any(axis=1)
+        cols_activas = presentes.any(axis=0)
+
+        rows = rows[rows_activas]
+        cols = cols[cols_activas]
+
+        if not len(rows):
+            return None
+
+        return \
+            block.urls[rows], self.meses[cols], \
+            block.valores[np.ix_(rows, cols)], block.presentes[np.ix_(rows, cols)]
+
+    @staticmethod
+    def _variaciones(urls: np.ndarray, meses: np.ndarray, valores: np.ndarray) -> pd.DataFrame:
+        """
+        Month-over-month % variation between consecutive months.
+        """
+        anterior = valores[:, :-1]
+        actual = valores[:, 1:]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variacion = np.where(
+                anterior > 0,
+                (actual - anterior) / anterior * 100,
+                # Nueva venta (antes no había): 100% de crecimiento desde 0
+                np.where((actual > 0) & (anterior == 0), 100.0, 0.0)
+            )
+
+        # Columnas con el mismo nombre (mismo par de meses en otro año) se
+        # sobrescriben conservando la primera posición
+        columnas = {}
+
+        for i in range(1, len(meses)):
+            nombre_col = f"{MESES_ESP[meses[i - 1] % 12 + 1]} → {MESES_ESP[meses[i] % 12 + 1]}"
+            columnas[nombre_col] = variacion[:, i - 1]
+
+        return pd.DataFrame(columnas, index=pd.Index(urls, name='url'))
+
+    def variaciones(self, persona: str = 'Todos', mes_inicio: int = 1, mes_fin: int = 12,
+                    filtro_tipo: str = 'todos') -> pd.DataFrame:
+        """
+        Heatmap of monthly variations per client.
+
+        Args:
+            persona (str): Salesperson / transfer agent or 'Todos'.
+            mes_inicio (int): First month of the year (1-12).
+            mes_fin (int): Last month of the year (1-12).
+            filtro_tipo (str): 'todos', 'top10' or 'bottom10' by the sum of
+                the variations.
+
+        Returns:
+            pd.DataFrame: Clients (url) × 'Mes → Mes' variations; empty if
+            there are fewer than 2 months.
+        """
+        data = self._slice(persona, mes_inicio, mes_fin)
+
+        if data is None or len(data[1]) < 2:
+            return pd.DataFrame()
+
+        urls, meses, valores, _ = data
+        variaciones = self._variaciones(urls, meses, valores)
+
+        # Filtrar URLs que tengan al menos una variación significativa
+        variaciones = variaciones[(variaciones.abs() > 0.1).any(axis=1)]
+
+        if variaciones.empty:
+            return pd.DataFrame()
+
+        if filtro_tipo in ('top10', 'bottom10'):
+            suma_variaciones = variaciones.sum(axis=1)
+            variaciones = variaciones.loc[
+                suma_variaciones.nlargest(10).index if filtro_tipo == 'top10'
+                else suma_variaciones.nsmallest(10).index]
+
+        return variaciones
+
+    def clientes_con_variaciones(self, persona: str = 'Todos', mes_inicio: int = 1, mes_fin: int = 12) -> List[str]:
+        """
+        Clients (url) with sales in at least 2 different months of the range.
+        """
+        data = self._slice(persona, mes_inicio, mes_fin)
+
+        if data is None:
+            return []
+
+        urls, _, _, presentes = data
+
+        return urls[presentes.sum(axis=1) >= 2].tolist()
+
+    def variaciones_clientes(self, persona: str = 'Todos', mes_inicio: int = 1, mes_fin: int = 12,
+                             clientes: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Monthly variations of a given subset of clients (no activity filter).
+        """
+        if not clientes:
+            return pd.DataFrame()
+
+        data = self._slice(persona, mes_inicio, mes_fin, urls=clientes)
+
+        if data is None or len(data[1]) < 2:
+            return pd.DataFrame()
+
+        urls, meses, valores, _ = data
+
+        return self._variaciones(urls, meses, valores)
@@ -1,7 +1,8 @@
 import time
+import threading
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Dict
 from collections import Counter
 
@@ -13,6 +14,10 @@ from utils import (
     calcular_dias_habiles_colombia
 )
 
+from .fletes_index import FletesIndex
+from .rfm_engine import calculate_trends, trend_scores, categorize
+from .variaciones import VariacionesMatrix
+
 
 class VentasAnalyzer:
 
@@ -23,10 +28,14 @@ class VentasAnalyzer:
         from . import get_unified_analyzer
         self._unified_analyzer = get_unified_analyzer()
 
-        # Cache manager for RFM+ model
-        self._rfm_cache = {}
-        self._rfm_cache_timestamp = None
-        self._rfm_cache_ttl = 300
+        # RFM+ tables of every salesperson: ((data_version, día), tablas)
+        self._rfm_tables = (None, {})
+        self._rfm_lock = threading.Lock()
+
+        # Tabla de fletes preparada y el DataFrame de fletes del que se construyó
+        self._fletes_index = None
+        self._fletes_index_source = None
+
 
     @property
     def df_ventas(self) -> DataFrame:
@@ -88,6 +97,19 @@ class VentasAnalyzer:
         """
         return self._unified_analyzer.filter_ventas_data(vendedor, mes)
 
+    @property
+    def data_version(self) -> int:
+        """
+        Version of the shared sales data (see UnifiedVentasAnalyzer).
+        """
+        return self._unified_analyzer.data_version
+
+    def get_filtered_view(self, vendedor='Todos', mes='Todos'):
+        """
+        Shared read-only filtered view (see UnifiedVentasAnalyzer).
+        """
+        return self._unified_analyzer.get_filtered_view(vendedor, mes)
+
     def get_resumen_ventas(self, vendedor='Todos', mes='Todos'):
         """
         Get sales summary statistics.
@@ -112,10 +134,8 @@ class VentasAnalyzer:
         """
         Get sales distribution by zone.
         """
-        df = self.filter_data(vendedor, mes)
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, mes).ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -131,9 +151,8 @@ class VentasAnalyzer:
         """
         Get top customers by sales.
         """
-        df = self.filter_data(vendedor, mes)
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, mes).ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -149,9 +168,8 @@ class VentasAnalyzer:
         """
         Get payment method distribution.
         """
-        df = self.filter_data(vendedor, mes)
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, mes).ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -171,10 +189,8 @@ class VentasAnalyzer:
         """
         Get data for treemap visualization.
         """
-        df = self.filter_data(vendedor, mes)
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, mes).ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -211,10 +227,8 @@ class VentasAnalyzer:
         """
         Get list of clients for dropdown.
         """
-        df = self.filter_data(vendedor, 'Todos')
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty:
             return ['Seleccione un cliente']
@@ -236,10 +250,8 @@ class VentasAnalyzer:
         """
         Get client's sales evolution by day.
         """
-        df = self.filter_data(vendedor, 'Todos')
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty or cliente == 'Seleccione un cliente':
             return pd.DataFrame()
@@ -264,10 +276,8 @@ class VentasAnalyzer:
         """
         Get accumulated sales up to selected month for all clients.
         """
-        df = self.filter_data(vendedor, 'Todos')
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -301,10 +311,8 @@ class VentasAnalyzer:
         """
         Get number of unique clients impacted per month with percentage calculation.
         """
-        df = self.filter_data(vendedor, 'Todos')
-
-        ventas_reales = \
-            df[df['tipo'].str.contains('Remision', case=False, na=False)]
+        ventas_reales = self._unified_analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty:
             return pd.DataFrame(), 0, 0
@@ -375,8 +383,7 @@ class VentasAnalyzer:
             df = self.filter_data(vendedor, 'Todos')
 
             # Filter only sales (exclude returns, credit notes, etc.)
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
+            ventas_reales = df[df['es_remision']]
 
             if ventas_reales.empty:
                 return pd.DataFrame()
@@ -449,97 +456,23 @@ class VentasAnalyzer:
 
     def get_analisis_convenios(self, vendedor='Todos', mes='Todos'):
         """
-        Analyze compliance with agreements using correct field names.
+        Analyze compliance with agreements using correct field names
+        (cached per-NIT aggregates, see UnifiedVentasAnalyzer.get_analisis_convenios).
         """
-        # Load convenios
-        df_convenios = self.load_convenios_from_firebase()
-
-        if df_convenios.empty:
-            return pd.DataFrame()
-
-        # Get sales data
-        df_ventas = self.filter_data(vendedor, mes)
-        ventas_reales = df_ventas[df_ventas['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-
-        if ventas_reales.empty:
-            return pd.DataFrame()
-
-        # Group sales by NIT
-        ventas_por_nit = ventas_reales.groupby('nit').agg({
-            'valor_bruto': 'sum',
-            'descuento': lambda x: abs(x).sum(),
-            'cliente_completo': 'first',
-            'documento_id': 'count',
-            'vendedor': 'first'
-        }).reset_index()
-
-        # Calculate net value (valor_bruto - descuento) for target comparison
-        ventas_por_nit['valor_neto'] = ventas_por_nit['valor_bruto'] - \
-            ventas_por_nit['descuento']
-
-        # Calculate actual discount percentage (still using valor_bruto as denominator)
-        ventas_por_nit['descuento_real_pct'] = (
-            ventas_por_nit['descuento'] / ventas_por_nit['valor_bruto'] * 100
-        ).round(2)
-
-        # Merge with convenios using correct field names
-        resultado = pd.merge(
-            ventas_por_nit,
-            df_convenios[['nit', 'client_name', 'razon', 'seller_name',
-                          'rebate_pct', 'target_value', 'observations']],
-            on='nit',
-            how='inner'
-        )
-
-        if resultado.empty:
-            return pd.DataFrame()
-
-        # Calculate compliance
-        resultado['cumplimiento_descuento'] = (
-            resultado['descuento_real_pct'] <= resultado['rebate_pct']
-        )
-        resultado['diferencia_descuento'] = (
-            resultado['descuento_real_pct'] - resultado['rebate_pct']
-        ).round(2)
-
-        # Calculate target compliance using valor_neto
-        resultado['cumplimiento_meta'] = (
-            resultado['valor_neto'] >= resultado['target_value']
+        return self._unified_analyzer.get_analisis_convenios(
+            mode="vendedor",
+            persona=vendedor,
+            mes=mes
         )
-        resultado['diferencia_meta'] = (
-            resultado['valor_neto'] - resultado['target_value']
-        )
-
-        # Calculate progress percentage towards target using valor_neto
-        resultado['progreso_meta_pct'] = (
-            resultado['valor_neto'] / resultado['target_value'] * 100
-        ).round(1)
-
-        # Calculate expected sales based on days elapsed in the year
-        today = datetime.now()
-        days_elapsed = today.timetuple().tm_yday  # Day of year (1-365/366)
-        days_in_year = 366 if today.year % 4 == 0 else 365  # Check for leap year
-
-        resultado['dias_transcurridos'] = days_elapsed
-        resultado['ventas_esperadas'] = (
-            resultado['target_value'] / days_in_year * days_elapsed).round(0)
-        resultado['progreso_esperado_pct'] = \
-            round(days_elapsed / days_in_year * 100, 2)
-
-        return resultado
 
     def get_ventas_por_rango_meses(self, vendedor='Todos', mes_inicio=1, mes_fin=12, min_monto=None, max_monto=None):
         """
         Get sales data filtered by month range (1-12) and optionally by amount range
         """
         try:
-            # Filter by vendor
-            df = self.filter_data(vendedor, 'Todos')
-
-            # Filter only sales
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
+            # Filter only sales of the vendor
+            ventas_reales = self._unified_analyzer.get_filtered_view(
+                vendedor, 'Todos').ventas_reales
 
             if ventas_reales.empty:
                 return {'total': pd.DataFrame(), 'mensual': pd.DataFrame()}
@@ -621,7 +554,8 @@ class VentasAnalyzer:
                 print("❌ [VentasAnalyzer] No se pudo obtener conexión para recibos")
                 return pd.DataFrame()
 
-            data = db.get("recibos_caja")
+            # Recibos de la ventana residente únicamente
+            data = self._unified_analyzer.fetch_windowed(db, "recibos_caja")
 
             if data:
                 result = self.process_recibos_data(data)
@@ -920,117 +854,26 @@ class VentasAnalyzer:
 
         return df_recibos['valor_recibo'].sum()
 
+    def get_variaciones_matrix(self):
+        """
+        Client × month sales matrix for the variation heatmaps, built once
+        per data version (see VariacionesMatrix).
+        """
+        return self._unified_analyzer.get_versioned(
+            'variaciones_vendedor',
+            lambda: VariacionesMatrix(
+                self._unified_analyzer.get_filtered_view('Todos', 'Todos').ventas_reales,
+                'vendedor'
+            )
+        )
+
     def get_variaciones_mensuales_clientes(self, vendedor='Todos', mes_inicio=1, mes_fin=12, filtro_tipo='todos'):
         """
         Obtener variaciones porcentuales mensuales de ventas por URL para heatmap
         """
         try:
-            df = self.filter_data(vendedor, 'Todos')
-            ventas_reales = df[df['tipo'].str.contains(
-                'Remision', case=False, na=False)]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Filtrar por rango de meses
-            ventas_reales = ventas_reales[
-                (ventas_reales['fecha'].dt.month >= mes_inicio) &
-                (ventas_reales['fecha'].dt.month <= mes_fin)
-            ]
-
-            if ventas_reales.empty:
-                return pd.DataFrame()
-
-            # Crear mes_año para agrupación
-            ventas_reales['mes_año'] = ventas_reales['fecha'].dt.strftime(
-                '%Y-%m')
-
-            # Agrupar por URL y mes
-            resultado = ventas_reales.groupby(['url', 'mes_año']).agg({
-                'valor_neto': 'sum'
-            }).reset_index()
-
-            # Crear tabla pivote con ventas por URL y mes
-            pivot_table = resultado.pivot(
-                index='url',
-                columns='mes_año',
-                values='valor_neto'
-            ).fillna(0)
-
-            if pivot_table.empty or pivot_table.shape[1] < 2:
-                return pd.DataFrame()
-
-            # Ordenar columnas cronológicamente
-            meses_ordenados = sorted(pivot_table.columns)
-            pivot_table = pivot_table[meses_ordenados]
-
-            # Calcular variaciones porcentuales mes a mes
-            variaciones = pd.DataFrame(index=pivot_table.index)
-
-            for i in range(1, len(meses_ordenados)):
-                mes_anterior = meses_ordenados[i-1]
-                mes_actual = meses_ordenados[i]
-
-                # Calcular variación porcentual correctamente
-                ventas_anterior = pivot_table[mes_anterior]
-                ventas_actual = pivot_table[mes_actual]
-
-                # Solo calcular variación si hay ventas en el mes anterior
-                variacion = pd.Series(index=pivot_table.index, dtype=float)
-
-                for url in pivot_table.index:
-                    anterior = ventas_anterior[url]
-                    actual = ventas_actual[url]
-
-                    if anterior > 0:  # Solo si hay ventas en mes anterior
-                        variacion[url] = ((actual - anterior) / anterior) * 100
-                    # Nueva venta (antes no había)
-                    elif actual > 0 and anterior == 0:
-                        variacion[url] = 100.0  # 100% de crecimiento desde 0
-                    else:
-                        variacion[url] = 0.0  # Sin cambios o ambos en 0
-
-                # Crear nombre de columna más legible
-                try:
-                    fecha_ant = pd.to_datetime(mes_anterior + '-01')
-                    fecha_act = pd.to_datetime(mes_actual + '-01')
-
-                    meses_esp = {
-                        1: 'Ene', 2: 'Feb', 3: 'Mar', 4: 'Abr',
-                        5: 'May', 6: 'Jun', 7: 'Jul', 8: 'Ago',
-                        9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
-                    }
-
-                    nombre_col = f"{meses_esp[fecha_ant.month]} → {meses_esp[fecha_act.month]}"
-                except:
-                    nombre_col = f"{mes_anterior} → {mes_actual}"
-
-                variaciones[nombre_col] = variacion
-
-            if variaciones.empty:
-                return pd.DataFrame()
-
-            # Filtrar URLs que tengan al menos una variación significativa
-            mask_activos = (variaciones.abs() > 0.1).any(axis=1)
-            variaciones = variaciones[mask_activos]
-
-            if variaciones.empty:
-                return pd.DataFrame()
-
-            # CORRECCIÓN: Calcular suma de variaciones porcentuales para ranking
-            variaciones['suma_variaciones'] = variaciones.sum(axis=1)
-
-            # Aplicar filtros CORRECTAMENTE por suma de variaciones
-            if filtro_tipo == 'top10':
-                variaciones = variaciones.nlargest(10, 'suma_variaciones')
-            elif filtro_tipo == 'bottom10':
-                variaciones = variaciones.nsmallest(10, 'suma_variaciones')
-            #     variaciones = variaciones #.nlargest(, 'suma_variaciones')
-
-            # Remover columna auxiliar antes de retornar
-            variaciones = variaciones.drop('suma_variaciones', axis=1)
-
-            return variaciones
+            return self.get_variaciones_matrix().variaciones(
+                vendedor, mes_inicio, mes_fin, filtro_tipo)
 
         except Exception as e:
             print(f"❌ Error en get_variaciones_mensuales_clientes: {e}")
@@ -1040,279 +883,22 @@ class VentasAnalyzer:
 
     def calculate_enhanced_rfm_scores(self, vendedor='Todos', use_cache=True):
         """
-        Calcular RFM+ Score con CACHE para evitar recálculos
+        Calcular RFM+ Score de un vendedor.
+        Con use_cache se toma la tabla precalculada para todos los vendedores
+        (ver compute_rfm_tables); cambiar de vendedor no recalcula nada.
         Mantiene TODAS las categorías y cálculos originales
         """
         try:
-            # Generar clave de cache
-            cache_key = f"rfm_{vendedor}"
-            current_time = datetime.now()
-
-            # Verificar si hay datos en cache válidos
-            if (use_cache and
-                cache_key in self._rfm_cache and
-                self._rfm_cache_timestamp and
-                    (current_time - self._rfm_cache_timestamp).seconds < self._rfm_cache_ttl):
+            if use_cache:
                 # Retornar copia para evitar modificaciones
-                return self._rfm_cache[cache_key].copy()
-
-            # Si no hay cache o expiró, usar el método original optimizado
-            rfm_data = self._calculate_enhanced_rfm_optimized(vendedor)
+                return self.get_rfm_table(vendedor).copy()
 
-            # Guardar en cache
-            if use_cache and not rfm_data.empty:
-                self._rfm_cache[cache_key] = rfm_data.copy()
-                self._rfm_cache_timestamp = current_time
-
-            return rfm_data
+            return self._calculate_enhanced_rfm_optimized(vendedor)
 
         except Exception as e:
             print(f"❌ Error en RFM con cache: {e}")
             return pd.DataFrame()
 
-    def _calculate_client_trends(self, ventas_data, cliente, fecha_corte):
-        """
-        Calcular métricas de tendencia para un cliente específico.
-        CORREGIDO: Maneja correctamente la conversión datetime a period.
-        """
-        try:
-            import pandas as pd
-
-            # Filtrar datos del cliente
-            client_data = ventas_data[ventas_data['cliente_completo'] == cliente].copy(
-            )
-
-            if len(client_data) < 2:
-                return {
-                    'cliente_completo': cliente,
-                    'cagr_6m': 0,
-                    'variacion_3m': 0,
-                    'variacion_reciente': 0,
-                    'tendencia_general': 'estable',
-                    'meses_activos': 1,
-                    'consistencia': 0
-                }
-
-            # Preparar datos mensuales
-            client_data['mes_periodo'] = client_data['fecha'].dt.to_period('M')
-            monthly_sales = client_data.groupby(
-                'mes_periodo')['valor_neto'].sum().sort_index()
-
-            # 🔧 CORRECCIÓN: Convertir fecha_corte a pandas Timestamp y luego a period
-            if hasattr(fecha_corte, 'to_period'):
-                # Ya es un pandas Timestamp
-                ultimo_periodo_completo = fecha_corte.to_period('M')
-            else:
-                # Es un datetime, convertir a pandas Timestamp primero
-                ultimo_periodo_completo = pd.Timestamp(
-                    fecha_corte).to_period('M')
-
-            # Filtrar hasta el último período completo
-            monthly_sales = monthly_sales[monthly_sales.index <=
-                                          ultimo_periodo_completo]
-
-            if len(monthly_sales) < 2:
-                return {
-                    'cliente_completo': cliente,
-                    'cagr_6m': 0,
-                    'variacion_3m': 0,
-                    'variacion_reciente': 0,
-                    'tendencia_general': 'estable',
-                    'meses_activos': 1,
-                    'consistencia': 0
-                }
-
-            # 1. CAGR de últimos 6 meses (o todos los meses disponibles si son menos)
-            meses_disponibles = len(monthly_sales)
-            meses_cagr = min(6, meses_disponibles)  # REVISAR
-            recent_months = monthly_sales.tail(meses_cagr)
-
-            if len(recent_months) >= 2:
-                primer_valor = recent_months.iloc[0]
-                ultimo_valor = recent_months.iloc[-1]
-                periodos = len(recent_months) - 1
-
-                if primer_valor > 0 and periodos > 0:
-                    cagr_6m = ((ultimo_valor / primer_valor)
-                               ** (1/periodos) - 1) * 100
-                else:
-                    cagr_6m = 0
-            else:
-                cagr_6m = 0
-
-            # 2. Variación de últimos 3 meses vs 3 meses anteriores
-            if len(monthly_sales) >= 6:
-                ultimos_3m = monthly_sales.tail(3).sum()
-                anteriores_3m = monthly_sales.tail(6).head(3).sum()
-
-                if anteriores_3m > 0:
-                    variacion_3m = (
-                        (ultimos_3m - anteriores_3m) / anteriores_3m) * 100
-                else:
-                    variacion_3m = 100 if ultimos_3m > 0 else 0
-            else:
-                variacion_3m = 0
-
-            # 3. Variación del último mes vs promedio anterior
-            if len(monthly_sales) >= 3:
-                ultimo_mes = monthly_sales.iloc[-1]
-                promedio_anterior = monthly_sales.iloc[:-1].mean()
-
-                if promedio_anterior > 0:
-                    variacion_reciente = (
-                        (ultimo_mes - promedio_anterior) / promedio_anterior) * 100
-                else:
-                    variacion_reciente = 100 if ultimo_mes > 0 else 0
-            else:
-                variacion_reciente = 0
-
-            # 4. Tendencia general (combinando indicadores)
-            if cagr_6m > 10 and variacion_3m > 5:
-                tendencia_general = 'crecimiento_fuerte'
-            elif cagr_6m > 0 and variacion_3m >= 0:
-                tendencia_general = 'crecimiento'
-            elif cagr_6m < -10 and variacion_3m < -5:
-                tendencia_general = 'decrecimiento_fuerte'
-            elif cagr_6m < 0 and variacion_3m < 0:
-                tendencia_general = 'decrecimiento'
-            else:
-                tendencia_general = 'estable'
-
-            # 5. Consistencia (desviación estándar relativa)
-            if len(monthly_sales) >= 3:
-                cv = (monthly_sales.std() / monthly_sales.mean()) * \
-                    100 if monthly_sales.mean() > 0 else 100
-                # Menor variabilidad = mayor consistencia
-                consistencia = max(0, 100 - cv)
-            else:
-                consistencia = 50  # Valor neutral para pocos datos
-
-            return {
-                'cliente_completo': cliente,
-                'cagr_6m': round(cagr_6m, 2),
-                'variacion_3m': round(variacion_3m, 2),
-                'variacion_reciente': round(variacion_reciente, 2),
-                'tendencia_general': tendencia_general,
-                'meses_activos': meses_disponibles,
-                'consistencia': round(consistencia, 1)
-            }
-
-        except Exception as e:
-            print(f"❌ Error calculando tendencias para {cliente}: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                'cliente_completo': cliente,
-                'cagr_6m': 0,
-                'variacion_3m': 0,
-                'variacion_reciente': 0,
-                'tendencia_general': 'estable',
-                'meses_activos': 1,
-                'consistencia': 0
-            }
-
-    def _calculate_trend_score(self, row):
-        """
-        Calcular score de tendencia (1-5) basado en CAGR y variaciones.
-        """
-        try:
-            cagr = row['cagr_6m']
-            var_3m = row['variacion_3m']
-            var_reciente = row['variacion_reciente']
-            consistencia = row['consistencia']
-
-            # Score base según CAGR
-            if cagr >= 20:
-                base_score = 5
-            elif cagr >= 10:
-                base_score = 4
-            elif cagr >= 0:
-                base_score = 3
-            elif cagr >= -10:
-                base_score = 2
-            else:
-                base_score = 1
-
-            # Ajustar según variación reciente (±0.5 puntos)
-            if var_reciente > 15:
-                base_score += 0.5
-            elif var_reciente < -15:
-                base_score -= 0.5
-
-            # Ajustar según consistencia (±0.3 puntos)
-            if consistencia > 80:
-                base_score += 0.3
-            elif consistencia < 30:
-                base_score -= 0.3
-
-            # Limitar entre 1 y 5
-            final_score = max(1, min(5, base_score))
-
-            return int(round(final_score))
-
-        except:
-            return 3  # Score neutral en caso de error
-
-    def _categorize_enhanced_rfm(self, row):
-        """
-        Categorizar cliente según RFM+ score (incluye análisis de tendencia).
-        """
-        R, F, M, T = row['R'], row['F'], row['M'], row['T']
-        tendencia = row['tendencia_general']
-        cagr = row['cagr_6m']
-
-        # 🏆 CAMPEONES VERDADEROS: Alto RFM + Tendencia positiva
-        if R >= 4 and F >= 4 and M >= 4 and T >= 4:
-            return "🏆 Campeones Ascendentes"
-
-        # ⚠️ CAMPEONES EN RIESGO: Alto RFM pero tendencia negativa
-        elif R >= 4 and F >= 4 and M >= 4 and T <= 2:
-            return "⚠️ Campeones en Declive"
-
-        # 🚀 CLIENTES ESTRELLA: Buenos indicadores + crecimiento fuerte
-        elif F >= 4 and M >= 4 and T >= 4 and cagr > 15:
-            return "🚀 Clientes Estrella"
-
-        # 💎 CLIENTES LEALES ESTABLES: Buenos en F,M + tendencia estable
-        elif F >= 4 and M >= 4 and T >= 3:
-            return "💎 Leales Estables"
-
-        # 📉 CLIENTES EN CAÍDA: Buenos históricamente pero decreciendo
-        elif F >= 3 and M >= 4 and T <= 2 and cagr < -10:
-            return "📉 En Caída Libre"
-
-        # ⭐ POTENCIALES CON MOMENTUM: Recientes + crecimiento
-        elif R >= 4 and T >= 4:
-            return "⭐ Potenciales con Momentum"
-
-        # 🌱 NUEVOS EN DESARROLLO: Nuevos + indicios positivos
-        elif R >= 4 and F <= 2 and T >= 3:
-            return "🌱 Nuevos en Desarrollo"
-
-        # 🔥 OPORTUNIDADES CALIENTES: Crecimiento fuerte reciente
-        elif T >= 4 and M >= 3 and F > 3:
-            return "🔥 Oportunidades Calientes"
-
-        # ⚠️ NECESITAN ATENCIÓN URGENTE: Buenos en M pero inactivos y decreciendo
-        elif M >= 4 and R <= 2 and T <= 2:
-            return "⚠️ Atención Urgente"
-
-        # 🆘 RESCATE INMEDIATO: Alto valor + muy inactivos + decrecimiento
-        elif M >= 4 and R <= 2 and F >= 3 and T <= 2:
-            return "🆘 Rescate Inmediato"
-
-        # 😴 HIBERNANDO ESTABLES: Baja actividad pero sin grandes cambios
-        elif R <= 2 and F <= 2 and T == 3:
-            return "😴 Hibernando Estables"
-
-        # 💸 PERDIDOS: Muy baja actividad + tendencia negativa
-        elif R <= 2 and F <= 2 and T <= 2:
-            return "💸 Perdidos"
-
-        # 🔄 IRREGULARES: Patrones inconsistentes
-        else:
-            return "🔄 Comportamiento Irregular"
-
     def _get_client_recommendation(self, client_info):
         """
         Generar recomendación específica para un cliente basada en su perfil RFM+.
@@ -1709,10 +1295,96 @@ class VentasAnalyzer:
 
         return df_cuotas
 
+    def get_ventas_netas_vendedor_mes(self):
+        """
+        Net sales (Remisiones - |Devoluciones|) per salesperson and month in
+        one grouped pass, cached per data version. Same values as
+        get_ventas_por_mes for each salesperson.
+
+        Returns:
+            pd.DataFrame: Columns vendedor, mes_nombre and valor_neto.
+        """
+        def build():
+            view = self._unified_analyzer.get_filtered_view('Todos', 'Todos')
+
+            ventas = view.ventas_reales.groupby(
+                ['vendedor', 'mes_nombre'])['valor_neto'].sum()
+            devoluciones = view.devoluciones.groupby(
+                ['vendedor', 'mes_nombre'])['valor_neto'].sum().abs()
+
+            return ventas.sub(devoluciones, fill_value=0).reset_index()
+
+        return self._unified_analyzer.get_versioned('ventas_netas_vendedor_mes', build)
+
+    @staticmethod
+    def _progreso_esperado_mes(mes_nombre):
+        """
+        Progreso esperado de un mes según días hábiles.
+
+        Returns:
+            tuple: (progreso_esperado, dias_habiles_mes,
+            dias_habiles_transcurridos, mes_finalizado).
+        """
+        try:
+            fecha_mes = pd.to_datetime(mes_nombre + '-01')
+            año = fecha_mes.year
+            mes_num = fecha_mes.month
+
+            # Usar días hábiles en lugar de días calendario
+            dias_habiles_mes, dias_habiles_transcurridos = calcular_dias_habiles_colombia(
+                año, mes_num)
+
+            hoy = datetime.now()
+            mes_finalizado = año < hoy.year or (
+                año == hoy.year and mes_num < hoy.month)
+
+            if mes_finalizado:
+                dias_habiles_transcurridos = dias_habiles_mes
+            else:
+                dias_habiles_transcurridos = \
+                    max(0, dias_habiles_transcurridos - 1)
+
+            # Progreso esperado basado en días hábiles
+            progreso_esperado = (
+                dias_habiles_transcurridos / dias_habiles_mes * 100) if dias_habiles_mes > 0 else 100
+
+            return progreso_esperado, dias_habiles_mes, dias_habiles_transcurridos, mes_finalizado
+
+        except Exception as e:
+            print(f"Error calculando progreso esperado: {e}")
+            return 100, 30, 30, True
+
+    @staticmethod
+    def _estado_cumplimiento(cumplimiento_pct, progreso_esperado, mes_finalizado):
+        """
+        Estado y color de cada fila según el cumplimiento y el progreso esperado.
+        """
+        if mes_finalizado:
+            conditions = [cumplimiento_pct >= 100]
+            estados = ["Cumplido"]
+            colores = ["#22c55e"]
+            default = ("No Cumplió", "#ef4444")
+        else:
+            conditions = \
+                [
+                    cumplimiento_pct >= 100,
+                    cumplimiento_pct >= progreso_esperado,
+                    cumplimiento_pct >= (progreso_esperado - 10)
+                ]
+            estados = ["Cumpliendo", "Adelantado", "En Progreso"]
+            colores = ["#22c55e", "#3b82f6", "#f59e0b"]
+            default = ("Atrasado", "#ef4444")
+
+        return \
+            np.select(conditions, estados, default=default[0]), \
+            np.select(conditions, colores, default=default[1])
+
     def get_cumplimiento_cuotas(self, vendedor='Todos', mes='Todos'):
         """
         Obtener análisis de cumplimiento de cuotas con progreso esperado.
         CORREGIDO: Usa días hábiles, maneja ex-vendedores, y lógica de mes finalizado.
+        Las ventas netas salen de una sola agregación vendedor × mes
+        (get_ventas_netas_vendedor_mes) cruzada con las cuotas.
         """
         try:
             # Cargar cuotas
@@ -1723,26 +1395,15 @@ class VentasAnalyzer:
                 return pd.DataFrame()
 
             # Obtener datos de ventas
-            if vendedor == 'Todos':
-                df_ventas_todos = pd.DataFrame()
-                vendedores_con_cuotas = df_cuotas['vendedor'].unique().tolist()
+            df_ventas = self.get_ventas_netas_vendedor_mes()
 
-                for v in vendedores_con_cuotas:
-                    try:
-                        ventas_vendedor = self.get_ventas_por_mes(v)
-                        if not ventas_vendedor.empty:
-                            ventas_vendedor['vendedor'] = v
-                            df_ventas_todos = pd.concat(
-                                [df_ventas_todos, ventas_vendedor], ignore_index=True)
-                    except Exception as e:
-                        print(f"Error obteniendo datos para vendedor {v}: {e}")
-                        continue
-
-                df_ventas = df_ventas_todos
+            if vendedor == 'Todos':
+                df_ventas = df_ventas[df_ventas['vendedor'].isin(
+                    df_cuotas['vendedor'].unique())]
+                df_cuotas_filtrado = df_cuotas
             else:
-                df_ventas = self.get_ventas_por_mes(vendedor)
-                if not df_ventas.empty:
-                    df_ventas['vendedor'] = vendedor
+                df_ventas = df_ventas[df_ventas['vendedor'] == vendedor]
+                df_cuotas_filtrado = df_cuotas[df_cuotas['vendedor'] == vendedor]
 
             if df_ventas.empty:
                 print("No hay datos de ventas disponibles")
@@ -1754,160 +1415,54 @@ class VentasAnalyzer:
             else:
                 ultimo_mes = mes
 
-            # Filtrar cuotas
-            if vendedor != 'Todos':
-                df_cuotas_filtrado = df_cuotas[df_cuotas['vendedor'] == vendedor]
-            else:
-                df_cuotas_filtrado = df_cuotas
-
             cuota_mes = df_cuotas_filtrado[df_cuotas_filtrado['mes_nombre'] == ultimo_mes]
 
             if cuota_mes.empty:
                 return pd.DataFrame()
 
-            # Calcular días hábiles
-            try:
-                fecha_mes = pd.to_datetime(ultimo_mes + '-01')
-                año = fecha_mes.year
-                mes_num = fecha_mes.month
-
-                # Usar días hábiles en lugar de días calendario
-                dias_habiles_mes, dias_habiles_transcurridos = calcular_dias_habiles_colombia(
-                    año, mes_num)
-
-                hoy = datetime.now()
-                mes_finalizado = año < hoy.year or (
-                    año == hoy.year and mes_num < hoy.month)
-
-                if mes_finalizado:
-                    dias_habiles_transcurridos = dias_habiles_mes
-                else:
-                    dias_habiles_transcurridos = \
-                        max(0, dias_habiles_transcurridos - 1)
-
-                # Progreso esperado basado en días hábiles
-                progreso_esperado = (
-                    dias_habiles_transcurridos / dias_habiles_mes * 100) if dias_habiles_mes > 0 else 100
-
-            except Exception as e:
-                print(f"Error calculando progreso esperado: {e}")
-                progreso_esperado = 100
-                dias_habiles_mes = 30
-                dias_habiles_transcurridos = 30
-                mes_finalizado = True
+            progreso_esperado, dias_habiles_mes, dias_habiles_transcurridos, mes_finalizado = \
+                self._progreso_esperado_mes(ultimo_mes)
 
-            # Construir resultado
-            resultado = []
+            ventas_mes = df_ventas[df_ventas['mes_nombre'] == ultimo_mes][
+                ['vendedor', 'valor_neto']]
 
             if vendedor == 'Todos':
-                for _, cuota_row in cuota_mes.iterrows():
-                    vendedor_name = cuota_row['vendedor']
-                    cuota_valor = cuota_row['cuota']
-
-                    ventas_vendedor_mes = df_ventas[
-                        (df_ventas['vendedor'] == vendedor_name) &
-                        (df_ventas['mes_nombre'] == ultimo_mes)
-                    ]
-
-                    ventas_reales = ventas_vendedor_mes['valor_neto'].sum(
-                    ) if not ventas_vendedor_mes.empty else 0
+                resultado = cuota_mes[['vendedor', 'cuota']].merge(
+                    ventas_mes, on='vendedor', how='left')
+                resultado['ventas_reales'] = resultado.pop('valor_neto').fillna(0)
 
-                    # CORREGIDO: Excluir vendedores con ventas en cero (ex-vendedores o nuevos sin actividad)
-                    if ventas_reales == 0:
-                        continue
-
-                    cumplimiento_pct = (
-                        ventas_reales / cuota_valor * 100) if cuota_valor > 0 else 0
-                    meta_esperada = (cuota_valor * progreso_esperado / 100)
-                    diferencia_cuota = ventas_reales - cuota_valor  # CORREGIDO: vs cuota total
-
-                    # CORREGIDO: Estados según si el mes está finalizado
-                    if mes_finalizado:
-                        if cumplimiento_pct >= 100:
-                            estado = "Cumplido"
-                            color = "#22c55e"
-                        else:
-                            estado = "No Cumplió"
-                            color = "#ef4444"
-                    else:
-                        if cumplimiento_pct >= 100:
-                            estado = "Cumpliendo"
-                            color = "#22c55e"
-                        elif cumplimiento_pct >= progreso_esperado:
-                            estado = "Adelantado"
-                            color = "#3b82f6"
-                        elif cumplimiento_pct >= (progreso_esperado - 10):
-                            estado = "En Progreso"
-                            color = "#f59e0b"
-                        else:
-                            estado = "Atrasado"
-                            color = "#ef4444"
-
-                    resultado.append({
-                        'vendedor': vendedor_name,
-                        'mes': ultimo_mes,
-                        'cuota': cuota_valor,
-                        'ventas_reales': ventas_reales,
-                        'cumplimiento_pct': cumplimiento_pct,
-                        'meta_esperada': meta_esperada,
-                        'progreso_esperado_pct': progreso_esperado,
-                        'diferencia_cuota': diferencia_cuota,
-                        'dias_transcurridos': dias_habiles_transcurridos,
-                        'dias_mes': dias_habiles_mes,
-                        'estado': estado,
-                        'color': color,
-                        'mes_finalizado': mes_finalizado
-                    })
+                # CORREGIDO: Excluir vendedores con ventas en cero (ex-vendedores o nuevos sin actividad)
+                resultado = resultado[resultado['ventas_reales'] != 0].reset_index(drop=True)
             else:
                 # Vendedor específico
-                cuota_valor = cuota_mes['cuota'].iloc[0]
-                ventas_mes = df_ventas[df_ventas['mes_nombre'] == ultimo_mes]
-                ventas_reales = ventas_mes['valor_neto'].sum(
-                ) if not ventas_mes.empty else 0
-
-                cumplimiento_pct = (
-                    ventas_reales / cuota_valor * 100) if cuota_valor > 0 else 0
-                meta_esperada = (cuota_valor * progreso_esperado / 100)
-                diferencia_cuota = ventas_reales - cuota_valor
-
-                if mes_finalizado:
-                    if cumplimiento_pct >= 100:
-                        estado = "Cumplido"
-                        color = "#22c55e"
-                    else:
-                        estado = "No Cumplió"
-                        color = "#ef4444"
-                else:
-                    if cumplimiento_pct >= 100:
-                        estado = "Cumpliendo"
-                        color = "#22c55e"
-                    elif cumplimiento_pct >= progreso_esperado:
-                        estado = "Adelantado"
-                        color = "#3b82f6"
-                    elif cumplimiento_pct >= (progreso_esperado - 10):
-                        estado = "En Progreso"
-                        color = "#f59e0b"
-                    else:
-                        estado = "Atrasado"
-                        color = "#ef4444"
-
-                resultado.append({
-                    'vendedor': vendedor,
-                    'mes': ultimo_mes,
-                    'cuota': cuota_valor,
-                    'ventas_reales': ventas_reales,
-                    'cumplimiento_pct': cumplimiento_pct,
-                    'meta_esperada': meta_esperada,
-                    'progreso_esperado_pct': progreso_esperado,
-                    'diferencia_cuota': diferencia_cuota,
-                    'dias_transcurridos': dias_habiles_transcurridos,
-                    'dias_mes': dias_habiles_mes,
-                    'estado': estado,
-                    'color': color,
-                    'mes_finalizado': mes_finalizado
+                resultado = pd.DataFrame({
+                    'vendedor': [vendedor],
+                    'cuota': [cuota_mes['cuota'].iloc[0]],
+                    'ventas_reales': [ventas_mes['valor_neto'].sum()]
                 })
 
-            return pd.DataFrame(resultado)
+            cuota = resultado['cuota'].to_numpy(dtype=float)
+            ventas_reales = resultado['ventas_reales'].to_numpy(dtype=float)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cumplimiento_pct = np.where(
+                    cuota > 0, ventas_reales / cuota * 100, 0.0)
+
+            estado, color = self._estado_cumplimiento(
+                cumplimiento_pct, progreso_esperado, mes_finalizado)
+
+            resultado.insert(1, 'mes', ultimo_mes)
+            resultado['cumplimiento_pct'] = cumplimiento_pct
+            resultado['meta_esperada'] = cuota * progreso_esperado / 100
+            resultado['progreso_esperado_pct'] = progreso_esperado
+            resultado['diferencia_cuota'] = ventas_reales - cuota  # CORREGIDO: vs cuota total
+            resultado['dias_transcurridos'] = dias_habiles_transcurridos
+            resultado['dias_mes'] = dias_habiles_mes
+            resultado['estado'] = estado
+            resultado['color'] = color
+            resultado['mes_finalizado'] = mes_finalizado
+
+            return resultado
 
         except Exception as e:
             print(f"Error calculando cumplimiento de cuotas: {e}")
@@ -1943,62 +1498,58 @@ class VentasAnalyzer:
                 if v_name:
                     total_cli_map[v_name] = total_cli_map.get(v_name, 0) + 1
 
-            # 3. Devoluciones e impactados del período
+            # 3. Devoluciones e impactados del período, una agregación por vendedor
             # Usar el mes real analizado por get_cumplimiento_cuotas (puede diferir de 'Todos')
             # ventas_netas (neta = Remisiones - Devoluciones) ya viene calculada en
             # data_cuotas['ventas_reales'] con la misma lógica que get_ventas_por_mes.
-            mes_analizado = data_cuotas['mes'].iloc[0] if not data_cuotas.empty else mes
-            df = ua.filter_ventas_data('Todos', mes_analizado)
-            ventas_brutas_df = df[df['tipo'].str.contains('Remision', case=False, na=False)]
-            dev_df           = df[df['tipo'].str.contains('Devolución|Devolucion', case=False, na=False)]
-
-            vendedores_lista  = data_cuotas['vendedor'].tolist()
-            ventas_brutas_map = {}   # Remisiones brutas — denominador para % devoluciones
-            dev_map           = {}
-            impactados_map    = {}
-            for v in vendedores_lista:
-                vv = ventas_brutas_df[ventas_brutas_df['vendedor'] == v]
-                vd = dev_df[dev_df['vendedor'] == v]
-                ventas_brutas_map[v] = vv['valor_neto'].sum()
-                dev_map[v]           = abs(vd['valor_neto'].sum())
-                impactados_map[v]    = vv['id1'].nunique() if not vv.empty else 0
+            mes_analizado = data_cuotas['mes'].iloc[0]
+            view = ua.get_filtered_view('Todos', mes_analizado)
+
+            # Remisiones brutas — denominador para % devoluciones
+            brutas = view.ventas_reales.groupby('vendedor').agg(
+                ventas_bruto=('valor_neto', 'sum'),
+                impactados=('id1', 'nunique'))
+            dev = view.devoluciones.groupby('vendedor')['valor_neto'].sum().abs()
+
+            vendedores = data_cuotas['vendedor']
+            ventas_bruto = vendedores.map(brutas['ventas_bruto']).fillna(0).to_numpy()
+            impactados = vendedores.map(brutas['impactados']).fillna(0).astype(int)
+            devoluciones = vendedores.map(dev).fillna(0).to_numpy()
+            tot_cli = vendedores.map(total_cli_map).fillna(0).astype(int)
 
             # 4. Construir resultado
-            rows = []
-            for _, row in data_cuotas.iterrows():
-                v          = row['vendedor']
-                # ventas_reales en data_cuotas = Remisiones − Devoluciones (igual que cuotas)
-                ventas_net = row.get('ventas_reales', 0)
-                ventas_bruto = ventas_brutas_map.get(v, 0)
-                dev        = dev_map.get(v, 0)
-                tot_cli    = total_cli_map.get(v, 0)
-                impactados = impactados_map.get(v, 0)
+            # ventas_reales en data_cuotas = Remisiones − Devoluciones (igual que cuotas)
+            ventas_net = data_cuotas['ventas_reales'].to_numpy(dtype=float)
+            dias_restantes = np.maximum(
+                1, data_cuotas['dias_mes'] - data_cuotas['dias_transcurridos']).to_numpy()
+            faltante = data_cuotas['cuota'].to_numpy(dtype=float) - ventas_net
+            mes_finalizado = data_cuotas['mes_finalizado'].to_numpy(dtype=bool)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
                 # % devoluciones sobre venta bruta para no distorsionar con la propia devolución
-                pct_dev    = (dev / ventas_bruto * 100) if ventas_bruto > 0 else 0
-                pct_cob    = (impactados / tot_cli * 100) if tot_cli > 0 else 0
-                dias_restantes = max(1, row['dias_mes'] - row['dias_transcurridos'])
-                mes_finalizado = row.get('mes_finalizado', False)
-                faltante = row['cuota'] - ventas_net
-                ritmo_necesario = (faltante / dias_restantes
-                                   if faltante > 0 and not mes_finalizado else 0)
-
-                rows.append({
-                    'vendedor':          v,
-                    'cuota':             row['cuota'],
-                    'ventas_netas':      ventas_net,
-                    'cumplimiento_pct':  row['cumplimiento_pct'],
-                    'diferencia':        row['diferencia_cuota'],
-                    'devoluciones':      dev,
-                    'pct_dev':           pct_dev,
-                    'total_clientes':    tot_cli,
-                    'impactados':        impactados,
-                    'pct_cobertura':     pct_cob,
-                    'ritmo_necesario':   ritmo_necesario,
-                    'progreso_esperado': row['progreso_esperado_pct'],
-                    'color':             row['color'],
-                })
+                pct_dev = np.where(ventas_bruto > 0, devoluciones / ventas_bruto * 100, 0)
+                pct_cob = np.where(tot_cli > 0, impactados / tot_cli * 100, 0)
+
+            ritmo_necesario = np.where(
+                (faltante > 0) & ~mes_finalizado, faltante / dias_restantes, 0)
+
+            tabla = pd.DataFrame({
+                'vendedor':          vendedores,
+                'cuota':             data_cuotas['cuota'],
+                'ventas_netas':      ventas_net,
+                'cumplimiento_pct':  data_cuotas['cumplimiento_pct'],
+                'diferencia':        data_cuotas['diferencia_cuota'],
+                'devoluciones':      devoluciones,
+                'pct_dev':           pct_dev,
+                'total_clientes':    tot_cli,
+                'impactados':        impactados,
+                'pct_cobertura':     pct_cob,
+                'ritmo_necesario':   ritmo_necesario,
+                'progreso_esperado': data_cuotas['progreso_esperado_pct'],
+                'color':             data_cuotas['color'],
+            })
 
-            return pd.DataFrame(rows).sort_values('ventas_netas', ascending=False)
+            return tabla.sort_values('ventas_netas', ascending=False)
 
         except Exception as e:
             print(f"❌ [get_tabla_comparativa_admin] Error: {e}")
@@ -2015,84 +1566,53 @@ class VentasAnalyzer:
 
     def get_resumen_mensual(self, vendedor='Todos'):
         """
-        Get monthly sales summary with unique customers
-        Using Get_Ventas_Por_mes for consistency with other graphics
+        Get monthly sales summary with unique customers.
+        Net sales follow get_ventas_por_mes (Remisiones - |Devoluciones|);
+        all months are aggregated in a single groupby per document class
+        over the salesperson's shared view.
         """
         try:
-            # Obtener datos de ventas mensuales usando el método existente
-            df_ventas_mes = self.get_ventas_por_mes(vendedor)
+            view = self._unified_analyzer.get_filtered_view(vendedor, 'Todos')
 
-            if df_ventas_mes.empty:
+            ventas_reales = view.ventas_reales
+            devoluciones = view.devoluciones
+
+            if ventas_reales.empty and devoluciones.empty:
                 return pd.DataFrame()
 
-            monthly_data = []
-
-            for _, row in df_ventas_mes.iterrows():
-                mes = row['mes_nombre']
-
-                # Obtener datos detallados del mes para contar clientes
-                df_mes_detalle = self.filter_data(vendedor, mes)
-
-                if not df_mes_detalle.empty:
-                    ventas_reales = \
-                        df_mes_detalle[df_mes_detalle['tipo'].str.contains(
-                            'Remision',
-                            case=False,
-                            na=False)
-                        ]
-                    devoluciones = \
-                        df_mes_detalle[df_mes_detalle['tipo'].str.contains(
-                            'Devolución|Devolucion',
-                            case=False,
-                            na=False)
-                        ]
-
-                    total_ventas = ventas_reales['valor_neto'].sum()
-                    total_devoluciones = abs(devoluciones['valor_neto'].sum())
-                    total_ventas_netas = total_ventas - total_devoluciones
-
-                    # Contar clientes únicos
-                    clientes_unicos = \
-                        ventas_reales['cliente_completo'].nunique(
-                        ) if not ventas_reales.empty else 0
-
-                    num_transacciones = \
-                        len(ventas_reales) if not ventas_reales.empty else 0
-
-                    # Calcular promedios
-                    ticket_promedio = total_ventas_netas / \
-                        num_transacciones if num_transacciones > 0 else 0
-                    venta_por_cliente = total_ventas_netas / \
-                        clientes_unicos if clientes_unicos > 0 else 0
-                else:
-                    clientes_unicos = 0
-                    num_transacciones = 0
-                    ticket_promedio = 0
-                    venta_por_cliente = 0
-
-                # Crear fecha para ordenamiento
-                try:
-                    fecha = pd.to_datetime(mes + '-01')
-                    mes_label = fecha.strftime('%b %Y')
-                except:
-                    fecha = pd.to_datetime(mes, format='%Y-%m')
-                    mes_label = fecha.strftime('%b %Y')
-
-                monthly_data.append({
-                    'mes': mes_label,
-                    'fecha': fecha,
-                    'ventas_netas': row['valor_neto'],
-                    'clientes_unicos': clientes_unicos,
-                    'num_transacciones': num_transacciones,
-                    'ticket_promedio': ticket_promedio,
-                    'venta_por_cliente': venta_por_cliente
-                })
+            ventas = ventas_reales.groupby('mes_nombre').agg(
+                total_ventas=('valor_neto', 'sum'),
+                clientes_unicos=('cliente_completo', 'nunique'),
+                num_transacciones=('valor_neto', 'size'))
+
+            total_devoluciones = devoluciones.groupby(
+                'mes_nombre')['valor_neto'].sum().abs()
+
+            df = ventas.join(total_devoluciones.rename('total_devoluciones'), how='outer')
+            df = df.fillna(0).sort_index()
+
+            ventas_netas = (df['total_ventas'] - df['total_devoluciones']).to_numpy()
+            clientes_unicos = df['clientes_unicos'].astype(int).to_numpy()
+            num_transacciones = df['num_transacciones'].astype(int).to_numpy()
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ticket_promedio = np.where(
+                    num_transacciones > 0, ventas_netas / num_transacciones, 0)
+                venta_por_cliente = np.where(
+                    clientes_unicos > 0, ventas_netas / clientes_unicos, 0)
 
-            # Crear DataFrame y ordenar
-            df = pd.DataFrame(monthly_data)
-            df = df.sort_values('fecha')
+            # Crear fecha para ordenamiento
+            fecha = pd.to_datetime(df.index.to_series() + '-01', format='%Y-%m-%d')
 
-            return df
+            return pd.DataFrame({
+                'mes': fecha.dt.strftime('%b %Y').to_numpy(),
+                'fecha': fecha.to_numpy(),
+                'ventas_netas': ventas_netas,
+                'clientes_unicos': clientes_unicos,
+                'num_transacciones': num_transacciones,
+                'ticket_promedio': ticket_promedio,
+                'venta_por_cliente': venta_por_cliente
+            }).sort_values('fecha', ignore_index=True)
 
         except Exception as e:
             print(f"Error en get_resumen_mensual: {e}")
@@ -2100,220 +1620,201 @@ class VentasAnalyzer:
             traceback.print_exc()
             return pd.DataFrame()
 
-    def _calculate_enhanced_rfm_optimized(self, vendedor):
+    @staticmethod
+    def _rfm_cutoff_dates():
         """
-        Optimized version of RFM+ model.
+        Reference dates of the RFM+ model.
+
+        Returns:
+            tuple: (hoy, fecha_cierre, fecha_hoy). fecha_cierre is the last
+            day of the last closed month (used for trends) and fecha_hoy the
+            current timestamp (used for recency).
         """
-        try:
-            # Calcular hasta el mes actual (no mes previo)
-            hoy = datetime.now()
+        # Calcular hasta el mes actual (no mes previo)
+        hoy = datetime.now()
+        fecha_corte = hoy.replace(day=1) - timedelta(days=1)
 
-            ultimo_mes_finalizado = (hoy.replace(
-                day=1) - timedelta(days=1)).replace(day=1)
+        return hoy, pd.Timestamp(fecha_corte), pd.Timestamp(hoy)
 
-            if ultimo_mes_finalizado.month == 12:
-                fecha_corte = ultimo_mes_finalizado.replace(
-                    year=ultimo_mes_finalizado.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                fecha_corte = ultimo_mes_finalizado.replace(
-                    month=ultimo_mes_finalizado.month + 1, day=1) - timedelta(days=1)
+    def _build_rfm_base(self, ventas_totales, fecha_cierre, fecha_hoy, by=('cliente_completo',)):
+        """
+        Base RFM+ metrics (recency, frequency, monetary and trends) before
+        scoring, one row per `by` group.
 
-            fecha_cierre = pd.Timestamp(fecha_corte)
-            fecha_hoy = pd.Timestamp(hoy)
+        Args:
+            ventas_totales (pd.DataFrame): Sales documents (ventas_reales).
+            fecha_cierre (pd.Timestamp): Last day of the last closed month.
+            fecha_hoy (pd.Timestamp): Current timestamp.
+            by: Grouping columns; ('vendedor', 'cliente_completo') builds
+                every salesperson's clients in a single pass.
 
-            # Obtener datos de ventas
-            df = self.filter_data(vendedor, 'Todos')
+        Returns:
+            pd.DataFrame: Valid clients with their base metrics (empty if
+            there are no sales).
+        """
+        by = list(by)
 
-            ventas_totales = \
-                df[df['tipo'].str.contains('Remision', case=False, na=False)]
-            ventas_reales_cierre = \
-                ventas_totales[ventas_totales['fecha'] <= fecha_cierre]
-            ventas_reales = \
-                ventas_totales[ventas_totales['fecha'] <= fecha_hoy]
+        # Clientes válidos: se revisa cada nombre una sola vez
+        codigos, clientes = pd.factorize(ventas_totales['cliente_completo'])
+        cliente_valido = np.append(
+            clientes.astype(str).str.strip() != '', False)[codigos]
 
-            ventas_reales_cierre = ventas_reales_cierre[
-                ventas_reales_cierre['cliente_completo'].notna() &
-                (ventas_reales_cierre['cliente_completo'].str.strip() != '')
-            ]
+        ventas_reales_cierre = ventas_totales[
+            cliente_valido & (ventas_totales['fecha'] <= fecha_cierre).to_numpy()]
+        ventas_reales = ventas_totales[
+            cliente_valido & (ventas_totales['fecha'] <= fecha_hoy).to_numpy()]
 
-            ventas_reales = ventas_reales[
-                ventas_reales['cliente_completo'].notna() &
-                (ventas_reales['cliente_completo'].str.strip() != '')
-            ]
+        if ventas_reales_cierre.empty:
+            print(f"⚠️ No hay datos de ventas hasta {fecha_cierre}")
+            return pd.DataFrame()
 
-            if ventas_reales_cierre.empty:
-                print(f"⚠️ No hay datos de ventas hasta {fecha_cierre}")
-                return pd.DataFrame()
+        if ventas_reales.empty:
+            print(f"⚠️ No hay datos de ventas hasta {fecha_hoy}")
+            return pd.DataFrame()
 
-            if ventas_reales.empty:
-                print(f"⚠️ No hay datos de ventas hasta {fecha_hoy}")
-                return pd.DataFrame()
+        # Cálculo vectorizado de métricas base
+        rfm_data = \
+            ventas_reales.groupby(by).agg({
+                'fecha': ['max', 'min', 'count'],
+                'documento_id': 'count',
+                'valor_neto': ['sum', 'mean']
+            }).reset_index()
 
-            # Cálculo vectorizado de métricas base
-            rfm_data_cierre = \
-                ventas_reales_cierre.groupby('cliente_completo').agg({
-                    'fecha': ['max', 'min', 'count'],
-                    'documento_id': 'count',
-                    'valor_neto': ['sum', 'mean']
-                }).reset_index()
+        rfm_data.columns = by + \
+            [
+                'fecha_max', 'fecha_min', 'periodos_activos', 'frequency',
+                'monetary_total', 'monetary_promedio'
+            ]
 
-            rfm_data = \
-                ventas_reales.groupby('cliente_completo').agg({
-                    'fecha': ['max', 'min', 'count'],
-                    'documento_id': 'count',
-                    'valor_neto': ['sum', 'mean']
-                }).reset_index()
+        rfm_data['recency_days'] = (
+            fecha_hoy - rfm_data['fecha_max']).dt.days
+
+        # Tendencias de todas las series en batch (no una por una)
+        trend_data = calculate_trends(ventas_reales_cierre, fecha_cierre, by=by)
+
+        rfm_enhanced = pd.merge(rfm_data, trend_data, on=by, how='left')
+
+        # Rellenar valores faltantes con defaults
+        rfm_enhanced = rfm_enhanced.fillna({
+            'cagr_6m': 0,
+            'variacion_3m': 0,
+            'variacion_reciente': 0,
+            'tendencia_general': 'estable',
+            'meses_activos': 1,
+            'consistencia': 0,
+        })
+
+        # Filtrar valores válidos
+        return rfm_enhanced[
+            (rfm_enhanced['recency_days'] >= 0) &
+            (rfm_enhanced['frequency'] > 0) &
+            (rfm_enhanced['monetary_total'] > 0)
+        ]
 
-            columns = \
-                [
-                    'cliente_completo', 'fecha_max', 'fecha_min',
-                    'periodos_activos', 'frequency', 'monetary_total',
-                    'monetary_promedio'
-                ]
+    @staticmethod
+    def _score_rfm(rfm_enhanced, mes_actual):
+        """
+        Score and categorize one population of clients (R and M quintiles
+        are relative to the clients passed in, e.g. one salesperson).
 
-            rfm_data_cierre.columns = columns
-            rfm_data.columns = columns
+        Args:
+            rfm_enhanced (pd.DataFrame): Output of _build_rfm_base.
+            mes_actual (int): Current month (1-12), base of the F score.
 
-            # Renombrar para distinguir "a hoy"
-            rfm_data['recency_days'] = (
-                fecha_hoy - rfm_data['fecha_max']).dt.days
+        Returns:
+            pd.DataFrame: RFM+ table.
+        """
+        if rfm_enhanced.empty:
+            return pd.DataFrame()
 
-            # OPTIMIZACIÓN: Calcular tendencias en batch (no uno por uno)
-            trend_data = \
-                self._calculate_client_trends_batch(
-                    ventas_reales_cierre,
-                    fecha_cierre
-                )
+        rfm_enhanced = rfm_enhanced.copy()
+
+        # FREQUENCY: % de meses activos en el año (solo 100% obtiene score 5)
+        rfm_enhanced['porcentaje_meses'] = (
+            rfm_enhanced['meses_activos'] / mes_actual) * 100
+
+        rfm_enhanced['F'] = np.select(
+            [
+                (rfm_enhanced['porcentaje_meses'] == 100),
+                (rfm_enhanced['porcentaje_meses'] >= 75),
+                (rfm_enhanced['porcentaje_meses'] >= 50),
+                (rfm_enhanced['porcentaje_meses'] >= 25),
+                (rfm_enhanced['porcentaje_meses'] > 0)
+            ],
+            [5, 4, 3, 2, 1],
+            default=1
+        )
 
-            # Merge con tendencias
-            rfm_enhanced = pd.merge(
-                rfm_data, trend_data, on='cliente_completo', how='left')
-
-            # Rellenar valores faltantes con defaults
-            rfm_enhanced['cagr_6m'] = rfm_enhanced['cagr_6m'].fillna(0)
-            rfm_enhanced['variacion_3m'] = rfm_enhanced['variacion_3m'].fillna(
-                0)
-            rfm_enhanced['variacion_reciente'] = rfm_enhanced['variacion_reciente'].fillna(
-                0)
-            rfm_enhanced['tendencia_general'] = rfm_enhanced['tendencia_general'].fillna(
-                'estable')
-            rfm_enhanced['meses_activos'] = rfm_enhanced['meses_activos'].fillna(
-                1)
-            rfm_enhanced['consistencia'] = rfm_enhanced['consistencia'].fillna(
-                0)
-
-            # Filtrar valores válidos
-            rfm_enhanced = rfm_enhanced[
-                (rfm_enhanced['recency_days'] >= 0) &
-                (rfm_enhanced['frequency'] > 0) &
-                (rfm_enhanced['monetary_total'] > 0)
-            ]
+        try:
+            # RECENCY: Menos días = mejor score
+            rfm_enhanced['R'] = pd.qcut(rfm_enhanced['recency_days'],
+                                        q=5, labels=[5, 4, 3, 2, 1], duplicates='drop')
+
+            # MONETARY: Más valor = mejor score
+            rfm_enhanced['M'] = pd.qcut(rfm_enhanced['monetary_total'].rank(method='first'),
+                                        q=5, labels=[1, 2, 3, 4, 5], duplicates='drop')
+
+        except Exception as ex:
+            # Fallback con cut si qcut falla
+            print(f"⚠️ Usando fallback para scores RFM: {ex}")
+
+            rfm_enhanced['R'] = pd.cut(rfm_enhanced['recency_days'],
+                                       bins=5, labels=[5, 4, 3, 2, 1], duplicates='drop')
+            rfm_enhanced['M'] = pd.cut(rfm_enhanced['monetary_total'],
+                                       bins=5, labels=[1, 2, 3, 4, 5], duplicates='drop')
+
+        # TREND Score basado en CAGR y variaciones
+        rfm_enhanced['T'] = trend_scores(rfm_enhanced)
+
+        # Convertir a enteros
+        for col in ['R', 'F', 'M', 'T']:
+            rfm_enhanced[col] = pd.to_numeric(
+                rfm_enhanced[col], errors='coerce').fillna(3).astype(int)
+
+        # Crear RFM+ Score combinado
+        rfm_enhanced['rfm_score'] = (
+            rfm_enhanced['R'].astype(str) +
+            rfm_enhanced['F'].astype(str) +
+            rfm_enhanced['M'].astype(str) +
+            rfm_enhanced['T'].astype(str)
+        )
 
-            if rfm_enhanced.empty:
-                return pd.DataFrame()
+        # Calcular RFM+ Score numérico ponderado
+        rfm_enhanced['rfm_numeric'] = (
+            rfm_enhanced['R'] * 0.30 +
+            rfm_enhanced['F'] * 0.25 +
+            rfm_enhanced['M'] * 0.25 +
+            rfm_enhanced['T'] * 0.20
+        )
 
-            # ============ SECCIÓN CORREGIDA: SCORES RFM ============
-            # Calcular scores RFM tradicionales
-            try:
-                # RECENCY: Menos días = mejor score
-                rfm_enhanced['R'] = pd.qcut(rfm_enhanced['recency_days'],
-                                            q=5, labels=[5, 4, 3, 2, 1], duplicates='drop')
-
-                # FREQUENCY: Más MESES activos = mejor score (CORREGIDO)
-                # Calcular dinámicamente según el mes actual del año
-                mes_actual = hoy.month
-                rfm_enhanced['porcentaje_meses'] = (
-                    rfm_enhanced['meses_activos'] / mes_actual) * 100
-
-                # Asignar scores basados en porcentaje (solo 100% obtiene score 5)
-                conditions_f = [
-                    # Score 5: Todos los meses del año
-                    (rfm_enhanced['porcentaje_meses'] == 100),
-                    (rfm_enhanced['porcentaje_meses']
-                     >= 75),       # Score 4: 75-99%
-                    (rfm_enhanced['porcentaje_meses']
-                     >= 50),       # Score 3: 50-74%
-                    (rfm_enhanced['porcentaje_meses']
-                     >= 25),       # Score 2: 25-49%
-                    (rfm_enhanced['porcentaje_meses']
-                     > 0)          # Score 1: 1-24%
-                ]
-                choices_f = [5, 4, 3, 2, 1]
-                rfm_enhanced['F'] = np.select(
-                    conditions_f, choices_f, default=1)
-
-                # MONETARY: Más valor = mejor score
-                rfm_enhanced['M'] = pd.qcut(rfm_enhanced['monetary_total'].rank(method='first'),
-                                            q=5, labels=[1, 2, 3, 4, 5], duplicates='drop')
-
-            except Exception as ex:
-                # Fallback con cut si qcut falla
-                print(f"⚠️ Usando fallback para scores RFM: {ex}")
-
-                rfm_enhanced['R'] = pd.cut(rfm_enhanced['recency_days'],
-                                           bins=5, labels=[5, 4, 3, 2, 1], duplicates='drop')
-
-                # FREQUENCY: Usar la misma lógica de porcentajes como fallback (CORREGIDO)
-                mes_actual = hoy.month
-                rfm_enhanced['porcentaje_meses'] = (
-                    rfm_enhanced['meses_activos'] / mes_actual) * 100
-                conditions_f = [
-                    (rfm_enhanced['porcentaje_meses'] == 100),
-                    (rfm_enhanced['porcentaje_meses'] >= 75),
-                    (rfm_enhanced['porcentaje_meses'] >= 50),
-                    (rfm_enhanced['porcentaje_meses'] >= 25),
-                    (rfm_enhanced['porcentaje_meses'] > 0)
-                ]
-                choices_f = [5, 4, 3, 2, 1]
-                rfm_enhanced['F'] = np.select(
-                    conditions_f, choices_f, default=1)
-
-                rfm_enhanced['M'] = pd.cut(rfm_enhanced['monetary_total'],
-                                           bins=5, labels=[1, 2, 3, 4, 5], duplicates='drop')
-            # ============ FIN SECCIÓN CORREGIDA ============
-
-            # TREND Score basado en CAGR y variaciones (mantener lógica original)
-            rfm_enhanced['T'] = rfm_enhanced.apply(
-                self._calculate_trend_score, axis=1)
-
-            # Convertir a enteros
-            for col in ['R', 'F', 'M', 'T']:
-                rfm_enhanced[col] = pd.to_numeric(
-                    rfm_enhanced[col], errors='coerce').fillna(3).astype(int)
-
-            # Crear RFM+ Score combinado
-            rfm_enhanced['rfm_score'] = (
-                rfm_enhanced['R'].astype(str) +
-                rfm_enhanced['F'].astype(str) +
-                rfm_enhanced['M'].astype(str) +
-                rfm_enhanced['T'].astype(str)
-            )
+        # Categorizar clientes usando TODAS las categorías originales
+        rfm_enhanced['categoria_rfm'] = categorize(rfm_enhanced)
 
-            # Calcular RFM+ Score numérico ponderado
-            rfm_enhanced['rfm_numeric'] = (
-                rfm_enhanced['R'] * 0.30 +
-                rfm_enhanced['F'] * 0.25 +
-                rfm_enhanced['M'] * 0.25 +
-                rfm_enhanced['T'] * 0.20
-            )
+        # Información adicional
+        rfm_enhanced['valor_promedio_transaccion'] = (
+            rfm_enhanced['monetary_total'] /
+            rfm_enhanced['frequency']
+        )
 
-            # Categorizar clientes usando TODAS las categorías originales
-            rfm_enhanced['categoria_rfm'] = rfm_enhanced.apply(
-                self._categorize_enhanced_rfm, axis=1)
+        # Renombrar para compatibilidad
+        return rfm_enhanced.rename(columns={
+            'monetary_total': 'monetary',
+            'fecha_max': 'fecha'
+        })
 
-            # Información adicional
-            rfm_enhanced['valor_promedio_transaccion'] = (
-                rfm_enhanced['monetary_total'] /
-                rfm_enhanced['frequency']
-            )
+    def _calculate_enhanced_rfm_optimized(self, vendedor):
+        """
+        RFM+ table of a single salesperson (or 'Todos'), computed from scratch.
+        """
+        try:
+            hoy, fecha_cierre, fecha_hoy = self._rfm_cutoff_dates()
+
+            ventas_totales = self._unified_analyzer.get_filtered_view(
+                vendedor, 'Todos').ventas_reales
 
-            # Renombrar para compatibilidad
-            rfm_enhanced.rename(columns={
-                'monetary_total': 'monetary',
-                'fecha_max': 'fecha'
-            }, inplace=True)
+            rfm_base = self._build_rfm_base(ventas_totales, fecha_cierre, fecha_hoy)
 
-            return rfm_enhanced
+            return self._score_rfm(rfm_base.reset_index(drop=True), hoy.month)
 
         except Exception as e:
             print(f"❌ Error calculando RFM optimizado: {e}")
@@ -2321,216 +1822,109 @@ class VentasAnalyzer:
             traceback.print_exc()
             return pd.DataFrame()
 
-    def _calculate_client_trends_batch(self, ventas_data, fecha_corte):
+    def _build_rfm_tables(self):
         """
-        Calcular tendencias para TODOS los clientes de forma eficiente
+        RFM+ tables of 'Todos' and of every salesperson in one grouped pass.
+
+        Returns:
+            Dict[str, pd.DataFrame] | None: Table per salesperson, or None on error.
         """
         try:
-            # Preparar datos mensuales para todos los clientes de una vez
-            ventas_data = ventas_data.copy()
-            ventas_data['mes_periodo'] = ventas_data['fecha'].dt.to_period('M')
-
-            # Agrupar por cliente y mes
-            monthly_sales = ventas_data.groupby(['cliente_completo', 'mes_periodo'])[
-                'valor_neto'].sum().reset_index()
-
-            # Lista para resultados
-            trend_results = []
-
-            # Procesar cada cliente
-            for cliente in monthly_sales['cliente_completo'].unique():
-                client_data = monthly_sales[monthly_sales['cliente_completo'] == cliente]
-                client_data = client_data.set_index(
-                    'mes_periodo')['valor_neto'].sort_index()
-
-                # Usar el método original _calculate_client_trends pero sin el filtrado inicial
-                trend_metrics = self._calculate_client_trends_from_series(
-                    cliente, client_data, fecha_corte
+            start = time.time()
+            hoy, fecha_cierre, fecha_hoy = self._rfm_cutoff_dates()
+
+            ventas_totales = self._unified_analyzer.get_filtered_view(
+                'Todos', 'Todos').ventas_reales
+
+            if ventas_totales.empty:
+                return {}
+
+            tables = \
+                {
+                    'Todos': self._score_rfm(
+                        self._build_rfm_base(
+                            ventas_totales, fecha_cierre, fecha_hoy).reset_index(drop=True),
+                        hoy.month)
+                }
+
+            # Una sola agregación (vendedor, cliente); los scores R y M son
+            # quintiles dentro de la cartera de cada vendedor
+            rfm_base = \
+                self._build_rfm_base(
+                    ventas_totales, fecha_cierre, fecha_hoy,
+                    by=('vendedor', 'cliente_completo')
                 )
-                trend_results.append(trend_metrics)
 
-            return pd.DataFrame(trend_results)
+            if not rfm_base.empty:
+                for vendedor, grupo in rfm_base.groupby('vendedor', sort=False):
+                    tables[vendedor] = self._score_rfm(
+                        grupo.drop(columns='vendedor').reset_index(drop=True), hoy.month)
+
+            print(
+                f"✅ Tablas RFM+ calculadas para {len(tables)} vendedores en {time.time() - start:.2f}s")
+
+            return tables
 
         except Exception as e:
-            print(f"❌ Error en cálculo batch de tendencias: {e}")
-            return pd.DataFrame()
+            print(f"❌ Error calculando tablas RFM+: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-    def _calculate_client_trends_from_series(self, cliente, monthly_sales, fecha_corte):
+    def compute_rfm_tables(self, force=False):
         """
-        Calculate trend metrics from a monthly series
-        Cag from January to the last closed month.
+        Precompute the RFM+ tables of every salesperson for the current data
+        version (called after each reload). Later vendor switches only slice
+        the stored tables.
+
+        Args:
+            force (bool): Rebuild even if the tables are up to date.
+
+        Returns:
+            Dict[str, pd.DataFrame]: Table per salesperson (plus 'Todos').
         """
-        try:
-            if len(monthly_sales) < 2:
-                return {
-                    'cliente_completo': cliente,
-                    'cagr_6m': 0,
-                    'variacion_3m': 0,
-                    'variacion_reciente': 0,
-                    'tendencia_general': 'estable',
-                    'meses_activos': 1,
-                    'consistencia': 0
-                }
+        # Recency y F dependen del día actual
+        key = (self.data_version, date.today())
 
-            # Convertir fecha_corte a period
-            if hasattr(fecha_corte, 'to_period'):
-                ultimo_periodo_completo = fecha_corte.to_period('M')
-            else:
-                ultimo_periodo_completo = pd.Timestamp(
-                    fecha_corte).to_period('M')
-
-            # Filtrar hasta el último período completo
-            monthly_sales = monthly_sales[monthly_sales.index <=
-                                          ultimo_periodo_completo]
-
-            if len(monthly_sales) < 2:
-                return {
-                    'cliente_completo': cliente,
-                    'cagr_6m': 0,
-                    'variacion_3m': 0,
-                    'variacion_reciente': 0,
-                    'tendencia_general': 'estable',
-                    'meses_activos': 1,
-                    'consistencia': 0
-                }
+        with self._rfm_lock:
+            cached_key, tables = self._rfm_tables
 
-            # CAMBIO 2: CAGR desde enero del año actual hasta último mes cerrado
-            current_year = fecha_corte.year
-            enero_period = pd.Period(f'{current_year}-01', freq='M')
+            if not force and cached_key == key:
+                return tables
 
-            # Filtrar datos desde enero del año actual
-            year_data = monthly_sales[monthly_sales.index >= enero_period]
+            tables = self._build_rfm_tables()
 
-            if len(year_data) >= 2:
-                primer_valor = year_data.iloc[0]
-                ultimo_valor = year_data.iloc[-1]
-                periodos = len(year_data) - 1
+            if tables is None:
+                return {}
 
-                if primer_valor > 0 and periodos > 0:
-                    cagr_6m = ((ultimo_valor / primer_valor)
-                               ** (1/periodos) - 1) * 100
-                else:
-                    cagr_6m = 0
-            else:
-                # Si no hay suficientes datos del año actual, usar los últimos meses disponibles
-                meses_disponibles = len(monthly_sales)
-                meses_cagr = min(6, meses_disponibles)
-                recent_months = monthly_sales.tail(meses_cagr)
-
-                if len(recent_months) >= 2:
-                    primer_valor = recent_months.iloc[0]
-                    ultimo_valor = recent_months.iloc[-1]
-                    periodos = len(recent_months) - 1
-
-                    if primer_valor > 0 and periodos > 0:
-                        cagr_6m = ((ultimo_valor / primer_valor)
-                                   ** (1/periodos) - 1) * 100
-                    else:
-                        cagr_6m = 0
-                else:
-                    cagr_6m = 0
-
-            # CAMBIO 3: Variación de últimos 3 meses vs 3 meses anteriores (solo meses cerrados)
-            if len(monthly_sales) >= 6:
-                # Usar solo meses cerrados para el cálculo
-                meses_cerrados = monthly_sales[monthly_sales.index <
-                                               ultimo_periodo_completo]
-
-                if len(meses_cerrados) >= 6:
-                    ultimos_3m = meses_cerrados.tail(3).sum()
-                    anteriores_3m = meses_cerrados.tail(6).head(3).sum()
-
-                    if anteriores_3m > 0:
-                        variacion_3m = (
-                            (ultimos_3m - anteriores_3m) / anteriores_3m) * 100
-                    else:
-                        variacion_3m = 100 if ultimos_3m > 0 else 0
-                else:
-                    variacion_3m = 0
-            else:
-                variacion_3m = 0
+            self._rfm_tables = (key, tables)
 
-            # 3. Variación del último mes vs promedio anterior
-            if len(monthly_sales) >= 3:
-                ultimo_mes = monthly_sales.iloc[-1]
-                promedio_anterior = monthly_sales.iloc[:-1].mean()
+        return tables
 
-                if promedio_anterior > 0:
-                    variacion_reciente = (
-                        (ultimo_mes - promedio_anterior) / promedio_anterior) * 100
-                else:
-                    variacion_reciente = 100 if ultimo_mes > 0 else 0
-            else:
-                variacion_reciente = 0
-
-            # 4. Tendencia general
-            if cagr_6m > 10 and variacion_3m > 5:
-                tendencia_general = 'crecimiento_fuerte'
-            elif cagr_6m > 0 and variacion_3m >= 0:
-                tendencia_general = 'crecimiento'
-            elif cagr_6m < -10 and variacion_3m < -5:
-                tendencia_general = 'decrecimiento_fuerte'
-            elif cagr_6m < 0 and variacion_3m < 0:
-                tendencia_general = 'decrecimiento'
-            else:
-                tendencia_general = 'estable'
+    def get_rfm_table(self, vendedor='Todos'):
+        """
+        Precomputed RFM+ table of a salesperson (read-only, do not modify).
 
-            # 5. Consistencia
-            if len(monthly_sales) >= 3:
-                cv = (monthly_sales.std() / monthly_sales.mean()) * \
-                    100 if monthly_sales.mean() > 0 else 100
-                consistencia = max(0, 100 - cv)
-            else:
-                consistencia = 50
+        Args:
+            vendedor (str): Salesperson or 'Todos'.
 
-            return {
-                'cliente_completo': cliente,
-                'cagr_6m': round(cagr_6m, 2),
-                'variacion_3m': round(variacion_3m, 2),
-                'variacion_reciente': round(variacion_reciente, 2),
-                'tendencia_general': tendencia_general,
-                'meses_activos': len(monthly_sales),
-                'consistencia': round(consistencia, 1)
-            }
+        Returns:
+            pd.DataFrame: RFM+ table (empty if the salesperson has no valid sales).
+        """
+        cached_key, tables = self._rfm_tables
 
-        except Exception as e:
-            print(f"❌ Error calculando tendencias para {cliente}: {e}")
-            return {
-                'cliente_completo': cliente,
-                'cagr_6m': 0,
-                'variacion_3m': 0,
-                'variacion_reciente': 0,
-                'tendencia_general': 'estable',
-                'meses_activos': 1,
-                'consistencia': 0
-            }
+        if cached_key != (self.data_version, date.today()):
+            tables = self.compute_rfm_tables()
+
+        return tables.get(vendedor, pd.DataFrame())
 
     def get_client_rfm_details(self, cliente, vendedor='Todos'):
         """
-        Obtener detalles RFM+ para un cliente específico USANDO CACHE
+        Obtener detalles RFM+ para un cliente específico desde la tabla
+        precalculada del vendedor
         """
         try:
-            # Primero intentar obtener del cache
-            cache_key = f"rfm_{vendedor}"
-            current_time = datetime.now()
-
-            if (cache_key in self._rfm_cache and
-                self._rfm_cache_timestamp and
-                    (current_time - self._rfm_cache_timestamp).seconds < self._rfm_cache_ttl):
-
-                rfm_data = self._rfm_cache[cache_key]
-                client_data = rfm_data[rfm_data['cliente_completo'] == cliente]
-
-                if not client_data.empty:
-                    client_info = client_data.iloc[0]
-                    return self._format_client_rfm_details(client_info)
-
-            # Si no está en cache, calcular TODO y cachear
-            rfm_data = \
-                self.calculate_enhanced_rfm_scores(
-                    vendedor,
-                    use_cache=True
-                )
+            rfm_data = self.get_rfm_table(vendedor)
 
             if rfm_data.empty:
                 return None
@@ -2584,8 +1978,8 @@ class VentasAnalyzer:
         """
         Método para limpiar el cache manualmente si es necesario
         """
-        self._rfm_cache = {}
-        self._rfm_cache_timestamp = None
+        with self._rfm_lock:
+            self._rfm_tables = (None, {})
         print("🗑️ Cache RFM limpiado")
 
     def load_fletes_from_firebase(self, force_reload=False):
@@ -2637,6 +2031,19 @@ class VentasAnalyzer:
             print(f"❌ Error cargando fletes: {e}")
             return pd.DataFrame()
 
+    def get_fletes_index(self, force_reload=False) -> FletesIndex:
+        """
+        Prepared fletes table (normalized, formatted and indexed once) for
+        search and pagination. Rebuilt only when the fletes frame is reloaded.
+        """
+        df_fletes = self.load_fletes_from_firebase(force_reload)
+
+        if self._fletes_index is None or self._fletes_index_source is not df_fletes:
+            self._fletes_index = FletesIndex(df_fletes)
+            self._fletes_index_source = df_fletes
+
+        return self._fletes_index
+
     def get_impactos_heatmap(self, mes='Todos'):
         """
         Pivot: vendedores × dates → unique clients impacted.
@@ -1,11 +1,183 @@
+import os
+import re
 import time
+import threading
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Callable, Dict, Any
+
+from .calendario import CalendarioVentas
+
+
+# Banderas por tipo de documento y el patrón del nombre del maestro que las activa
+DOCUMENT_FLAGS = \
+    {
+        'es_remision': re.compile('Remision', re.IGNORECASE),
+        'es_devolucion': re.compile('Devolución|Devolucion', re.IGNORECASE),
+        'es_nota_credito': re.compile('Nota.*crédito|Nota.*credito', re.IGNORECASE),
+    }
+
+# Clase de documento (columna categórica 'clase_documento') de cada bandera,
+# en orden de prioridad ("Devolución remisión" es una devolución)
+DOCUMENT_CLASS_BY_FLAG = \
+    {
+        'es_devolucion': 'devolucion',
+        'es_nota_credito': 'nota_credito',
+        'es_remision': 'remision',
+    }
+
+DOCUMENT_CLASSES = list(DOCUMENT_CLASS_BY_FLAG.values()) + ['otro']
+
+# Rangos de días sin venta (límites inferiores de cada categoría desde el segundo)
+DIAS_SIN_VENTA_LIMITES = [30, 60, 90, 180]
+DIAS_SIN_VENTA_CATEGORIAS = np.array(
+    ["1-29 días", "30-59 días", "60-89 días", "90-179 días", "180+ días"], dtype=object)
+
+
+def classify_document_types(df: pd.DataFrame) -> None:
+    """
+    Add the document-class column and the es_* flag columns to a frame
+    with a decoded 'tipo' column.
+
+    Only the distinct tipo names (one per maestros/tipo_documentos code) are
+    matched against DOCUMENT_FLAGS; rows take their flags from their code,
+    so getters filter with boolean columns instead of regex scans.
+
+    Args:
+        df (pd.DataFrame): Frame to update in place.
+    """
+    codes, tipos = pd.factorize(df['tipo'])
+
+    for flag, pattern in DOCUMENT_FLAGS.items():
+        matches = [isinstance(t, str) and pattern.search(t) is not None for t in tipos]
+
+        # Código -1 (tipo nulo) -> último elemento (False)
+        df[flag] = np.append(np.array(matches, dtype=bool), False)[codes]
+
+    df['clase_documento'] = pd.Categorical(
+        np.select(
+            [df[flag].to_numpy() for flag in DOCUMENT_CLASS_BY_FLAG],
+            list(DOCUMENT_CLASS_BY_FLAG.values()),
+            default='otro'
+        ),
+        categories=DOCUMENT_CLASSES
+    )
+
+
+class FilteredVentasView:
+    """
+    Sales filtered by (vendedor, mes) for one data version, plus the
+    document-type subsets derived from it.
+
+    Built lazily and shared by every callback that asks for the same
+    filters, so a dropdown change scans df_ventas once instead of once per
+    panel. Frames are shared: copy before mutating them.
+    """
+
+    def __init__(self, source: pd.DataFrame, vendedor: str, mes: str, version: int):
+        """
+        Constructor.
+
+        Args:
+            source (pd.DataFrame): df_ventas snapshot of `version`.
+            vendedor (str): Salesperson filter ('Todos' for all).
+            mes (str): Month filter 'YYYY-MM' ('Todos' for all).
+            version (int): Analyzer data version.
+        """
+        self.vendedor = vendedor
+        self.mes = mes
+        self.version = version
+
+        self._source = source
+        # Reentrante: los subconjuntos por tipo se construyen sobre df
+        self._lock = threading.RLock()
+        self._frames = {}
+
+    def _frame(self, name: str, build) -> pd.DataFrame:
+        """
+        Build a frame once under the view lock and cache it.
+        """
+        frame = self._frames.get(name)
+
+        if frame is None:
+            with self._lock:
+                frame = self._frames.get(name)
+
+                if frame is None:
+                    frame = build()
+                    self._frames[name] = frame
+
+        return frame
+
+    def _build_df(self) -> pd.DataFrame:
+        df = self._source
+
+        if df.empty:
+            return df
+
+        mask = pd.Series(True, index=df.index)
+
+        if self.vendedor != 'Todos':
+            mask &= df['vendedor'] == self.vendedor
+
+        if self.mes != 'Todos':
+            mask &= df['mes_nombre'] == self.mes
+
+        return df[mask]
+
+    def _tipo_subset(self, flag: str) -> pd.DataFrame:
+        df = self.df
+
+        if df.empty:
+            return df
+
+        return df[df[flag]]
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        All filtered rows.
+        """
+        return self._frame('df', self._build_df)
+
+    @property
+    def ventas_reales(self) -> pd.DataFrame:
+        """
+        Sales documents (Remision).
+        """
+        return self._frame(
+            'ventas_reales', lambda: self._tipo_subset('es_remision'))
+
+    @property
+    def devoluciones(self) -> pd.DataFrame:
+        """
+        Returns (Devolución).
+        """
+        return self._frame(
+            'devoluciones', lambda: self._tipo_subset('es_devolucion'))
+
+    @property
+    def notas_credito(self) -> pd.DataFrame:
+        """
+        Credit notes (Nota crédito).
+        """
+        return self._frame(
+            'notas_credito', lambda: self._tipo_subset('es_nota_credito'))
 
 
 class UnifiedVentasAnalyzer:
 
+    # Meses de historia cargados (0 = historia completa, por defecto). Todas
+    # las vistas usan solo los datos cargados, así que una ventana > 0 limita
+    # el dashboard a esos meses. Requiere ".indexOn": ["fecha"] en fac_ventas y
+    # recibos_caja (ver steps.txt)
+    RESIDENT_MONTHS = int(os.environ.get('VENTAS_RESIDENT_MONTHS', 0))
+
+    # Vistas filtradas (vendedor, mes) retenidas por versión de datos
+    MAX_FILTERED_VIEWS = 64
+
     def __init__(self):
         """
         Initialize the UnifiedVentasAnalyzer with empty dataframes.
@@ -41,35 +213,145 @@ class UnifiedVentasAnalyzer:
         self._last_clientes_update = None
         self._last_maestros_update = None
 
+        # Convenios por NIT, por (modo, persona, mes): (origen, convenios, tabla)
+        self._convenios_por_nit = OrderedDict()
+
+        # Vistas filtradas compartidas entre callbacks
+        self._data_version = 0
+        self._views = OrderedDict()
+        self._views_lock = threading.Lock()
+
+        # Estructuras derivadas de cada versión de datos (ver get_versioned):
+        # nombre -> (versión, valor)
+        self._versioned = {}
+
+    @property
+    def data_version(self) -> int:
+        """
+        Version of df_ventas; changes every time the data is rebuilt.
+        """
+        return self._data_version
+
+    def _bump_data_version(self) -> None:
+        """
+        Invalidate the filtered views and every derived structure after the
+        frames change.
+        """
+        with self._views_lock:
+            self._data_version += 1
+            self._views.clear()
+            self._versioned.clear()
+            self._convenios_por_nit.clear()
+
+    def get_versioned(self, name: str, build: Callable[[], Any]) -> Any:
+        """
+        Structure derived from the frames of the current data version, built
+        once with `build` and dropped by _bump_data_version. Every analyzer
+        keeps its per-load indexes here, so they are invalidated together.
+
+        Args:
+            name (str): Cache name (e.g. 'variaciones_vendedor').
+            build (Callable[[], Any]): Builds the value from the current frames.
+
+        Returns:
+            Any: Cached or freshly built value.
+        """
+        with self._views_lock:
+            version = self._data_version
+            cached = self._versioned.get(name)
+
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Construir fuera del lock para no bloquear las vistas de otros callbacks
+        value = build()
+
+        with self._views_lock:
+            # Si los datos cambiaron durante la construcción no se guarda
+            if self._data_version == version:
+                self._versioned[name] = (version, value)
+
+        return value
+
+    def get_filtered_view(self, vendedor='Todos', mes='Todos') -> FilteredVentasView:
+        """
+        Shared filtered view for (vendedor, mes) of the current data version.
+
+        Args:
+            vendedor (str): Salesperson filter.
+            mes (str): Month filter.
+
+        Returns:
+            FilteredVentasView: View (frames are read-only).
+        """
+        with self._views_lock:
+            key = (vendedor, mes, self._data_version)
+            view = self._views.get(key)
+
+            if view is None:
+                view = FilteredVentasView(
+                    self.df_ventas, vendedor, mes, self._data_version)
+                self._views[key] = view
+
+                if len(self._views) > self.MAX_FILTERED_VIEWS:
+                    self._views.popitem(last=False)
+            else:
+                self._views.move_to_end(key)
+
+        return view
+
     def reload_data(self):
         """
         Force reload of ALL data from Firebase.
+
+        fac_ventas is downloaded first; the current frames are only replaced
+        once that download succeeded, so a reload during an outage keeps the
+        last loaded data.
         """
         try:
-            # Clean cache
-            self.df_ventas_totales = pd.DataFrame()
-            self.df_ventas = pd.DataFrame()
-            self.df_transferencias = pd.DataFrame()
+            db = self._get_db()
+
+            # Sin conexión: conservar los últimos datos válidos
+            if db is None:
+                print(
+                    "⚠️ [UnifiedVentasAnalyzer] Base de datos no disponible, se conservan los datos actuales")
+                return self.df_ventas_totales
+
+            start_time = time.time()
+
+            data = self.fetch_windowed(db, "fac_ventas")
+
+            if data is None:
+                print(
+                    "⚠️ [UnifiedVentasAnalyzer] No se pudo descargar fac_ventas, se conservan los datos actuales")
+                return self.df_ventas_totales
+
+            # Maestros antes de construir el DataFrame (solo se reemplazan si llegan datos)
+            if not self.load_maestros_data(force_reload=True):
+                print("⚠️ Continuando sin algunos datos maestros")
+
+            self.load_clientes_data_from_firebase(force_reload=True)
+
+            # Caches secundarias: se recargan bajo demanda con la nueva conexión
             self._df_convenios = pd.DataFrame()
             self._df_recibos = pd.DataFrame()
             self._df_num_clientes = pd.DataFrame()
-            self._df_clientes = pd.DataFrame()
             self._df_cuotas = pd.DataFrame()
 
-            # Limpiar cache de maestros
-            self._maestro_tipos = {}
-            self._maestros_forma_pago = {}
-            self._maestro_vendedores = {}
-            self._maestro_causales_dev = {}
-            self._clientes_id_cache = {}
+            # Reemplazar los DataFrames principales (o vaciarlos si no hay documentos)
+            result = self.process_unified_data(data)
 
-            self.vendedores_list = ['Todos']
-            self.transferencistas_list = ['Todos']
-            self.meses_list = ['Todos']
+            if result.empty:
+                print(
+                    "⚠️ [UnifiedVentasAnalyzer] No data found in Firebase - fac_ventas")
+                self.df_ventas_totales = pd.DataFrame()
+                self.df_ventas = pd.DataFrame()
+                self.df_transferencias = pd.DataFrame()
+                self.vendedores_list = ['Todos']
+                self.transferencistas_list = ['Todos']
+                self.meses_list = ['Todos']
+                self._bump_data_version()
 
-            # Reload main data
-            start_time = time.time()
-            result = self.load_data_from_firebase(force_reload=True)
             load_time = time.time() - start_time
 
             # Mark update
@@ -84,32 +366,71 @@ class UnifiedVentasAnalyzer:
 
         except Exception as e:
             print(f"❌ [UnifiedVentasAnalyzer] Error recargando datos: {e}")
-            return pd.DataFrame()
+            return self.df_ventas_totales
 
     def _get_db(self):
         """
-        Get database instance with retry logic.
+        Get database instance. Returns None immediately while the
+        connection circuit is open (see server.ConnectionHealth).
         """
         from server import get_db
 
-        max_retries = 3
+        return get_db()
 
-        for attempt in range(max_retries):
-            try:
-                db = get_db()
-                if db:
-                    return db
-            except Exception as e:
-                print(
-                    f"⚠️ Intento {attempt + 1}/{max_retries}: Error conectando a DB: {e}")
+    def get_window_start(self) -> str | None:
+        """
+        First day of the resident history window as 'YYYY-MM-DD'.
+
+        Returns:
+            str | None: Window start, None when full history is resident.
+        """
+        if self.RESIDENT_MONTHS <= 0:
+            return None
+
+        inicio = pd.Timestamp.now().to_period('M') - (self.RESIDENT_MONTHS - 1)
+
+        return inicio.start_time.strftime('%Y-%m-%d')
+
+    def fetch_windowed(self, db, collection: str) -> Dict[str, Any] | None:
+        """
+        Fetch only the documents of the resident window using an indexed
+        range query on the 'fecha' child.
 
-            # Wait until next attempt
-            if attempt < max_retries - 1:
-                time.sleep(1)
+        Falls back to the full collection (trimmed to the window) when the
+        index is missing or the range query fails.
+
+        Args:
+            db (Database): Database instance.
+            collection (str): Collection name.
+
+        Returns:
+            Dict[str, Any] | None: Documents keyed by id.
+        """
+        desde = self.get_window_start()
+
+        if desde is None:
+            return db.get(collection)
+
+        data = db.where_range(collection, 'fecha', desde, '\uf8ff')
+
+        if data is not None:
+            return data
 
         print(
-            "❌ No se pudo establecer conexión a la base de datos después de varios intentos")
-        return None
+            f"⚠️ [UnifiedVentasAnalyzer] Consulta por rango falló en {collection}, "
+            "descargando colección completa (¿falta .indexOn fecha?)")
+
+        data = db.get(collection)
+
+        if not data:
+            return data
+
+        return \
+            {
+                key: value
+                for key, value in data.items()
+                if str(value.get('fecha', '')) >= desde
+            }
 
     def load_maestros_data(self, force_reload: bool = False) -> bool:
         """
@@ -131,8 +452,24 @@ class UnifiedVentasAnalyzer:
                     "❌ [UnifiedVentasAnalyzer] No se pudo obtener conexión para maestros")
                 return False
 
+            # Descargar los cuatro maestros en paralelo
+            from server import get_async_db
+
+            async_db = get_async_db()
+            paths = [
+                "maestros/tipo_documentos",
+                "maestros/codigos_vendedores",
+                "maestros/forma_pago_clientes",
+                "maestros/causales_dev"
+            ]
+
+            if async_db:
+                maestros = async_db.run(async_db.get_many(paths=paths))
+            else:
+                maestros = {path: db.get_by_path(path) for path in paths}
+
             # Cargar tipo_documentos
-            tipos_data = db.get_by_path("maestros/tipo_documentos")
+            tipos_data = maestros["maestros/tipo_documentos"]
 
             if tipos_data:
                 self._maestro_tipos = tipos_data
@@ -140,7 +477,7 @@ class UnifiedVentasAnalyzer:
                 print("⚠️ No se encontraron datos en maestros/tipo_documentos")
 
             # Cargar codigos_vendedores
-            vendedores_data = db.get_by_path("maestros/codigos_vendedores")
+            vendedores_data = maestros["maestros/codigos_vendedores"]
 
             if vendedores_data:
                 self._maestro_vendedores = vendedores_data
@@ -148,7 +485,7 @@ class UnifiedVentasAnalyzer:
                 print("⚠️ No se encontraron datos en maestros/codigos_vendedores")
 
             # Cargar forma_pago
-            forma_pago_data = db.get_by_path("maestros/forma_pago_clientes")
+            forma_pago_data = maestros["maestros/forma_pago_clientes"]
 
             if forma_pago_data:
                 self._maestros_forma_pago = forma_pago_data
@@ -156,7 +493,7 @@ class UnifiedVentasAnalyzer:
                 print("⚠️ No se encontraron datos en maestros/forma_pago_clientes")
 
             # Cargar causales de devolución
-            causales_data = db.get_by_path("maestros/causales_dev")
+            causales_data = maestros["maestros/causales_dev"]
 
             if causales_data:
                 self._maestro_causales_dev = causales_data
@@ -238,8 +575,8 @@ class UnifiedVentasAnalyzer:
             # Load clientes_id data into cache
             self.load_clientes_data_from_firebase(force_reload)
 
-            # Get invoices data
-            data = db.get("fac_ventas")
+            # Get invoices data (resident window only)
+            data = self.fetch_windowed(db, "fac_ventas")
 
             if data:
                 result = self.process_unified_data(data)
@@ -289,56 +626,39 @@ class UnifiedVentasAnalyzer:
 
                 return result
             else:
+                # Conservar el maestro anterior (vacío si nunca se cargó)
                 print("⚠️ [VentasAnalyzer] No clientes_id data found in Firebase")
-                self._df_clientes = pd.DataFrame()
-                self._clientes_id_cache = {}
-                return pd.DataFrame()
+                return self._df_clientes
 
         except Exception as e:
             print(
                 f"❌ [VentasAnalyzer] Error loading clientes_id data from Firebase: {e}")
-            self._df_clientes = pd.DataFrame()
-            self._clientes_id_cache = {}
-            return pd.DataFrame()
+            return self._df_clientes
 
-    def get_dias_sin_venta_por_cliente(
-            self,
-            mode: str,
-            vendedor: str = 'Todos'):
-        """
-        Get days without transfers for each client.
-        Solo incluye clientes con estado diferente a 'Anulado'.
+    def _build_ultima_venta_index(self, source: pd.DataFrame, persona_col: str,
+                                  df_clientes: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         """
-        if mode == "vendedor":
-            df = \
-                self.filter_ventas_data(
-                    vendedor=vendedor,
-                    mes='Todos'
-                )
-        else:
-            df = \
-                self.filter_transferencias_data(
-                    transferencista=vendedor,
-                    mes='Todos'
-                )
-
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        Last purchase per client (active clients only) for 'Todos' and for
+        each salesperson / transfer agent, in one grouped pass per level.
 
-        if ventas_reales.empty:
-            return pd.DataFrame()
+        Args:
+            source (pd.DataFrame): df_ventas or df_transferencias.
+            persona_col (str): 'vendedor' or 'transferencista'.
+            df_clientes (pd.DataFrame): Client master (estado per id1).
 
-        # Obtener datos de clientes para filtrar por estado
-        df_clientes = self._df_clientes
+        Returns:
+            Dict[str, pd.DataFrame]: cliente_completo, fecha, valor_neto,
+            documento_id and id1 per client, keyed by persona.
+        """
+        ventas_reales = source[source['es_remision']] if not source.empty else source
 
-        if df_clientes.empty:
-            df_clientes = self.load_clientes_data_from_firebase()
+        if ventas_reales.empty:
+            return {}
 
-        # Si aún no hay datos de clientes, proceder sin filtro
+        # Si no hay datos de clientes, proceder sin filtro
         if df_clientes.empty:
             print(
                 "⚠️ No se pudieron cargar datos de clientes, procesando sin filtro de estado")
-            clientes_activos = ventas_reales['id1'].unique()
         else:
             # Filtrar clientes que NO estén anulados
             clientes_no_anulados = df_clientes[
@@ -348,60 +668,91 @@ class UnifiedVentasAnalyzer:
 
             if clientes_no_anulados.empty:
                 print("⚠️ No se encontraron clientes con estado válido")
-                return pd.DataFrame()
+                return {}
 
-            # Obtener lista de IDs de clientes activos
-            clientes_activos = clientes_no_anulados['id1'].unique()
+            ventas_reales = ventas_reales[
+                ventas_reales['id1'].isin(clientes_no_anulados['id1'].unique())
+            ]
 
-        # FILTRAR ventas solo de clientes activos (no anulados)
-        ventas_reales_filtradas = ventas_reales[
-            ventas_reales['id1'].isin(clientes_activos)
-        ]
+            if ventas_reales.empty:
+                print("⚠️ No se encontraron ventas para clientes activos")
+                return {}
 
-        if ventas_reales_filtradas.empty:
-            print("⚠️ No se encontraron ventas para clientes activos")
-            return pd.DataFrame()
+        agg = \
+            {
+                'fecha': 'max',
+                'valor_neto': 'sum',
+                'documento_id': 'count',
+                'id1': 'first'  # Agregar id1 para referencia
+            }
 
-        # Get last sale date for each client (solo clientes activos)
-        ultima_venta = ventas_reales_filtradas.groupby('cliente_completo').agg({
-            'fecha': 'max',
-            'valor_neto': 'sum',
-            'documento_id': 'count',
-            'id1': 'first'  # Agregar id1 para referencia
-        }).reset_index()
+        index = \
+            {
+                'Todos': ventas_reales.groupby('cliente_completo').agg(agg).reset_index()
+            }
+
+        por_persona = ventas_reales.groupby(
+            [persona_col, 'cliente_completo']).agg(agg).reset_index(level=1)
+
+        for persona, rows in por_persona.groupby(level=0, sort=False).indices.items():
+            index[persona] = por_persona.iloc[rows].reset_index(drop=True)
 
         # Remove rows with invalid dates
-        ultima_venta = ultima_venta.dropna(subset=['fecha'])
+        return {persona: df.dropna(subset=['fecha']) for persona, df in index.items()}
+
+    def _get_ultima_venta_index(self, mode: str) -> Dict[str, pd.DataFrame]:
+        """
+        Shared last-purchase index of a mode, built once per data version.
+        """
+        df_clientes = self._df_clientes
+
+        if df_clientes.empty:
+            df_clientes = self.load_clientes_data_from_firebase()
 
-        if ultima_venta.empty:
+        def build():
+            return self._build_ultima_venta_index(
+                self.df_ventas if mode == "vendedor" else self.df_transferencias,
+                'vendedor' if mode == "vendedor" else 'transferencista',
+                df_clientes
+            )
+
+        # Sin maestro de clientes no se guarda: se reintenta la carga
+        if df_clientes.empty:
+            return build()
+
+        return self.get_versioned(f"ultima_venta_{mode}", build)
+
+    def get_dias_sin_venta_por_cliente(
+            self,
+            mode: str,
+            vendedor: str = 'Todos'):
+        """
+        Get days without transfers for each client.
+        Solo incluye clientes con estado diferente a 'Anulado'.
+        Only the days are computed per call; the last purchase per client
+        comes from the index built on reload (_get_ultima_venta_index).
+        """
+        ultima_venta = self._get_ultima_venta_index(mode).get(vendedor)
+
+        if ultima_venta is None or ultima_venta.empty:
             return pd.DataFrame()
 
         # Calculate days without sales
         today = datetime.now()
-        ultima_venta['dias_sin_venta'] = (
-            today - ultima_venta['fecha']).dt.days
+        dias_sin_venta = (today - ultima_venta['fecha']).dt.days
 
         # Filter out recent sales (less than 7 days) to focus on inactive clients
-        resultado = ultima_venta[ultima_venta['dias_sin_venta'] >= 7].copy()
+        recientes = dias_sin_venta >= 7
 
-        if resultado.empty:
+        if not recientes.any():
             return pd.DataFrame()
 
-        # Add categories for better visualization
-        def categorize_days(days):
-            if days < 30:
-                return "1-29 días"
-            elif days < 60:
-                return "30-59 días"
-            elif days < 90:
-                return "60-89 días"
-            elif days < 180:
-                return "90-179 días"
-            else:
-                return "180+ días"
+        resultado = ultima_venta[recientes].assign(
+            dias_sin_venta=dias_sin_venta[recientes])
 
-        resultado['categoria'] = resultado['dias_sin_venta'].apply(
-            categorize_days)
+        # Add categories for better visualization
+        resultado['categoria'] = DIAS_SIN_VENTA_CATEGORIAS[
+            np.digitize(resultado['dias_sin_venta'].to_numpy(), DIAS_SIN_VENTA_LIMITES)]
 
         # Sort by days without sales descending
         return resultado.sort_values('dias_sin_venta', ascending=False)
@@ -410,6 +761,27 @@ class UnifiedVentasAnalyzer:
         """
         Process raw unified sales data from fac_ventas and enrich with master data.
         """
+        df = self._build_unified_frame(data)
+
+        if df.empty:
+            return pd.DataFrame()
+
+        # Crear DataFrame principal
+        self.df_ventas_totales = df
+
+        # Create months list (común para ambos)
+        meses_unicos = df['mes_nombre'].dropna().unique()
+        self.meses_list = ['Todos'] + sorted(meses_unicos, reverse=True)
+
+        # Separar en dos DataFrames específicos
+        self._separate_data()
+
+        return self.df_ventas_totales
+
+    def _build_unified_frame(self, data) -> pd.DataFrame:
+        """
+        Build the enriched DataFrame for raw fac_ventas documents.
+        """
         if not data:
             return pd.DataFrame()
 
@@ -460,16 +832,12 @@ class UnifiedVentasAnalyzer:
         if not ventas_list:
             return pd.DataFrame()
 
-        # Crear DataFrame principal
-        self.df_ventas_totales = pd.DataFrame(ventas_list)
+        df = pd.DataFrame(ventas_list)
 
         # Procesar fechas y campos comunes
-        self._process_common_fields(self.df_ventas_totales)
+        self._process_common_fields(df)
 
-        # Separar en dos DataFrames específicos
-        self._separate_data()
-
-        return self.df_ventas_totales
+        return df
 
     def _process_common_fields(self, df):
         """
@@ -485,6 +853,9 @@ class UnifiedVentasAnalyzer:
         # Calculate net value (valor_bruto - descuento)
         df['valor_neto'] = df['valor_bruto'] - df['descuento']
 
+        # Clasificar el tipo de documento una sola vez
+        classify_document_types(df)
+
         # Create combined client name
         df['cliente_completo'] = df.apply(
             lambda row: f"{row['cliente']} – {row['url']}" if row['url'] and row['url'].strip(
@@ -492,23 +863,26 @@ class UnifiedVentasAnalyzer:
             axis=1
         )
 
-        # Create months list (común para ambos)
-        meses_unicos = df['mes_nombre'].dropna().unique()
-        self.meses_list = ['Todos'] + sorted(meses_unicos, reverse=True)
+    @staticmethod
+    def _ventas_mask(df: pd.DataFrame) -> pd.Series:
+        """
+        Rows with a decoded, non-empty vendedor.
+        """
+        # Filtrar registros donde vendedor no está vacío
+        return (
+            df['vendedor'].notna() &
+            (df['vendedor'] != '') &
+            (df['vendedor'] != 'null') &
+            (~df['vendedor'].str.contains(
+                'Vendedor \\d+', na=False))  # Excluir no decodificados
+        )
 
     def _separate_data(self):
         """
         Separate unified data into vendor and transfer agent specific DataFrames.
         """
         # DataFrame para ventas (por vendedor)
-        # Filtrar registros donde vendedor no está vacío
-        ventas_mask = (
-            self.df_ventas_totales['vendedor'].notna() &
-            (self.df_ventas_totales['vendedor'] != '') &
-            (self.df_ventas_totales['vendedor'] != 'null') &
-            (~self.df_ventas_totales['vendedor'].str.contains(
-                'Vendedor \\d+', na=False))  # Excluir no decodificados
-        )
+        ventas_mask = self._ventas_mask(self.df_ventas_totales)
         self.df_ventas = self.df_ventas_totales[ventas_mask].copy()
 
         # Filtrar registros donde transferencista no está vacío
@@ -535,31 +909,26 @@ class UnifiedVentasAnalyzer:
             self.transferencistas_list = [
                 'Todos'] + sorted(transferencistas_unicos)
 
+        # Nueva versión cuando ambos DataFrames ya están asignados
+        self._bump_data_version()
+
     def filter_ventas_data(self, vendedor='Todos', mes='Todos'):
         """
         Filter ventas data by salesperson and month.
-        """
-        df = self.df_ventas.copy()
-
-        if vendedor != 'Todos':
-            df = df[df['vendedor'] == vendedor]
-
-        if mes != 'Todos':
-            df = df[df['mes_nombre'] == mes]
 
-        return df
+        Returns a private copy; read-only callers should use
+        get_filtered_view() to share the filtered frame.
+        """
+        return self.get_filtered_view(vendedor, mes).df.copy()
 
     def get_resumen_ventas(self, vendedor='Todos', mes='Todos'):
         """Get sales summary statistics."""
-        df = self.filter_ventas_data(vendedor, mes)
+        view = self.get_filtered_view(vendedor, mes)
 
         # Filter only sales (exclude credit notes, returns, etc.)
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-        devoluciones = df[df['tipo'].str.contains(
-            'Devolución|Devolucion', case=False, na=False)]
-        notas_credito = df[df['tipo'].str.contains(
-            'Nota.*crédito|Nota.*credito', case=False, na=False)]
+        ventas_reales = view.ventas_reales
+        devoluciones = view.devoluciones
+        notas_credito = view.notas_credito
 
         total_ventas = ventas_reales['valor_neto'].sum()
         total_devoluciones = abs(devoluciones['valor_neto'].sum())
@@ -570,8 +939,7 @@ class UnifiedVentasAnalyzer:
         df_tot = self.df_ventas_totales.copy()
         if mes != 'Todos':
             df_tot = df_tot[df_tot['mes_nombre'] == mes]
-        dev_directas = df_tot[df_tot['tipo'].str.contains(
-            'Devolución|Devolucion', case=False, na=False)]
+        dev_directas = df_tot[df_tot['es_devolucion']]
         if vendedor != 'Todos':
             dev_directas = dev_directas[
                 dev_directas['transferencista'].notna() &
@@ -598,13 +966,11 @@ class UnifiedVentasAnalyzer:
         """
         Get sales evolution by month with net sales (sales minus returns).
         """
-        df = self.filter_ventas_data(vendedor, 'Todos')
+        view = self.get_filtered_view(vendedor, 'Todos')
 
         # Separar ventas reales y devoluciones
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-        devoluciones = df[df['tipo'].str.contains(
-            'Devolución|Devolucion', case=False, na=False)]
+        ventas_reales = view.ventas_reales
+        devoluciones = view.devoluciones
 
         if ventas_reales.empty and devoluciones.empty:
             return pd.DataFrame()
@@ -670,12 +1036,9 @@ class UnifiedVentasAnalyzer:
         df = self.filter_transferencias_data(transferencista, mes)
 
         # Filter only sales (exclude credit notes, returns, etc.)
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-        devoluciones = df[df['tipo'].str.contains(
-            'Devolución|Devolucion', case=False, na=False)]
-        notas_credito = df[df['tipo'].str.contains(
-            'Nota.*crédito|Nota.*credito', case=False, na=False)]
+        ventas_reales = df[df['es_remision']]
+        devoluciones = df[df['es_devolucion']]
+        notas_credito = df[df['es_nota_credito']]
 
         total_transferencias = ventas_reales['valor_neto'].sum()
         total_devoluciones = abs(devoluciones['valor_neto'].sum())
@@ -701,8 +1064,7 @@ class UnifiedVentasAnalyzer:
         """
         df = self.filter_transferencias_data(transferencista, 'Todos')
 
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        ventas_reales = df[df['es_remision']]
 
         if ventas_reales.empty:
             return pd.DataFrame()
@@ -714,6 +1076,21 @@ class UnifiedVentasAnalyzer:
 
         return resultado.sort_values('mes_nombre')
 
+    def _get_calendario(self, mode: str) -> CalendarioVentas:
+        """
+        Shared daily / day-of-week aggregates of a mode, built once per data
+        version.
+        """
+        def build():
+            source = self.df_ventas if mode == "vendedor" else self.df_transferencias
+
+            return CalendarioVentas(
+                source[source['es_remision']],
+                'vendedor' if mode == "vendedor" else 'transferencista'
+            )
+
+        return self.get_versioned(f"calendario_{mode}", build)
+
     def get_ventas_por_dia_semana(self, person='Todos', mes='Todos', person_type='vendedor'):
         """
         Get sales distribution by day of week.
@@ -724,43 +1101,14 @@ class UnifiedVentasAnalyzer:
             person_type: 'vendedor' or 'transferencista'
         """
         if person_type == 'vendedor':
-            df = self.filter_ventas_data(person, mes)
+            source = self.df_ventas
         else:
-            df = self.filter_transferencias_data(person, mes)
+            source = self.df_transferencias
 
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
-
-        if ventas_reales.empty:
+        if source.empty:
             return pd.DataFrame()
 
-        # Add day of week
-        ventas_reales = ventas_reales.copy()
-        ventas_reales['dia_semana'] = ventas_reales['fecha'].dt.day_name()
-
-        # Define order for days of week in Spanish
-        dias_orden = ['Monday', 'Tuesday', 'Wednesday',
-                      'Thursday', 'Friday', 'Saturday', 'Sunday']
-        dias_espanol = ['Lunes', 'Martes', 'Miércoles',
-                        'Jueves', 'Viernes', 'Sábado', 'Domingo']
-
-        # Map English to Spanish
-        dia_map = dict(zip(dias_orden, dias_espanol))
-        ventas_reales['dia_semana_es'] = ventas_reales['dia_semana'].map(
-            dia_map)
-
-        resultado = ventas_reales.groupby('dia_semana_es').agg({
-            'valor_neto': 'sum',
-            'documento_id': 'count'
-        }).reset_index()
-
-        # Reorder by day of week
-        resultado['dia_semana_es'] = pd.Categorical(
-            resultado['dia_semana_es'],
-            categories=dias_espanol,
-            ordered=True
-        )
-        return resultado.sort_values('dia_semana_es')
+        return self._get_calendario(person_type).por_dia_semana(person, mes)
 
     def load_convenios_from_firebase(self, force_reload: bool = False) -> pd.DataFrame:
         """
@@ -797,6 +1145,149 @@ class UnifiedVentasAnalyzer:
             self._df_convenios = pd.DataFrame()
             return pd.DataFrame()
 
+    def _build_convenios_por_nit(self, ventas_reales: pd.DataFrame, persona_col: str,
+                                 df_convenios: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-NIT remisiones aggregates joined with convenios, with the
+        compliance columns that do not depend on the current date.
+        """
+        if ventas_reales.empty:
+            return pd.DataFrame()
+
+        # Group sales by NIT (descuento en valor absoluto antes de agrupar)
+        ventas_por_nit = ventas_reales.assign(
+            descuento=ventas_reales['descuento'].abs()
+        ).groupby('nit').agg(
+            valor_bruto=('valor_bruto', 'sum'),
+            descuento=('descuento', 'sum'),
+            cliente_completo=('cliente_completo', 'first'),
+            documento_id=('documento_id', 'count'),
+            **{persona_col: (persona_col, 'first')}
+        ).reset_index()
+
+        # Calculate net value (valor_bruto - descuento) for target comparison
+        ventas_por_nit['valor_neto'] = ventas_por_nit['valor_bruto'] - \
+            ventas_por_nit['descuento']
+
+        # Calculate actual discount percentage (still using valor_bruto as denominator)
+        ventas_por_nit['descuento_real_pct'] = (
+            ventas_por_nit['descuento'] / ventas_por_nit['valor_bruto'] * 100
+        ).round(2)
+
+        # Merge with convenios using correct field names
+        resultado = pd.merge(
+            ventas_por_nit,
+            df_convenios[['nit', 'client_name', 'razon', 'seller_name',
+                          'rebate_pct', 'target_value', 'observations']],
+            on='nit',
+            how='inner'
+        )
+
+        if resultado.empty:
+            return pd.DataFrame()
+
+        # Calculate compliance
+        resultado['cumplimiento_descuento'] = (
+            resultado['descuento_real_pct'] <= resultado['rebate_pct']
+        )
+        resultado['diferencia_descuento'] = (
+            resultado['descuento_real_pct'] - resultado['rebate_pct']
+        ).round(2)
+
+        # Calculate target compliance using valor_neto
+        resultado['cumplimiento_meta'] = (
+            resultado['valor_neto'] >= resultado['target_value']
+        )
+        resultado['diferencia_meta'] = (
+            resultado['valor_neto'] - resultado['target_value']
+        )
+
+        # Calculate progress percentage towards target using valor_neto
+        resultado['progreso_meta_pct'] = (
+            resultado['valor_neto'] / resultado['target_value'] * 100
+        ).round(1)
+
+        return resultado
+
+    def get_analisis_convenios(self, mode: str, persona: str = 'Todos', mes: str = 'Todos') -> pd.DataFrame:
+        """
+        Compliance with agreements (convenios) per NIT.
+
+        The per-NIT aggregation and the convenios join are kept per
+        (mode, persona, mes) until the sales or the convenios are reloaded,
+        so re-sorting the table never re-aggregates; only the expected-sales
+        columns (day of year) are added on each call.
+
+        Args:
+            mode (str): 'vendedor' or 'transferencista'.
+            persona (str): Salesperson / transfer agent or 'Todos'.
+            mes (str): Month 'YYYY-MM' or 'Todos'.
+
+        Returns:
+            pd.DataFrame: Private copy, safe to modify.
+        """
+        df_convenios = self.load_convenios_from_firebase()
+
+        if df_convenios.empty:
+            return pd.DataFrame()
+
+        source = self.df_ventas if mode == "vendedor" else self.df_transferencias
+        key = (mode, persona, mes)
+
+        with self._views_lock:
+            cached = self._convenios_por_nit.get(key)
+
+        if cached is not None and cached[0] is source and cached[1] is df_convenios:
+            resultado = cached[2]
+        else:
+            if mode == "vendedor":
+                ventas_reales = self.get_filtered_view(persona, mes).ventas_reales
+                persona_col = 'vendedor'
+            else:
+                df = self.df_transferencias
+
+                if not df.empty:
+                    mask = df['es_remision']
+
+                    if persona != 'Todos':
+                        mask = mask & (df['transferencista'] == persona)
+
+                    if mes != 'Todos':
+                        mask = mask & (df['mes_nombre'] == mes)
+
+                    df = df[mask]
+
+                ventas_reales = df
+                persona_col = 'transferencista'
+
+            resultado = self._build_convenios_por_nit(
+                ventas_reales, persona_col, df_convenios)
+
+            with self._views_lock:
+                self._convenios_por_nit[key] = (source, df_convenios, resultado)
+                self._convenios_por_nit.move_to_end(key)
+
+                if len(self._convenios_por_nit) > self.MAX_FILTERED_VIEWS:
+                    self._convenios_por_nit.popitem(last=False)
+
+        if resultado.empty:
+            return pd.DataFrame()
+
+        resultado = resultado.copy()
+
+        # Calculate expected sales based on days elapsed in the year
+        today = datetime.now()
+        days_elapsed = today.timetuple().tm_yday  # Day of year (1-365/366)
+        days_in_year = 366 if today.year % 4 == 0 else 365  # Check for leap year
+
+        resultado['dias_transcurridos'] = days_elapsed
+        resultado['ventas_esperadas'] = (
+            resultado['target_value'] / days_in_year * days_elapsed).round(0)
+        resultado['progreso_esperado_pct'] = \
+            round(days_elapsed / days_in_year * 100, 2)
+
+        return resultado
+
     def process_convenios_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Process convenios data with correct field names.
@@ -840,6 +1331,7 @@ class UnifiedVentasAnalyzer:
         self._df_recibos = pd.DataFrame()
         self._df_num_clientes = pd.DataFrame()
         self._df_clientes = pd.DataFrame()
+        self._bump_data_version()
 
         self.vendedores_list = ['Todos']
         self.transferencistas_list = ['Todos']
@@ -859,11 +1351,14 @@ class UnifiedVentasAnalyzer:
             {
                 'ventas_totales': {
                     'records': len(self.df_ventas_totales),
+                    'window_start': self.get_window_start(),
                     'last_update': self._last_update.isoformat() if self._last_update else None
                 },
                 'ventas': {
                     'records': len(self.df_ventas),
-                    'vendedores': len(self.vendedores_list) - 1
+                    'vendedores': len(self.vendedores_list) - 1,
+                    'data_version': self._data_version,
+                    'filtered_views': len(self._views)
                 },
                 'transferencias': {
                     'records': len(self.df_transferencias),
@@ -904,58 +1399,19 @@ class UnifiedVentasAnalyzer:
         Pivot table: vendedores (rows) × dates (cols), value = unique clients impacted.
         Returns (pivot_df, dates_sorted, vendedores_sorted).
         """
-        df = self.df_ventas.copy()
-
-        if df.empty:
-            return pd.DataFrame(), [], []
-
-        if mes != 'Todos':
-            df = df[df['mes_nombre'] == mes]
-
-        ventas_reales = df[df['tipo'].str.contains('Remision', case=False, na=False)]
-
-        if ventas_reales.empty:
+        if self.df_ventas.empty:
             return pd.DataFrame(), [], []
 
-        ventas_reales = ventas_reales.copy()
-        ventas_reales['fecha_str'] = ventas_reales['fecha'].dt.strftime('%Y-%m-%d')
-
-        grouped = ventas_reales.groupby(['vendedor', 'fecha_str']).agg(
-            clientes=('cliente_completo', 'nunique')
-        ).reset_index()
-
-        pivot = grouped.pivot(index='vendedor', columns='fecha_str', values='clientes').fillna(0)
-
-        # Sort vendedores by total descending (most active on top)
-        pivot['_total'] = pivot.sum(axis=1)
-        pivot = pivot.sort_values('_total', ascending=True).drop(columns='_total')
-
-        dates = sorted(pivot.columns.tolist())
-        pivot = pivot[dates]
-        vendedores = pivot.index.tolist()
-
-        return pivot, dates, vendedores
+        return self._get_calendario("vendedor").impactos_heatmap(mes)
 
     def get_impactos_por_dia(self, vendedor='Todos', mes='Todos'):
         """
         Get number of unique clients impacted per day (bar chart data).
         """
-        df = self.filter_ventas_data(vendedor, mes)
-        ventas_reales = df[df['tipo'].str.contains('Remision', case=False, na=False)]
-
-        if ventas_reales.empty:
+        if self.df_ventas.empty:
             return pd.DataFrame()
 
-        ventas_reales = ventas_reales.copy()
-        ventas_reales['fecha_str'] = ventas_reales['fecha'].dt.strftime('%Y-%m-%d')
-
-        resultado = ventas_reales.groupby('fecha_str').agg(
-            clientes_impactados=('cliente_completo', 'nunique'),
-            valor_neto=('valor_neto', 'sum'),
-            num_facturas=('documento_id', 'count')
-        ).reset_index()
-
-        return resultado.sort_values('fecha_str')
+        return self._get_calendario("vendedor").impactos_por_dia(vendedor, mes)
 
     def get_devoluciones(self, vendedor='Todos', mes='Todos'):
         """
@@ -967,7 +1423,7 @@ class UnifiedVentasAnalyzer:
         if df.empty:
             return pd.DataFrame(), pd.DataFrame()
 
-        devoluciones = df[df['tipo'].str.contains('Devolución|Devolucion', case=False, na=False)]
+        devoluciones = df[df['es_devolucion']]
 
         if mes != 'Todos':
             devoluciones = devoluciones[devoluciones['mes_nombre'] == mes]
@@ -1018,7 +1474,7 @@ class UnifiedVentasAnalyzer:
         if df.empty:
             return pd.DataFrame()
 
-        devoluciones = df[df['tipo'].str.contains('Devolución|Devolucion', case=False, na=False)]
+        devoluciones = df[df['es_devolucion']]
 
         if mes != 'Todos':
             devoluciones = devoluciones[devoluciones['mes_nombre'] == mes]
@@ -1090,8 +1546,7 @@ class UnifiedVentasAnalyzer:
         Usado en el Funnel chart de composición de ventas (vista vendedor).
         Retorna DataFrame con columnas: transferencista, valor_neto, num_facturas, num_clientes.
         """
-        df = self.filter_ventas_data(vendedor, mes)
-        ventas = df[df['tipo'].str.contains('Remision', case=False, na=False)].copy()
+        ventas = self.get_filtered_view(vendedor, mes).ventas_reales.copy()
 
         if ventas.empty:
             return pd.DataFrame()
@@ -1155,8 +1610,7 @@ class UnifiedVentasAnalyzer:
                 return pd.DataFrame()
 
             # Ventas del período
-            df = self.filter_ventas_data(vendedor, mes)
-            ventas = df[df['tipo'].str.contains('Remision', case=False, na=False)].copy()
+            ventas = self.get_filtered_view(vendedor, mes).ventas_reales.copy()
 
             # Contar facturas por cliente id1
             if not ventas.empty:
@@ -39,6 +39,13 @@ except Exception as e:
     print(f"❌ Error importando páginas: {e}")
     traceback.print_exc()
 
+# Serialización de las respuestas de los callbacks con orjson
+try:
+    from pages.helpers import install_json_serializer
+    install_json_serializer()
+except Exception as e:
+    print(f"⚠️ No se pudo instalar la serialización rápida: {e}")
+
 # Importar componentes de permisos
 try:
     from components.permission_modal import create_permission_denied_modal
@@ -497,6 +504,90 @@ def internal_error(error):
                              "Ha ocurrido un error interno del servidor."), 500
 
 
+@app.server.route('/metrics/db')
+def db_metrics():
+    """
+    Percentiles de latencia y tamaño por consulta a la base de datos.
+    Requiere DB_METRICS_TOKEN en el header X-Metrics-Token.
+    """
+    from flask import request, jsonify
+    from server import get_query_metrics, get_db_health
+
+    token = os.environ.get('DB_METRICS_TOKEN')
+
+    if not token or request.headers.get('X-Metrics-Token') != token:
+        return jsonify({'error': 'not found'}), 404
+
+    db = get_db_if_ready()
+
+    return jsonify({
+        'health': get_db_health(),
+        'queries': get_query_metrics().summary(),
+        'transfer': db.get_transfer_stats() if db else {}
+    })
+
+
+def get_db_if_ready():
+    """
+    Retorna la instancia de base de datos solo si ya fue creada
+    """
+    from server import database_manager
+
+    return database_manager._db_instance
+
+
+def db_trace_enabled(request):
+    """
+    Traza activa con DB_TRACE=1, o con el header X-DB-Trace solo si lleva
+    el mismo DB_METRICS_TOKEN que protege /metrics/db
+    """
+    if os.environ.get('DB_TRACE') == '1':
+        return True
+
+    token = os.environ.get('DB_METRICS_TOKEN')
+
+    return bool(token) and request.headers.get('X-DB-Trace') == token
+
+
+@app.server.before_request
+def start_db_trace():
+    """
+    Iniciar traza de consultas por request (ver db_trace_enabled)
+    """
+    from flask import request
+    from server import get_query_metrics
+
+    if db_trace_enabled(request):
+        get_query_metrics().start_trace()
+
+
+@app.server.after_request
+def end_db_trace(response):
+    """
+    Adjuntar la traza de consultas como header Server-Timing
+    """
+    from flask import request
+    from server import get_query_metrics
+
+    if db_trace_enabled(request):
+        trace = get_query_metrics().end_trace()
+
+        if trace:
+            total_ms = sum(entry['latency_ms'] for entry in trace)
+            total_bytes = sum(entry['bytes'] for entry in trace)
+
+            response.headers['Server-Timing'] = (
+                f'db;dur={total_ms:.1f};desc="{len(trace)} consultas, {total_bytes} bytes"'
+            )
+
+            for entry in trace:
+                print(f"🔎 DB {entry['method']}({entry['target']}) "
+                      f"{entry['latency_ms']:.0f} ms, {entry['bytes']} bytes, "
+                      f"{entry['records']} registros <- {entry['caller']}")
+
+    return response
+
+
 if __name__ == '__main__':
     try:
         app.run(host='0.0.0.0', debug=False)
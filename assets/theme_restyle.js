@@ -0,0 +1,81 @@
+// Cambio de tema en el navegador: aplica los colores de la paleta del tema
+// nuevo a las figuras ya renderizadas según el papel de cada propiedad
+// (fondo, rejilla, línea, texto). Misma lógica que restyle_figure en
+// pages/helpers/theme_restyle.py.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    theme: {
+        restyleFigures: function(theme, config, figures) {
+            const maps = config.maps[theme === 'dark' ? 'dark' : 'light'];
+            const noUpdate = window.dash_clientside.no_update;
+
+            const roleOf = function(key, parent) {
+                if (key === 'color') {
+                    if (parent && parent.slice(-4) === 'font') {
+                        return 'texto';
+                    }
+                    return parent === 'line' ? 'contorno' : null;
+                }
+                return Object.prototype.hasOwnProperty.call(config.roles, key) ?
+                    config.roles[key] : null;
+            };
+
+            // Copia de la figura con los colores del tema; null si no cambia
+            const restyle = function(figure) {
+                let changed = false;
+
+                const walk = function(node, parent) {
+                    if (Array.isArray(node)) {
+                        return node.map(function(item) {
+                            return item && typeof item === 'object' ? walk(item, parent) : item;
+                        });
+                    }
+
+                    const copy = {};
+
+                    Object.keys(node).forEach(function(key) {
+                        const value = node[key];
+                        const role = typeof value === 'string' ? roleOf(key, parent) : null;
+
+                        if (role && Object.prototype.hasOwnProperty.call(maps[role], value)) {
+                            copy[key] = maps[role][value];
+                            changed = true;
+                        } else if (value && typeof value === 'object') {
+                            copy[key] = walk(value, key);
+                        } else {
+                            copy[key] = value;
+                        }
+                    });
+
+                    return copy;
+                };
+
+                if (!figure || typeof figure !== 'object') {
+                    return null;
+                }
+
+                const result = walk(figure, null);
+
+                return changed ? result : null;
+            };
+
+            return figures.map(function(figure) {
+                // Gráficos dentro de contenido HTML (id con patrón, lista)
+                if (Array.isArray(figure)) {
+                    const restyled = figure.map(restyle);
+
+                    if (restyled.every(function(item) { return item === null; })) {
+                        return noUpdate;
+                    }
+
+                    return restyled.map(function(item, i) {
+                        return item === null ? figure[i] : item;
+                    });
+                }
+
+                const restyled = restyle(figure);
+
+                return restyled === null ? noUpdate : restyled;
+            });
+        }
+    }
+});
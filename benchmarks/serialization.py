@@ -0,0 +1,130 @@
+"""
+Benchmark de serialización de respuestas de callbacks.
+
+Compara el tamaño (bytes) y el tiempo de codificación de las salidas más
+grandes del dashboard con el serializador json estándar de plotly (antes) y
+con serialization.to_json + compact_figure (después), usando datos
+sintéticos de tamaño similar al de producción.
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.serialization [--repeat 20]
+"""
+import time
+import argparse
+import statistics
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import plotly.graph_objects as go
+from dash import html
+from plotly.io.json import to_json_plotly
+
+from pages.helpers.serialization import compact_figure, to_json, orjson
+
+
+def build_treemap(n_clientes=4000, seed=0):
+    """
+    Treemap de días sin venta (un nodo por cliente con customdata).
+    """
+    rng = np.random.default_rng(seed)
+    dias = rng.integers(1, 720, n_clientes)
+    ventas = rng.gamma(2.0, 3_500_000.0, n_clientes)
+    labels = [f"Cliente {i} – Droguería {i % 97}" for i in range(n_clientes)]
+
+    return go.Figure(go.Treemap(
+        ids=[f"c{i}" for i in range(n_clientes)],
+        labels=labels,
+        values=dias,
+        parents=[""] * n_clientes,
+        customdata=[[labels[i], f"{dias[i]} días", f"${ventas[i]:,.0f}", "2025-03-01"]
+                    for i in range(n_clientes)],
+        marker=dict(colors=dias / dias.max()),
+        branchvalues="remainder",
+    ))
+
+
+def build_heatmap(n_vendedores=40, n_dias=365, seed=1):
+    """
+    Heatmap vendedores × días (clientes impactados).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-01-01', periods=n_dias).strftime('%Y-%m-%d')
+
+    return go.Figure(go.Heatmap(
+        z=rng.random((n_vendedores, n_dias)) * 30,
+        x=list(dates),
+        y=[f"Vendedor {i}" for i in range(n_vendedores)],
+        colorscale='Blues',
+    ))
+
+
+def build_table(n_rows=2500, seed=2):
+    """
+    Tabla de documentos de cartera construida con componentes html.
+    """
+    rng = np.random.default_rng(seed)
+    saldos = rng.gamma(2.0, 800_000.0, n_rows)
+
+    return html.Table([
+        html.Tr([
+            html.Td(f"Cliente {i}"),
+            html.Td(f"FV-{100000 + i}"),
+            html.Td("2025-05-12"),
+            html.Td(f"${saldos[i]:,.0f}"),
+            html.Td(int(rng.integers(-30, 180))),
+        ], style={'backgroundColor': '#f9fafb' if i % 2 else 'white'})
+        for i in range(n_rows)
+    ])
+
+
+def _measure(encode, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = encode()
+        timings.append(time.perf_counter() - start)
+
+    return len(payload.encode('utf-8')), statistics.median(timings) * 1000
+
+
+def run(repeat=20):
+    if orjson is None:
+        print("⚠️ orjson no está instalado: el resultado 'después' usará json")
+
+    cases = \
+        {
+            'treemap días sin venta': (build_treemap(), True),
+            'heatmap vendedores × día': (build_heatmap(), True),
+            'tabla documentos cartera': (build_table(), False),
+        }
+
+    print(f"{'salida':<28}{'bytes antes':>14}{'bytes después':>15}"
+          f"{'ms antes':>11}{'ms después':>12}{'x':>7}")
+
+    # Antes: motor json de plotly (el de Dash sin orjson instalado)
+    pio.json.config.default_engine = 'json'
+
+    for name, (obj, is_figure) in cases.items():
+        bytes_before, ms_before = _measure(lambda: to_json_plotly(obj), repeat)
+
+        if is_figure:
+            def encode():
+                return to_json(compact_figure(obj))
+        else:
+            def encode():
+                return to_json(obj)
+
+        bytes_after, ms_after = _measure(encode, repeat)
+
+        print(f"{name:<28}{bytes_before:>14,}{bytes_after:>15,}"
+              f"{ms_before:>11.1f}{ms_after:>12.1f}{ms_before / ms_after:>7.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+
+    run(parser.parse_args().repeat)
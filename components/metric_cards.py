@@ -7,13 +7,15 @@ Basado en el diseño de facturas_proveedores.py
 from dash import html
 from typing import List, Dict, Optional
 
+from utils import theme_color
+
 
 def create_metric_card(
     title: str,
     value: str,
     icon: str = "",
     color: str = "#3b82f6",
-    is_dark: bool = False,
+    is_dark: Optional[bool] = False,
     subtitle: str = None,
     trend_indicator: str = None,
     card_id: str = None
@@ -26,7 +28,8 @@ def create_metric_card(
         value: Valor de la métrica (ej: "1,234" o "$50,000")
         icon: Emoji o símbolo para mostrar (ej: "📄", "💰")
         color: Color del borde superior y accent (hex)
-        is_dark: Si está en modo oscuro
+        is_dark: Si está en modo oscuro (None: colores que siguen el tema
+                 de la página, sin regenerar la card al cambiarlo)
         subtitle: Texto adicional debajo del valor
         trend_indicator: Indicador de tendencia (ej: "↗️ +5%")
         card_id: ID único para la card (opcional)
@@ -36,7 +39,20 @@ def create_metric_card(
     """
     
     # Estilos según tema
-    if is_dark:
+    if is_dark is None:
+        theme_styles = {
+            'card_bg': 'linear-gradient(135deg, '
+                       f"{theme_color('rgba(255, 255, 255, 0.95)', 'rgba(30, 41, 59, 0.8)')}, "
+                       f"{theme_color('rgba(255, 255, 255, 0.8)', 'rgba(51, 65, 85, 0.6)')})",
+            'text_primary': theme_color('#1e293b', '#f8fafc'),
+            'text_secondary': theme_color('#374151', '#e2e8f0'),
+            'text_muted': theme_color('#6b7280', '#94a3b8'),
+            'shadow': f"0 8px 32px {theme_color('rgba(0, 0, 0, 0.1)', 'rgba(0, 0, 0, 0.3)')}",
+            'border': theme_color('rgba(59, 130, 246, 0.2)', 'rgba(148, 163, 184, 0.2)'),
+            'backdrop_filter': 'blur(15px)',
+            'text_shadow': f"0 2px 4px {theme_color('transparent', 'rgba(0, 0, 0, 0.3)')}"
+        }
+    elif is_dark:
         theme_styles = {
             'card_bg': 'linear-gradient(135deg, rgba(30, 41, 59, 0.8), rgba(51, 65, 85, 0.6))',
             'text_primary': '#f8fafc',
@@ -44,7 +60,8 @@ def create_metric_card(
             'text_muted': '#94a3b8',
             'shadow': '0 8px 32px rgba(0, 0, 0, 0.3)',
             'border': 'rgba(148, 163, 184, 0.2)',
-            'backdrop_filter': 'blur(15px)'
+            'backdrop_filter': 'blur(15px)',
+            'text_shadow': '0 2px 4px rgba(0, 0, 0, 0.3)'
         }
     else:
         theme_styles = {
@@ -54,7 +71,8 @@ def create_metric_card(
             'text_muted': '#6b7280',
             'shadow': '0 8px 32px rgba(0, 0, 0, 0.1)',
             'border': 'rgba(59, 130, 246, 0.2)',
-            'backdrop_filter': 'blur(15px)'
+            'backdrop_filter': 'blur(15px)',
+            'text_shadow': 'none'
         }
     
     # Contenido de la card
@@ -76,7 +94,7 @@ def create_metric_card(
             'fontWeight': '800',
             'color': theme_styles['text_primary'],
             'margin': '0 0 8px 0',
-            'textShadow': '0 2px 4px rgba(0, 0, 0, 0.3)' if is_dark else 'none',
+            'textShadow': theme_styles['text_shadow'],
             'fontFamily': 'Inter, sans-serif'
         }),
         
@@ -153,7 +171,7 @@ def create_metric_card(
 
 def create_metrics_grid(
     metrics: List[Dict],
-    is_dark: bool = False,
+    is_dark: Optional[bool] = False,
     columns: int = None,
     gap: str = "20px"
 ):
@@ -163,7 +181,7 @@ def create_metrics_grid(
     Args:
         metrics: Lista de diccionarios con datos de métricas
                  Cada dict debe tener: title, value, y opcionalmente: icon, color, subtitle, trend_indicator, card_id
-        is_dark: Si está en modo oscuro
+        is_dark: Si está en modo oscuro (None: sigue el tema de la página)
         columns: Número de columnas (auto-fit si None)
         gap: Espacio entre cards
     
@@ -225,12 +243,12 @@ def create_metrics_grid(
     )
 
 
-def create_empty_metrics(is_dark: bool = False, count: int = 4):
+def create_empty_metrics(is_dark: Optional[bool] = False, count: int = 4):
     """
     Crear métricas vacías/placeholder
     
     Args:
-        is_dark: Si está en modo oscuro
+        is_dark: Si está en modo oscuro (None: sigue el tema de la página)
         count: Número de cards vacías a crear
     
     Returns:
@@ -12,8 +12,11 @@ from components import (
     create_empty_metrics,
     METRIC_COLORS,
 )
+from .helpers import cached_figure, compact_figure, register_theme_restyle
 from analyzers import CarteraAnalyzer
 from utils import (
+    AUTO_THEME,
+    theme_color,
     format_currency_int,
     get_theme_styles,
     get_dropdown_style
@@ -400,6 +403,13 @@ def get_dropdown_style(theme):
         }
 
 
+def figure_version():
+    """
+    Versión de datos de la caché de figuras.
+    """
+    return analyzer.data_version
+
+
 def get_selected_vendor(session_data, dropdown_value):
     """
     Obtener vendedor basado en permisos y selección.
@@ -549,16 +559,14 @@ def update_button_state(data_store):
     Output('cartera-metrics-cards', 'children'),
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
-     Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data')]
+     Input('cartera-data-store', 'data')]
 )
-def update_metric_cards(session_data, dropdown_value, data_store, theme):
+def update_metric_cards(session_data, dropdown_value, data_store):
     """
     Actualizar las metric cards con los datos de cartera
     """
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        is_dark = theme == 'dark'
 
         # Obtener resumen de datos
         resumen = analyzer.get_resumen(vendedor)
@@ -619,10 +627,10 @@ def update_metric_cards(session_data, dropdown_value, data_store, theme):
             }
         ]
 
-        # Crear grid de métricas con 4 columnas
+        # Crear grid de métricas con 4 columnas (colores según el tema de la página)
         return create_metrics_grid(
             metrics=metrics_data,
-            is_dark=is_dark,
+            is_dark=None,
             columns=4,
             gap="20px"
         )
@@ -630,7 +638,7 @@ def update_metric_cards(session_data, dropdown_value, data_store, theme):
     except Exception as e:
         print(f"❌ Error actualizando metric cards de cartera: {e}")
         # Retornar cards vacías en caso de error
-        return create_empty_metrics(is_dark=theme == 'dark', count=8)
+        return create_empty_metrics(is_dark=None, count=8)
 
 
 @callback(
@@ -764,7 +772,8 @@ def toggle_theme(n_clicks, current_theme):
                 'width': '100%', 'minHeight': '100vh',
                 'fontFamily': 'Inter, -apple-system, BlinkMacSystemFont, sans-serif',
                 'background': 'linear-gradient(135deg, #f9fafb 0%, #eff6ff 100%)',
-                'color': '#111827', 'transition': 'all 0.3s ease', 'padding': '20px 0'
+                'color': '#111827', 'transition': 'all 0.3s ease', 'padding': '20px 0',
+                'colorScheme': 'light'
             }
         )
 
@@ -781,7 +790,8 @@ def toggle_theme(n_clicks, current_theme):
                 'width': '100%', 'minHeight': '100vh',
                 'fontFamily': 'Inter, -apple-system, BlinkMacSystemFont, sans-serif',
                 'background': 'linear-gradient(135deg, #0f172a 0%, #1e293b 50%, #334155 100%)',
-                'color': '#f8fafc', 'transition': 'all 0.3s ease', 'padding': '20px 0'
+                'color': '#f8fafc', 'transition': 'all 0.3s ease', 'padding': '20px 0',
+                'colorScheme': 'dark'
             }
         )
     else:
@@ -793,7 +803,8 @@ def toggle_theme(n_clicks, current_theme):
                 'width': '100%', 'minHeight': '100vh',
                 'fontFamily': 'Inter, -apple-system, BlinkMacSystemFont, sans-serif',
                 'background': 'linear-gradient(135deg, #f9fafb 0%, #eff6ff 100%)',
-                'color': '#111827', 'transition': 'all 0.3s ease', 'padding': '20px 0'
+                'color': '#111827', 'transition': 'all 0.3s ease', 'padding': '20px 0',
+                'colorScheme': 'light'
             }
         )
 
@@ -996,10 +1007,9 @@ def update_cliente_dropdown_options(session_data, dropdown_value, data_store):
     [Input('cartera-dropdown-cliente', 'value'),
      Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
-     Input('cartera-theme-store', 'data'),
      Input('cartera-filtros-tabla-store', 'data')]
 )
-def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_value, theme, filtros):
+def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_value, filtros):
     """
     Update client detail table with unified current and overdue portfolio.
     MODIFICADO para manejar la vista "Todos" con columna de cliente.
@@ -1012,7 +1022,7 @@ def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_va
             ])
 
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
 
         # Determinar si mostrar columna de cliente
         mostrar_cliente = (cliente_seleccionado == "Todos")
@@ -1043,7 +1053,6 @@ def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_va
                     crear_tabla_unificada(
                         detalle['documentos'],
                         theme_styles,
-                        theme,
                         filtros,
                         mostrar_cliente=True  # ← AQUÍ está la clave
                     )
@@ -1082,7 +1091,6 @@ def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_va
                     crear_tabla_unificada(
                         detalle['documentos'],
                         theme_styles,
-                        theme,
                         filtros,
                         mostrar_cliente=False  # ← NO mostrar cliente para un cliente específico
                     )
@@ -1103,14 +1111,13 @@ def update_cliente_detalle_table(cliente_seleccionado, session_data, dropdown_va
         ])
 
 
-def crear_tabla_unificada(df, theme_styles, theme, filtros=None, mostrar_cliente=False):
+def crear_tabla_unificada(df, theme_styles, filtros=None, mostrar_cliente=False):
     """
     Create a unified table for both overdue and current documents with filtering.
 
     Args:
         df: DataFrame con los documentos
-        theme_styles: Estilos del tema
-        theme: Tema actual ('light' o 'dark')
+        theme_styles: Estilos del tema (AUTO_THEME)
         filtros: Filtros aplicados
         mostrar_cliente: Si True, muestra columna de cliente
     """
@@ -1218,36 +1225,40 @@ def crear_tabla_unificada(df, theme_styles, theme, filtros=None, mostrar_cliente
             estado_text = 'VENCE HOY'
             estado_bg = '#FF8C42'
 
-            if theme == 'dark':
-                row_bg = '#4a3520' if i % 2 == 0 else '#5a4028'  # Dark orange
+            # Naranja
+            if i % 2 == 0:
+                row_bg = theme_color('#fff3e0', '#4a3520')
             else:
-                row_bg = '#fff3e0' if i % 2 == 0 else '#ffe0b2'  # Light orange
+                row_bg = theme_color('#ffe0b2', '#5a4028')
 
         elif dias_vencidos is not None and dias_vencidos > 0:
             estado_text = 'VENCIDA'
             estado_bg = '#e74c3c'
 
-            if theme == 'dark':
-                row_bg = '#4a2d2d' if i % 2 == 0 else '#5a3535'  # Dark red
+            # Rojo
+            if i % 2 == 0:
+                row_bg = theme_color('#f8e8e8', '#4a2d2d')
             else:
-                row_bg = '#f8e8e8' if i % 2 == 0 else '#f5c6cb'  # Light red
+                row_bg = theme_color('#f5c6cb', '#5a3535')
 
         elif dias_vencidos is not None and dias_vencidos == -1:
             estado_text = 'PRÓXIMO A VENCER'
             estado_bg = '#FFB74D'
 
-            if theme == 'dark':
-                row_bg = '#4a3520' if i % 2 == 0 else '#5a4028'  # Dark orange
+            # Naranja
+            if i % 2 == 0:
+                row_bg = theme_color('#fff3e0', '#4a3520')
             else:
-                row_bg = '#fff3e0' if i % 2 == 0 else '#ffe0b2'  # Light orange
+                row_bg = theme_color('#ffe0b2', '#5a4028')
         else:
             estado_text = 'SIN VENCER'
             estado_bg = '#27ae60'
 
-            if theme == 'dark':
-                row_bg = '#2d4a35' if i % 2 == 0 else '#35553d'  # Dark green
+            # Verde
+            if i % 2 == 0:
+                row_bg = theme_color('#e8f5e8', '#2d4a35')
             else:
-                row_bg = '#e8f5e8' if i % 2 == 0 else '#d4edda'  # Light green
+                row_bg = theme_color('#d4edda', '#35553d')
 
         cell_style = cell_style_base.copy()
         cell_style['backgroundColor'] = row_bg
@@ -1527,7 +1538,14 @@ def update_cards(session_data, dropdown_value, data_store):
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
      Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data')]
+     State('cartera-theme-store', 'data')]
+)
+@cached_figure(
+    'cartera-grafico-rangos',
+    key=lambda session_data, dropdown_value, n_clicks, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, n_clicks, theme: theme,
+    version=figure_version
 )
 def update_rangos(session_data, dropdown_value, n_clicks, theme):
     """
@@ -1637,7 +1655,14 @@ def update_rangos(session_data, dropdown_value, n_clicks, theme):
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
      Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data')]
+     State('cartera-theme-store', 'data')]
+)
+@cached_figure(
+    'cartera-grafico-forma-pago',
+    key=lambda session_data, dropdown_value, n_clicks, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, n_clicks, theme: theme,
+    version=figure_version
 )
 def update_forma_pago(session_data, dropdown_value, n_clicks, theme):
     """
@@ -1736,7 +1761,14 @@ def update_forma_pago(session_data, dropdown_value, n_clicks, theme):
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
      Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data')]
+     State('cartera-theme-store', 'data')]
+)
+@cached_figure(
+    'cartera-top-unificado',
+    key=lambda session_data, dropdown_value, n_clicks, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, n_clicks, theme: theme,
+    version=figure_version
 )
 def update_top_unificado(session_data, dropdown_value, n_clicks, theme):
     """
@@ -1844,7 +1876,7 @@ def update_top_unificado(session_data, dropdown_value, n_clicks, theme):
                 yanchor='middle',
                 font=dict(
                     size=10, color=theme_styles['text_color'], family='Inter', weight='bold'),
-                bgcolor='rgba(255, 255, 255, 0.95)' if theme == 'light' else 'rgba(0, 0, 0, 0.8)',
+                bgcolor=theme_styles['paper_color'],
                 bordercolor=theme_styles['line_color'],
                 borderwidth=1,
                 borderpad=4
@@ -1862,7 +1894,7 @@ def update_top_unificado(session_data, dropdown_value, n_clicks, theme):
                 orientation="h",
                 yanchor="bottom", y=1.02,
                 xanchor="center", x=0.5,
-                bgcolor='rgba(255, 255, 255, 0.95)' if theme == 'light' else 'rgba(0, 0, 0, 0.8)',
+                bgcolor=theme_styles['paper_color'],
                 bordercolor=theme_styles['line_color'],
                 borderwidth=1
             ),
@@ -1897,7 +1929,14 @@ def update_top_unificado(session_data, dropdown_value, n_clicks, theme):
     [Input('cartera-slider-dias', 'value'),
      Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
-     Input('cartera-theme-store', 'data')]
+     State('cartera-theme-store', 'data')]
+)
+@cached_figure(
+    'cartera-grafico-proximos-vencer',
+    key=lambda dias, session_data, dropdown_value, theme:
+        (get_selected_vendor(session_data, dropdown_value), dias),
+    theme=lambda dias, session_data, dropdown_value, theme: theme,
+    version=figure_version
 )
 def update_proximos_vencer(dias, session_data, dropdown_value, theme):
     """
@@ -2052,6 +2091,8 @@ def update_proximos_vencer(dias, session_data, dropdown_value, theme):
             )
 
         # Detailed table grouped by customer
+        table_styles = AUTO_THEME
+
         if data_documentos_table.empty:
             tabla = html.Div([
                 html.P("No hay documentos próximos a vencer en este período.",
@@ -2090,16 +2131,16 @@ def update_proximos_vencer(dias, session_data, dropdown_value, theme):
                                       style={'color': '#E74C3C', 'fontFamily': 'Inter'}),
                             html.Span(f"Fecha: {row['vencimiento'].strftime('%Y-%m-%d')}",
                                       style={'color': '#7F8C8D', 'marginLeft': '20px', 'fontFamily': 'Inter'})
-                        ], style={'padding': '8px 15px', 'backgroundColor': theme_styles['paper_color'] if theme == 'dark' else '#F8F9FA',
+                        ], style={'padding': '8px 15px', 'backgroundColor': theme_color('#F8F9FA', '#1e293b'),
                                   'margin': '2px 0', 'borderRadius': '3px', 'borderLeft': '3px solid #3498DB',
-                                  'color': theme_styles['text_color']})
+                                  'color': table_styles['text_color']})
                     ])
                 )
 
             tabla = html.Div([
                 html.Div(clientes_grupos,
-                         style={'maxHeight': '500px', 'overflowY': 'auto', 'border': f'1px solid {theme_styles["line_color"]}',
-                                'borderRadius': '5px', 'padding': '10px', 'backgroundColor': theme_styles['paper_color']})
+                         style={'maxHeight': '500px', 'overflowY': 'auto', 'border': f'1px solid {table_styles["line_color"]}',
+                                'borderRadius': '5px', 'padding': '10px', 'backgroundColor': table_styles['paper_color']})
             ])
 
         return fig, tabla
@@ -2113,9 +2154,16 @@ def update_proximos_vencer(dias, session_data, dropdown_value, theme):
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
      Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data'),
+     State('cartera-theme-store', 'data'),
      Input('cartera-filtro-porcentaje-vencida', 'value')]
 )
+@cached_figure(
+    'cartera-treemap-unificado',
+    key=lambda session_data, dropdown_value, n_clicks, theme, filtro_porcentaje:
+        (get_selected_vendor(session_data, dropdown_value), filtro_porcentaje),
+    theme=lambda session_data, dropdown_value, n_clicks, theme, filtro_porcentaje: theme,
+    version=figure_version
+)
 def update_treemap_unificado(session_data, dropdown_value, n_clicks, theme, filtro_porcentaje):
     """
     Treemap elegante con gradiente verde-rojo para clientes y colores sólidos para subdivisiones
@@ -2169,7 +2217,7 @@ def update_treemap_unificado(session_data, dropdown_value, n_clicks, theme, filt
         # Crear y configurar el gráfico
         fig = create_treemap_figure(treemap_data, theme_styles, theme)
 
-        return fig
+        return compact_figure(fig)
 
     except Exception as e:
         print(f"❌ Error en treemap_unificado: {e}")
@@ -2940,7 +2988,7 @@ def update_slider_theme(theme):
     [Input('session-store', 'data'),
      Input('cartera-dropdown-vendedor', 'value'),
      Input('cartera-data-store', 'data'),
-     Input('cartera-theme-store', 'data')]
+     State('cartera-theme-store', 'data')]
 )
 def update_indicador_section(session_data, dropdown_value, data_store, theme):
     """
@@ -2948,7 +2996,7 @@ def update_indicador_section(session_data, dropdown_value, data_store, theme):
     """
     from utils import can_see_all_vendors, get_user_vendor_filter
 
-    theme_styles = get_theme_styles(theme)
+    theme_styles = AUTO_THEME
 
     # Base style for the section
     section_style = {
@@ -2976,7 +3024,7 @@ def update_indicador_section(session_data, dropdown_value, data_store, theme):
 
             # Crear tabla de indicadores
             table_content = create_indicators_table(
-                indicators, theme_styles, theme)
+                indicators, theme_styles)
             return table_content, section_style
 
         else:
@@ -2989,7 +3037,7 @@ def update_indicador_section(session_data, dropdown_value, data_store, theme):
 
             # Crear visualización del indicador individual
             vendor_content = create_vendor_indicator_view(
-                indicator_data, theme_styles, theme)
+                indicator_data, theme_styles, get_theme_styles(theme))
             return vendor_content, section_style
 
     except Exception as e:
@@ -2997,7 +3045,7 @@ def update_indicador_section(session_data, dropdown_value, data_store, theme):
         return html.Div(f"Error cargando indicadores"), section_style
 
 
-def create_indicators_table(indicators, theme_styles, theme):
+def create_indicators_table(indicators, theme_styles):
     """
     Create a table showing all vendors' indicators for admin view with percentile-based categorization
     """
@@ -3006,7 +3054,7 @@ def create_indicators_table(indicators, theme_styles, theme):
 
     # Header row
     header_style = {
-        'backgroundColor': '#2c3e50' if theme == 'light' else '#1a1a1a',
+        'backgroundColor': theme_color('#2c3e50', '#1a1a1a'),
         'color': 'white',
         'padding': '12px 8px',
         'fontWeight': 'bold',
@@ -3044,11 +3092,11 @@ def create_indicators_table(indicators, theme_styles, theme):
 
     # Color mapping for categories
     category_colors = {
-        'CRÍTICO': {'bg': '#ffebee' if theme == 'light' else '#4a2020', 'text': '#8b0000'},
-        'ALTO': {'bg': '#ffebee' if theme == 'light' else '#4a2d2d', 'text': '#e74c3c'},
-        'MEDIO': {'bg': '#fff3e0' if theme == 'light' else '#4a3520', 'text': '#f39c12'},
-        'MODERADO': {'bg': '#fffbeb' if theme == 'light' else '#3d3a28', 'text': '#f1c40f'},
-        'BAJO': {'bg': '#e8f5e9' if theme == 'light' else '#2d4a35', 'text': '#27ae60'}
+        'CRÍTICO': {'bg': theme_color('#ffebee', '#4a2020'), 'text': '#8b0000'},
+        'ALTO': {'bg': theme_color('#ffebee', '#4a2d2d'), 'text': '#e74c3c'},
+        'MEDIO': {'bg': theme_color('#fff3e0', '#4a3520'), 'text': '#f39c12'},
+        'MODERADO': {'bg': theme_color('#fffbeb', '#3d3a28'), 'text': '#f1c40f'},
+        'BAJO': {'bg': theme_color('#e8f5e9', '#2d4a35'), 'text': '#27ae60'}
     }
 
     # Statistics for summary
@@ -3280,9 +3328,11 @@ def create_indicators_table(indicators, theme_styles, theme):
     ])
 
 
-def create_vendor_indicator_view(indicator_data, theme_styles, theme):
+def create_vendor_indicator_view(indicator_data, theme_styles, figure_styles):
     """
-    Create a visual representation of vendor's indicator with breakdown
+    Create a visual representation of vendor's indicator with breakdown.
+    `theme_styles` colors the HTML (AUTO_THEME) and `figure_styles` the
+    charts (palette of the current theme).
     """
     if not indicator_data:
         return html.Div("No hay datos disponibles")
@@ -3324,11 +3374,11 @@ def create_vendor_indicator_view(indicator_data, theme_styles, theme):
         delta={'reference': 0.5, 'increasing': {
             'color': "red"}, 'decreasing': {'color': "green"}},
         gauge={
-            'axis': {'range': [None, 1], 'tickwidth': 1, 'tickcolor': theme_styles['text_color']},
+            'axis': {'range': [None, 1], 'tickwidth': 1, 'tickcolor': figure_styles['text_color']},
             'bar': {'color': risk_color},
             'bgcolor': "white",
             'borderwidth': 2,
-            'bordercolor': theme_styles['line_color'],
+            'bordercolor': figure_styles['line_color'],
             'steps': [
                 {'range': [0, 0.25], 'color': 'rgba(39, 174, 96, 0.15)'},
                 {'range': [0.25, 0.45], 'color': 'rgba(241, 196, 15, 0.15)'},
@@ -3347,7 +3397,7 @@ def create_vendor_indicator_view(indicator_data, theme_styles, theme):
     fig_gauge.update_layout(
         height=350,
         paper_bgcolor='rgba(0,0,0,0)',
-        font={'color': theme_styles['text_color'], 'family': 'Inter'},
+        font={'color': figure_styles['text_color'], 'family': 'Inter'},
         margin=dict(t=50, b=30, l=30, r=30)
     )
 
@@ -3420,7 +3470,7 @@ def create_vendor_indicator_view(indicator_data, theme_styles, theme):
         showlegend=False,
         paper_bgcolor='rgba(0,0,0,0)',
         plot_bgcolor='rgba(0,0,0,0.02)',
-        font={'color': theme_styles['text_color'],
+        font={'color': figure_styles['text_color'],
               'family': 'Inter', 'size': 11},
         margin=dict(t=50, b=60, l=60, r=30),
         yaxis=dict(range=[0, max(y_values) * 1.2]
@@ -3482,7 +3532,8 @@ def create_vendor_indicator_view(indicator_data, theme_styles, theme):
         # Charts side by side
         html.Div([
             html.Div([
-                dcc.Graph(figure=fig_gauge, style={'height': '100%'})
+                dcc.Graph(id={'type': 'cartera-themed-graph', 'index': 'indicador-riesgo'},
+                          figure=fig_gauge, style={'height': '100%'})
             ], style={
                 'width': '48%',
                 'display': 'inline-block',
@@ -3493,7 +3544,8 @@ def create_vendor_indicator_view(indicator_data, theme_styles, theme):
             }),
 
             html.Div([
-                dcc.Graph(figure=fig_components, style={'height': '100%'})
+                dcc.Graph(id={'type': 'cartera-themed-graph', 'index': 'indicador-componentes'},
+                          figure=fig_components, style={'height': '100%'})
             ], style={
                 'width': '48%',
                 'display': 'inline-block',
@@ -3613,3 +3665,15 @@ def create_metric_card(title, value, theme_styles):
         'border': f'1px solid {theme_styles["line_color"]}',
         'textAlign': 'center'
     })
+
+
+# Cambio de tema en el navegador sin volver a ejecutar los callbacks de datos
+register_theme_restyle(
+    'cartera-theme-store',
+    ['cartera-grafico-rangos',
+     'cartera-grafico-forma-pago',
+     'cartera-top-unificado',
+     'cartera-grafico-proximos-vencer',
+     'cartera-treemap-unificado'],
+    embedded_type='cartera-themed-graph'
+)
@@ -6,7 +6,7 @@ from utils import format_currency_int
 
 # Importar el procesador
 try:
-    from analyzers import FacturasProveedoresAnalyzer
+    from analyzers import FacturasProveedoresAnalyzer, get_analyzer
     print("✅ FacturasProveedoresAnalyzer importado correctamente")
 except ImportError as e:
     print(f"❌ Error importando FacturasProveedoresAnalyzer: {e}")
@@ -374,7 +374,7 @@ def toggle_theme(n_clicks, theme_data):
 def load_and_process_data(update_clicks):
     """Cargar y procesar datos desde Firebase"""
     try:
-        processor = FacturasProveedoresAnalyzer()
+        processor = get_analyzer(FacturasProveedoresAnalyzer)
         supplier_list = processor.get_suppliers_list()
         suppliers = ['Todos'] + supplier_list
         proveedor_options = [{'label': s, 'value': s} for s in suppliers]
@@ -404,7 +404,7 @@ def load_and_process_data(update_clicks):
 def update_dashboard(processed_data, selected_proveedor, start_date, end_date, theme_data):
     """Actualizar dashboard con filtros automáticos"""
     try:
-        processor = FacturasProveedoresAnalyzer()
+        processor = get_analyzer(FacturasProveedoresAnalyzer)
         is_dark = theme_data.get('is_dark', False)
         
         date_range = None
@@ -1425,7 +1425,7 @@ def update_invoice_states(n_clicks, new_state, selected_invoices, current_data):
         return current_data, {"display": "none"}
 
     try:
-        processor = FacturasProveedoresAnalyzer()
+        processor = get_analyzer(FacturasProveedoresAnalyzer)
         
         updated_count = 0
         for invoice in selected_invoices:
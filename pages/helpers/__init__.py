@@ -1 +1,6 @@
 from .analisis_general import *
+from .background import *
+from .panel_groups import *
+from .figure_cache import *
+from .serialization import *
+from .theme_restyle import *
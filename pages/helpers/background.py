@@ -0,0 +1,217 @@
+import os
+import tempfile
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+from dash import html, Input, Output, callback
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+except ImportError:
+    diskcache = None
+    DiskcacheManager = None
+
+
+# Directorio del job store en disco (compartido por los workers de gunicorn)
+JOBS_DIR = os.environ.get(
+    'DASH_JOBS_DIR',
+    os.path.join(tempfile.gettempdir(), 'emes-dashboards-jobs')
+)
+
+# Hilos de cálculo por proceso
+JOBS_WORKERS = int(os.environ.get('DASH_JOBS_WORKERS', 2))
+
+# Un trabajo sin terminar tras este tiempo (s) se considera perdido
+JOBS_TIMEOUT = int(os.environ.get('DASH_JOBS_TIMEOUT', 600))
+
+# Intervalo de consulta del navegador al job store (ms)
+JOBS_POLL_INTERVAL = int(os.environ.get('DASH_JOBS_POLL_INTERVAL', 500))
+
+PROGRESS_STYLE = {
+    'fontSize': '12px',
+    'color': '#7f8c8d',
+    'textAlign': 'center',
+    'padding': '6px 0'
+}
+
+
+class JobCancelled(BaseException):
+    """
+    Trabajo cancelado (hereda de BaseException para que los
+    `except Exception` de los callbacks no lo absorban).
+    """
+
+
+_current_job = threading.local()
+
+
+if DiskcacheManager is not None:
+    class ThreadPoolJobManager(DiskcacheManager):
+        """
+        Manager de callbacks en segundo plano que ejecuta los trabajos en un
+        pool de hilos local en lugar de un proceso por trabajo, de modo que
+        los cálculos reutilizan los analizadores y cachés ya cargados en
+        memoria. Estado, progreso y resultados se guardan en diskcache, así
+        que cualquier worker de gunicorn puede responder las consultas.
+
+        La cancelación es cooperativa: se marca en el job store y el trabajo
+        se detiene en su siguiente `set_progress`.
+        """
+
+        def __init__(self, cache, max_workers=JOBS_WORKERS, job_timeout=JOBS_TIMEOUT):
+            super().__init__(cache)
+            self.job_timeout = job_timeout
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='dash-job'
+            )
+
+        @staticmethod
+        def _job_key(job):
+            return f'job-{job}'
+
+        @staticmethod
+        def _cancel_key(job):
+            return f'job-{job}-cancel'
+
+        def call_job_fn(self, key, job_fn, args, context):
+            job = self.handle.incr('job-counter')
+            self.handle.set(self._job_key(job), 'queued',
+                            expire=self.job_timeout)
+            self._executor.submit(self._run_job, job, key, job_fn, args, context)
+
+            return job
+
+        def _run_job(self, job, key, job_fn, args, context):
+            try:
+                # Cancelado mientras esperaba en la cola
+                if self.is_cancelled(job):
+                    return
+
+                self.handle.set(self._job_key(job), 'running',
+                                expire=self.job_timeout)
+                _current_job.job = job
+
+                job_fn(key, self._make_progress_key(key), args, context)
+
+            except JobCancelled:
+                pass
+
+            finally:
+                _current_job.job = None
+                self.handle.delete(self._job_key(job))
+                self.handle.delete(self._cancel_key(job))
+
+        def is_cancelled(self, job):
+            return self.handle.get(self._cancel_key(job)) is not None
+
+        def terminate_job(self, job):
+            if not job or job == 'None':
+                return
+
+            if self.job_running(job):
+                self.handle.set(self._cancel_key(int(job)), True,
+                                expire=self.job_timeout)
+
+        def terminate_unhealthy_job(self, job):
+            return False
+
+        def job_running(self, job):
+            if not job or job == 'None':
+                return False
+
+            return self.handle.get(self._job_key(int(job))) is not None
+else:
+    ThreadPoolJobManager = None
+
+
+def _create_manager():
+    """
+    Crear el manager de callbacks en segundo plano (None si diskcache no
+    está instalado o se desactivó con DASH_BACKGROUND_CALLBACKS=0).
+    """
+    if ThreadPoolJobManager is None or os.environ.get('DASH_BACKGROUND_CALLBACKS', '1') == '0':
+        print("⚠️ Callbacks en segundo plano deshabilitados, se ejecutarán en línea")
+        return None
+
+    try:
+        return ThreadPoolJobManager(diskcache.Cache(JOBS_DIR))
+
+    except Exception as e:
+        print(f"⚠️ No se pudo crear el job store en {JOBS_DIR}: {e}")
+        return None
+
+
+background_manager = _create_manager()
+
+
+def progress_label(component_id: str) -> html.Div:
+    """
+    Etiqueta de progreso de un panel pesado (oculta mientras no hay trabajo).
+
+    Args:
+        component_id: ID del componente del panel.
+    """
+    return html.Div(
+        id=f'{component_id}-progress',
+        style={**PROGRESS_STYLE, 'display': 'none'}
+    )
+
+
+def background_callback(*args, component_id: str, cancel: List[Input] | None = None) -> Callable:
+    """
+    Registrar un callback pesado que se ejecuta en el pool de trabajos en
+    lugar de bloquear el hilo de la petición.
+
+    El navegador consulta el estado del trabajo y muestra el progreso en la
+    etiqueta `progress_label(component_id)`. Si las entradas cambian
+    mientras corre, Dash cancela el trabajo anterior; `cancel` permite
+    además cancelarlo al salir de la página.
+
+    La función decorada recibe `set_progress` como primer argumento. Sin
+    diskcache se registra como callback normal y `set_progress` no hace nada.
+
+    Args:
+        *args: Outputs, Inputs y States como en `dash.callback`.
+        component_id: ID del panel (define la etiqueta de progreso).
+        cancel: Inputs que cancelan el trabajo en curso.
+    """
+    progress_id = f'{component_id}-progress'
+
+    def decorator(func: Callable) -> Callable:
+        if background_manager is None:
+            @functools.wraps(func)
+            def inline(*callback_args):
+                return func(lambda *_: None, *callback_args)
+
+            return callback(*args)(inline)
+
+        @functools.wraps(func)
+        def job(set_progress, *callback_args):
+            def checked_progress(value):
+                job_id = getattr(_current_job, 'job', None)
+
+                if job_id is not None and background_manager.is_cancelled(job_id):
+                    raise JobCancelled()
+
+                set_progress(value)
+
+            return func(checked_progress, *callback_args)
+
+        return callback(
+            *args,
+            background=True,
+            manager=background_manager,
+            progress=Output(progress_id, 'children'),
+            running=[
+                (Output(progress_id, 'style'),
+                 {**PROGRESS_STYLE, 'display': 'block'},
+                 {**PROGRESS_STYLE, 'display': 'none'})
+            ],
+            cancel=cancel or [],
+            interval=JOBS_POLL_INTERVAL,
+        )(job)
+
+    return decorator
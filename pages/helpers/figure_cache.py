@@ -0,0 +1,163 @@
+import os
+import json
+import threading
+import functools
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from .serialization import to_json
+from .theme_restyle import restyle_result
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+
+# Máximo de respuestas guardadas y memoria total (MB) de la caché
+FIGURE_CACHE_SIZE = int(os.environ.get('DASH_FIGURE_CACHE_SIZE', 256))
+FIGURE_CACHE_MB = int(os.environ.get('DASH_FIGURE_CACHE_MB', 64))
+
+# 0 = deshabilitar la caché de figuras
+FIGURE_CACHE_ENABLED = os.environ.get('DASH_FIGURE_CACHE', '1') != '0'
+
+
+class FigureCache:
+    """
+    Caché LRU de respuestas de callbacks de gráficos, guardadas como JSON
+    serializado. Compartida por todos los usuarios del proceso: dos usuarios
+    con los mismos filtros y versión de datos reciben la misma figura sin
+    reconstruirla, cada uno con los colores de su tema.
+
+    La serialización usa serialization.to_json (orjson si está instalado).
+    """
+
+    def __init__(self, max_entries: int = FIGURE_CACHE_SIZE, max_bytes: int = FIGURE_CACHE_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            payload = self._entries.get(key)
+
+            if payload is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return payload
+
+    def set(self, key: Hashable, payload: str) -> None:
+        # Una figura más grande que toda la caché no se guarda
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+
+            if previous is not None:
+                self._bytes -= len(previous)
+
+            self._entries[key] = payload
+            self._bytes += len(payload)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self, panel: str | None = None) -> None:
+        """
+        Vaciar la caché (o solo las entradas de un panel).
+        """
+        with self._lock:
+            if panel is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+
+            for key in [k for k in self._entries if k[0] == panel]:
+                self._bytes -= len(self._entries.pop(key))
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return \
+                {
+                    'entries': len(self._entries),
+                    'bytes': self._bytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                }
+
+
+figure_cache = FigureCache()
+
+
+def cached_figure(
+        panel: str,
+        key: Callable[..., Hashable | None],
+        version: Callable[[], Hashable],
+        theme: Callable[..., str] | None = None) -> Callable:
+    """
+    Memorizar la respuesta de un callback de gráfico por
+    (panel, filtros, versión de datos).
+
+    Se aplica debajo de `@callback` (o de `background_callback`). `key`
+    recibe los mismos argumentos que el callback y devuelve solo lo que
+    determina la figura, ya resuelto (p. ej. el vendedor efectivo en lugar
+    de session-store), para que todos los administradores compartan la
+    vista "Todos". Si `key` devuelve None la petición no usa la caché.
+    `version` devuelve la versión de los datos del analyzer; al recargarlos
+    cambia y las figuras anteriores dejan de usarse. El tema no forma parte
+    de la clave: `theme` devuelve el tema de la petición y la figura
+    reutilizada se pasa a sus colores (restyle_result).
+
+    Args:
+        panel: Identificador del panel.
+        key: Función de los argumentos del callback -> filtros.
+        version: Función sin argumentos -> versión de los datos.
+        theme: Función de los argumentos del callback -> tema actual.
+    """
+    def decorator(func: Callable) -> Callable:
+        if not FIGURE_CACHE_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            try:
+                filters = key(*args)
+                cache_key = None if filters is None else (panel, filters, version())
+            except Exception as e:
+                print(f"⚠️ [cached_figure] No se pudo calcular la clave de {panel}: {e}")
+                cache_key = None
+
+            if cache_key is None:
+                return func(*args)
+
+            payload = figure_cache.get(cache_key)
+
+            if payload is not None:
+                result = json_loads(payload)
+
+                return result if theme is None else restyle_result(result, theme(*args))
+
+            result = func(*args)
+
+            try:
+                figure_cache.set(cache_key, to_json(result))
+            except Exception as e:
+                print(f"⚠️ [cached_figure] No se pudo guardar {panel}: {e}")
+
+            return result
+
+        return wrapper
+
+    return decorator
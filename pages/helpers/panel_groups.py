@@ -0,0 +1,77 @@
+import os
+from typing import Any, Callable, List, Sequence
+from flask import g, has_request_context
+from dash import Output, callback, no_update
+
+
+# Agrupar paneles relacionados en un solo callback (0 = un callback por panel)
+BATCH_CALLBACKS = os.environ.get('DASH_BATCH_CALLBACKS', '1') != '0'
+
+
+def request_cache(key: tuple, compute: Callable[[], Any]) -> Any:
+    """
+    Memorizar un resultado durante la petición actual, para que los paneles
+    de un mismo grupo no repitan el mismo cálculo. Fuera de una petición
+    (p. ej. trabajos en segundo plano) solo se ejecuta `compute`.
+
+    Args:
+        key: Clave del resultado (p. ej. ('resumen', vendedor, mes)).
+        compute: Función sin argumentos que calcula el resultado.
+    """
+    if not has_request_context():
+        return compute()
+
+    cache = g.setdefault('_panel_results', {})
+
+    if key not in cache:
+        cache[key] = compute()
+
+    return cache[key]
+
+
+def register_panel_group(
+        outputs: Sequence[Output | List[Output]],
+        inputs: List,
+        renderers: Sequence[Callable]) -> None:
+    """
+    Registrar un grupo de paneles que dependen de los mismos filtros.
+
+    En modo agrupado (por defecto) un solo callback llama a todos los
+    renderers y devuelve todas las salidas: una petición HTTP y una
+    deserialización de session-store por grupo en lugar de por panel. Con
+    DASH_BATCH_CALLBACKS=0 se registra un callback por panel.
+
+    Args:
+        outputs: Output de cada renderer (lista si devuelve varias salidas).
+        inputs: Inputs y States comunes del grupo.
+        renderers: Funciones de cada panel; reciben los valores de `inputs`.
+    """
+    if not BATCH_CALLBACKS:
+        for output, render in zip(outputs, renderers):
+            callback(output, inputs)(render)
+        return
+
+    flat_outputs = []
+
+    for output in outputs:
+        flat_outputs.extend(output if isinstance(output, list) else [output])
+
+    def render_group(*args):
+        results = []
+
+        for output, render in zip(outputs, renderers):
+            # Un panel con error no debe impedir que se actualicen los demás
+            try:
+                value = render(*args)
+            except Exception as e:
+                print(f"❌ [register_panel_group] Error en {render.__name__}: {e}")
+                value = [no_update] * len(output) if isinstance(output, list) else no_update
+
+            if isinstance(output, list):
+                results.extend(value)
+            else:
+                results.append(value)
+
+        return results
+
+    callback(flat_outputs, inputs)(render_group)
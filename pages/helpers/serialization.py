@@ -0,0 +1,126 @@
+import os
+from typing import Any
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+from _plotly_utils.utils import PlotlyJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Decimales de los arreglos float en las figuras compactadas
+FLOAT_DECIMALS = int(os.environ.get('DASH_FLOAT_DECIMALS', 4))
+
+# 0 = usar el serializador de plotly para las respuestas de los callbacks
+FAST_JSON_ENABLED = os.environ.get('DASH_FAST_JSON', '1') != '0'
+
+_plotly_encoder = PlotlyJSONEncoder()
+
+
+def _default(obj: Any) -> Any:
+    """
+    Tipos que orjson no codifica de forma nativa: componentes de Dash y
+    figuras (to_plotly_json) y el resto de casos que ya resuelve plotly
+    (pandas, Decimal, arreglos numpy no soportados, etc.).
+    """
+    to_plotly_json = getattr(obj, 'to_plotly_json', None)
+
+    if to_plotly_json is not None:
+        return to_plotly_json()
+
+    return _plotly_encoder.default(obj)
+
+
+def to_json(value: Any) -> str:
+    """
+    Serializar una respuesta de callback con orjson: los arreglos numpy se
+    escriben sin convertirlos a listas de Python y los componentes se
+    recorren desde el codificador en C. Si orjson no está instalado o el
+    valor contiene algo que no sabe codificar, se usa el serializador de
+    plotly (el mismo que usa Dash por defecto).
+
+    Args:
+        value: Valor a serializar.
+
+    Returns:
+        str: JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value,
+                default=_default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
+
+        except TypeError:
+            pass
+
+    return to_json_plotly(value)
+
+
+def install_json_serializer() -> bool:
+    """
+    Usar `to_json` para las respuestas de los callbacks de Dash.
+
+    Dash codifica las respuestas con `dash._callback.to_json`, que delega en
+    plotly; se reemplaza esa referencia (dash está fijado en
+    requirements.txt). Se desactiva con DASH_FAST_JSON=0.
+
+    Returns:
+        bool: True si se instaló el serializador rápido.
+    """
+    if orjson is None or not FAST_JSON_ENABLED:
+        print("⚠️ Serialización rápida deshabilitada, se usará el serializador de plotly")
+        return False
+
+    import dash._callback
+
+    dash._callback.to_json = to_json
+
+    return True
+
+
+def _compact(node: Any, decimals: int) -> Any:
+    if isinstance(node, np.ndarray):
+        if node.dtype.kind == 'f':
+            return np.round(node, decimals)
+
+        # Columnas object de pandas (p. ej. enteros con None) -> lista
+        return node.tolist() if node.dtype.kind == 'O' else node
+
+    if isinstance(node, dict):
+        return {k: _compact(v, decimals) for k, v in node.items()}
+
+    if isinstance(node, (list, tuple)):
+        # Listas de textos (etiquetas, customdata) se dejan tal cual
+        if node and isinstance(node[0], str):
+            return node
+
+        return [_compact(v, decimals) for v in node]
+
+    if isinstance(node, float):
+        return round(node, decimals)
+
+    return node
+
+
+def compact_figure(fig: go.Figure, decimals: int = FLOAT_DECIMALS) -> dict:
+    """
+    Figura lista para serializar: diccionario con los arreglos numpy sin
+    convertir a listas (orjson los codifica directamente) y los float
+    redondeados, para reducir el tamaño de la respuesta en treemaps y
+    heatmaps de miles de puntos.
+
+    Args:
+        fig: Figura de plotly.
+        decimals: Decimales de los valores float.
+
+    Returns:
+        dict: Figura en formato JSON de plotly.
+    """
+    return _compact(fig.to_plotly_json(), decimals)
@@ -0,0 +1,157 @@
+import json
+from typing import Any, Dict, List
+from dash import ALL, Input, Output, State, clientside_callback
+
+from utils import LIGHT_THEME, DARK_THEME, get_theme_styles
+
+
+# Claves de la paleta que puede tener cada papel de color de una figura, en
+# orden de preferencia cuando dos claves comparten color en un tema
+_ROLE_KEYS = {
+    'fondo': ['plot_bg', 'paper_color', 'bg_color'],
+    'rejilla': ['grid_color', 'border_color', 'line_color'],
+    'linea': ['line_color', 'border_color', 'grid_color'],
+    'contorno': ['plot_bg', 'paper_color', 'bg_color', 'border_color', 'line_color', 'grid_color'],
+    'texto': ['text_color'],
+}
+
+# Papel de las propiedades de color del layout y de las trazas ('color' se
+# resuelve según la propiedad que lo contiene, ver _role)
+_PROPERTY_ROLES = {
+    'paper_bgcolor': 'fondo',
+    'plot_bgcolor': 'fondo',
+    'bgcolor': 'fondo',
+    'gridcolor': 'rejilla',
+    'zerolinecolor': 'rejilla',
+    'linecolor': 'linea',
+    'bordercolor': 'linea',
+    'tickcolor': 'texto',
+}
+
+
+def _color_maps(theme: str) -> Dict[str, Dict[str, str]]:
+    """
+    Por papel: color de la paleta del otro tema -> color de `theme`.
+    """
+    target = get_theme_styles(theme)
+    source = LIGHT_THEME if theme == 'dark' else DARK_THEME
+    maps = {}
+
+    for role, keys in _ROLE_KEYS.items():
+        mapping = {}
+
+        for key in keys:
+            if source[key] != target[key]:
+                mapping.setdefault(source[key], target[key])
+
+        maps[role] = mapping
+
+    return maps
+
+
+_COLOR_MAPS = {theme: _color_maps(theme) for theme in ('light', 'dark')}
+
+
+def _role(key: str, parent: str | None) -> str | None:
+    if key == 'color':
+        if parent and parent.endswith('font'):
+            return 'texto'
+
+        # Solo contornos (marker.line, etc.); 'color' de marker son datos
+        return 'contorno' if parent == 'line' else None
+
+    return _PROPERTY_ROLES.get(key)
+
+
+def restyle_figure(figure: Dict[str, Any], theme: str) -> Dict[str, Any]:
+    """
+    Apply the palette colors of `theme` to a figure dict built with the
+    other theme, in place. Each color property is mapped according to its
+    role (background, grid, line, text), so a color shared by two roles
+    across the themes (e.g. the light background and the dark text) is
+    swapped correctly in both directions. Data colors are left untouched.
+
+    Args:
+        figure (Dict[str, Any]): Figure as a dict (data/layout).
+        theme (str): 'light' or 'dark'.
+
+    Returns:
+        Dict[str, Any]: The same figure with the colors of `theme`.
+    """
+    maps = _COLOR_MAPS['dark' if theme == 'dark' else 'light']
+
+    def walk(node, parent):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(value, str):
+                    role = _role(key, parent)
+
+                    if role:
+                        node[key] = maps[role].get(value, value)
+
+                elif isinstance(value, (dict, list)):
+                    walk(value, key)
+
+        elif isinstance(node, list):
+            for item in node:
+                if isinstance(item, (dict, list)):
+                    walk(item, parent)
+
+    walk(figure, None)
+
+    return figure
+
+
+def restyle_result(result: Any, theme: str) -> Any:
+    """
+    restyle_figure on a callback result: a figure or a list of outputs
+    (only the figures are changed).
+    """
+    if isinstance(result, dict):
+        return restyle_figure(result, theme) if 'layout' in result else result
+
+    if isinstance(result, (list, tuple)):
+        return [restyle_result(item, theme) if isinstance(item, dict) else item
+                for item in result]
+
+    return result
+
+
+RESTYLE_JS = (
+    "function(theme) {"
+    " return window.dash_clientside.theme.restyleFigures("
+    "theme, %s, Array.prototype.slice.call(arguments, 1));"
+    " }" % json.dumps({'maps': _COLOR_MAPS, 'roles': _PROPERTY_ROLES})
+)
+
+
+def register_theme_restyle(
+        theme_store_id: str,
+        graph_ids: List[str],
+        embedded_type: str | None = None) -> None:
+    """
+    Registrar el callback clientside que cambia el tema de las figuras ya
+    renderizadas de una página (misma lógica que restyle_figure), para que
+    los callbacks de datos reciban el tema como State y no se vuelvan a
+    ejecutar al cambiarlo.
+
+    Args:
+        theme_store_id: ID del dcc.Store con el tema ('light' / 'dark').
+        graph_ids: IDs de los dcc.Graph de la página.
+        embedded_type: `type` del id de los dcc.Graph que van dentro del
+            contenido HTML de otros callbacks ({'type': ..., 'index': ...}).
+    """
+    outputs = [Output(graph_id, 'figure', allow_duplicate=True) for graph_id in graph_ids]
+    states = [State(graph_id, 'figure') for graph_id in graph_ids]
+
+    if embedded_type:
+        outputs.append(Output({'type': embedded_type, 'index': ALL}, 'figure'))
+        states.append(State({'type': embedded_type, 'index': ALL}, 'figure'))
+
+    clientside_callback(
+        RESTYLE_JS,
+        outputs,
+        Input(theme_store_id, 'data'),
+        states,
+        prevent_initial_call=True
+    )
@@ -13,6 +13,7 @@ from utils import (
     get_user_vendor_filter,
     can_see_all_vendors
 )
+from .helpers import cached_figure
 
 # Colores azules en formato rgba
 BLUE_COLORS_BG = [
@@ -44,6 +45,11 @@ except Exception as e:
     analyzer_ventas = None
 
 
+def figure_version():
+    """Versión de datos para la caché de figuras"""
+    return analyzer_ventas.data_version
+
+
 def get_selected_vendor(session_data, dropdown_value):
     """Obtener vendedor según permisos"""
     try:
@@ -556,6 +562,12 @@ def update_panel(session_data, laboratorio, mes, dropdown_vendedor, data_store,
      Input('prov-data-store', 'data'),
      Input('prov-theme-store', 'data')]
 )
+@cached_figure(
+    'prov-g-labs',
+    key=lambda session_data, mes, dropdown_vendedor, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_vendedor), mes, theme),
+    version=figure_version
+)
 def update_grafico_labs(session_data, mes, dropdown_vendedor, data_store, theme):
     """Top 10 laboratorios"""
     try:
@@ -616,6 +628,12 @@ def update_grafico_labs(session_data, mes, dropdown_vendedor, data_store, theme)
      Input('prov-data-store', 'data'),
      Input('prov-theme-store', 'data')]
 )
+@cached_figure(
+    'prov-g-evol',
+    key=lambda session_data, laboratorio, dropdown_vendedor, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_vendedor), laboratorio, theme),
+    version=figure_version
+)
 def update_grafico_evolucion(session_data, laboratorio, dropdown_vendedor, data_store, theme):
     """Evolución de ventas"""
     try:
@@ -673,6 +691,12 @@ def update_grafico_evolucion(session_data, laboratorio, dropdown_vendedor, data_
      Input('prov-data-store', 'data'),
      Input('prov-theme-store', 'data')]
 )
+@cached_figure(
+    'prov-g-impactos',
+    key=lambda session_data, laboratorio, dropdown_vendedor, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_vendedor), laboratorio, theme),
+    version=figure_version
+)
 def update_grafico_impactos(session_data, laboratorio, dropdown_vendedor, data_store, theme):
     """Evolución de impactos"""
     try:
@@ -730,6 +754,12 @@ def update_grafico_impactos(session_data, laboratorio, dropdown_vendedor, data_s
      Input('prov-data-store', 'data'),
      Input('prov-theme-store', 'data')]
 )
+@cached_figure(
+    'prov-g-clientes',
+    key=lambda session_data, laboratorio, mes, dropdown_vendedor, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_vendedor), laboratorio, mes, theme),
+    version=figure_version
+)
 def update_grafico_clientes(session_data, laboratorio, mes, dropdown_vendedor, data_store, theme):
     """Top 10 clientes"""
     try:
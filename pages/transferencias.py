@@ -1,5 +1,5 @@
 import time
-from datetime import datetime
+from datetime import datetime, date
 
 import dash
 from dash import dcc, html, Input, Output, State, callback
@@ -11,6 +11,7 @@ from components import (
     create_empty_metrics,
     METRIC_COLORS
 )
+from .helpers import cached_figure, compact_figure, register_theme_restyle
 from analyzers import TransferenciasAnalyzer
 from utils import (
     format_currency_int,
@@ -50,6 +51,14 @@ def get_user_display_name(session_data):
         return None
 
 
+def figure_version():
+    """
+    Versión de datos de la caché de figuras. Incluye la fecha porque
+    los días sin transferencia dependen del día actual.
+    """
+    return analyzer.data_version, date.today()
+
+
 def get_selected_vendor(session_data, dropdown_value):
     """
     Obtener vendedor basado en permisos y selección.
@@ -652,16 +661,14 @@ def update_card_title_colors(theme):
     [Input('session-store', 'data'),
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
-     Input('transferencias-data-store', 'data'),
-     Input('transferencias-theme-store', 'data')]
+     Input('transferencias-data-store', 'data')]
 )
-def update_metric_cards(session_data, dropdown_value, mes, data_store, theme):
+def update_metric_cards(session_data, dropdown_value, mes, data_store):
     """
     Actualizar las metric cards con los datos de transferencias
     """
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        is_dark = theme == 'dark'
 
         # Obtener resumen de datos
         resumen = analyzer.get_resumen_transferencias(vendedor, mes)
@@ -726,10 +733,10 @@ def update_metric_cards(session_data, dropdown_value, mes, data_store, theme):
             }
         ]
 
-        # Crear grid de métricas con 4 columnas
+        # Crear grid de métricas con 4 columnas (colores según el tema de la página)
         return create_metrics_grid(
             metrics=metrics_data,
-            is_dark=is_dark,
+            is_dark=None,
             columns=4,
             gap="20px"
         )
@@ -737,7 +744,7 @@ def update_metric_cards(session_data, dropdown_value, mes, data_store, theme):
     except Exception as e:
         print(f"❌ Error actualizando metric cards: {e}")
         # Retornar cards vacías en caso de error
-        return create_empty_metrics(is_dark=theme == 'dark', count=8)
+        return create_empty_metrics(is_dark=None, count=8)
 
 
 @callback(
@@ -761,8 +768,7 @@ def update_monto_slider_config(session_data, dropdown_value, data_store):
         df = analyzer.filter_data(vendedor, 'Todos')
 
         # Filtrar solo ventas reales
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        ventas_reales = df[df['es_remision']]
 
         if ventas_reales.empty:
             return 0, 1000000, [0, 1000000], {0: '$0', 1000000: '$1M'}, 50000
@@ -823,7 +829,14 @@ def update_monto_slider_config(session_data, dropdown_value, data_store):
     [Input('session-store', 'data'),
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-data-store', 'data'),  #
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-grafico-transferencias-mes',
+    key=lambda session_data, dropdown_value, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, data_store, theme: theme,
+    version=figure_version
 )
 def update_transferencias_mes(session_data, dropdown_value, data_store, theme):
     """
@@ -916,7 +929,14 @@ def update_transferencias_mes(session_data, dropdown_value, data_store, theme):
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
      Input('transferencias-data-store', 'data'),  #
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-grafico-estacionalidad',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_estacionalidad(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1019,7 +1039,14 @@ def update_estacionalidad(session_data, dropdown_value, mes, data_store, theme):
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
      Input('transferencias-data-store', 'data'),  #
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-grafico-zona',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_zona(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1121,7 +1148,14 @@ def update_zona(session_data, dropdown_value, mes, data_store, theme):
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
      Input('transferencias-data-store', 'data'),  #
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-grafico-forma-pago',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_forma_pago(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1234,8 +1268,7 @@ def update_slider_clientes_config(session_data, dropdown_value, data_store):
 
         # Obtener datos básicos para calcular total de clientes
         df = analyzer.filter_data(vendedor, 'Todos')
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        ventas_reales = df[df['es_remision']]
 
         if ventas_reales.empty:
             return 200, {10: '10', 50: '50', 100: '100', 200: '200+'}
@@ -1270,7 +1303,14 @@ def update_slider_clientes_config(session_data, dropdown_value, data_store):
      Input('transferencias-filtro-num-clientes', 'value'),
      Input('transferencias-filtro-tendencia', 'value'),
      Input('transferencias-data-store', 'data'),
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-treemap-unificado',
+    key=lambda session_data, dropdown_value, num_clientes, filtro_tendencia, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), num_clientes, filtro_tendencia),
+    theme=lambda session_data, dropdown_value, num_clientes, filtro_tendencia, data_store, theme: theme,
+    version=figure_version
 )
 def update_treemap_unificado(
         session_data,
@@ -1293,7 +1333,7 @@ def update_treemap_unificado(
             return create_empty_figure("No hay datos disponibles", theme_styles)
 
         # Filtro único y directo
-        ventas_mask = df['tipo'].str.contains('Remision', case=False, na=False)
+        ventas_mask = df['es_remision']
         ventas_reales = df[ventas_mask].copy()
 
         if ventas_reales.empty:
@@ -1518,7 +1558,14 @@ def create_empty_figure(message, theme_styles):
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-filtro-dias-sin-venta', 'value'),
      Input('transferencias-data-store', 'data'),
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-treemap-dias-sin-venta',
+    key=lambda session_data, dropdown_value, dias_minimos, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), dias_minimos),
+    theme=lambda session_data, dropdown_value, dias_minimos, data_store, theme: theme,
+    version=figure_version
 )
 def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, data_store, theme):
     """
@@ -1727,7 +1774,7 @@ def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, da
             )
         )
 
-        return fig
+        return compact_figure(fig)
 
     except Exception as e:
         print(f"❌ [update_treemap_dias_sin_venta] Error: {e}")
@@ -1751,7 +1798,7 @@ def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, da
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
      Input('transferencias-data-store', 'data'),
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
 )
 def update_evolucion_cliente(cliente, tipo_evolucion, session_data, dropdown_value, mes, data_store, theme):
     """
@@ -2010,7 +2057,14 @@ def hex_to_rgba(hex_color, alpha=0.5):
      Input('transferencias-dropdown-vendedor', 'value'),
      Input('transferencias-dropdown-mes', 'value'),
      Input('transferencias-data-store', 'data'),
-     Input('transferencias-theme-store', 'data')]
+     State('transferencias-theme-store', 'data')]
+)
+@cached_figure(
+    'transferencias-top-clientes',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_top_clientes(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -2272,7 +2326,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 25%, #f8fafc 50%, #f1f5f9 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#111827'
+                'color': '#111827',
+                'colorScheme': 'light'
             }
         )
 
@@ -2292,7 +2347,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #0f172a 0%, #1e293b 25%, #334155 50%, #475569 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#f8fafc'
+                'color': '#f8fafc',
+                'colorScheme': 'dark'
             }
         )
     else:
@@ -2307,7 +2363,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 25%, #f8fafc 50%, #f1f5f9 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#111827'
+                'color': '#111827',
+                'colorScheme': 'light'
             }
         )
 
@@ -2587,3 +2644,17 @@ def update_texto_dias_sin_venta(dias_seleccionados):
     except Exception as e:
         print(f"❌ Error actualizando texto días sin venta: {e}")
         return "(Clientes sin ventas recientes - Tamaño por total de ventas históricas)"
+
+
+# Cambio de tema en el navegador sin volver a ejecutar los callbacks de datos
+register_theme_restyle(
+    'transferencias-theme-store',
+    ['transferencias-grafico-transferencias-mes',
+     'transferencias-grafico-estacionalidad',
+     'transferencias-grafico-zona',
+     'transferencias-grafico-forma-pago',
+     'transferencias-treemap-unificado',
+     'transferencias-treemap-dias-sin-venta',
+     'transferencias-grafico-evolucion-cliente',
+     'transferencias-top-clientes']
+)
@@ -1,15 +1,26 @@
 import numpy as np
 import time
-from datetime import datetime
+from datetime import datetime, date
 
 import dash
 from dash import dcc, html, Input, Output, State, callback, dash_table
 import plotly.graph_objects as go
 import pandas as pd
 
-from .helpers import VentasAnalysisHelper
-from analyzers import VentasAnalyzer, EvaluacionAnalyzer
+from .helpers import (
+    VentasAnalysisHelper,
+    background_callback,
+    progress_label,
+    register_panel_group,
+    request_cache,
+    cached_figure,
+    compact_figure,
+    register_theme_restyle
+)
+from analyzers import VentasAnalyzer, EvaluacionAnalyzer, get_analyzer
 from utils import (
+    AUTO_THEME,
+    theme_color,
     format_currency_int,
     get_theme_styles,
     get_dropdown_style,
@@ -17,7 +28,7 @@ from utils import (
     can_see_all_vendors
 )
 
-analyzer = VentasAnalyzer()
+analyzer = get_analyzer(VentasAnalyzer)
 
 # On-demand initial data load with error handling
 try:
@@ -262,6 +273,7 @@ layout = html.Div([
             html.Div([
                 # Columna izquierda: Gráfico (2/3 del ancho)
                 html.Div([
+                    progress_label('ventas-grafico-cumplimiento-cuotas'),
                     dcc.Graph(
                         id='ventas-grafico-cumplimiento-cuotas',
                         style={'height': '450px'}
@@ -307,6 +319,7 @@ layout = html.Div([
                 'textAlign': 'center', 'marginBottom': '6px', 'fontFamily': 'Inter'}),
             html.P("Resumen de desempeño por vendedor · colores según avance vs. días hábiles transcurridos", style={
                 'textAlign': 'center', 'color': '#7f8c8d', 'fontSize': '12px', 'margin': '0 0 16px 0'}),
+            progress_label('ventas-tabla-comparativa-admin'),
             html.Div(id='ventas-tabla-comparativa-admin'),
         ], id='ventas-row-tabla-comparativa-container', style={
             'borderRadius': '16px',
@@ -677,6 +690,7 @@ layout = html.Div([
                 'border': '1px solid #e5e7eb'
             }),
 
+            progress_label('ventas-treemap-unificado'),
             dcc.Graph(id='ventas-treemap-unificado', style={'height': '650px'})
 
         ], id='ventas-row2-5-container', style={
@@ -1008,6 +1022,7 @@ layout = html.Div([
             html.Div(id='ventas-eval-podium', style={'marginBottom': '30px'}),
 
             # Tabla general con todos los vendedores
+            progress_label('ventas-eval-table-container'),
             html.Div(id='ventas-eval-table-container'),
 
         ], id='ventas-eval-container', style={
@@ -1119,6 +1134,14 @@ layout = html.Div([
 })
 
 
+def figure_version():
+    """
+    Versión de datos de la caché de figuras. Incluye la fecha porque
+    cuotas, días sin venta y RFM+ dependen del día actual.
+    """
+    return analyzer.data_version, date.today()
+
+
 @callback(
     Output('ventas-data-store', 'data'),
     [Input('ventas-btn-actualizar', 'n_clicks')],
@@ -1134,6 +1157,9 @@ def update_ventas_data(n_clicks):
 
             result = analyzer.reload_data()
 
+            # RFM+ de todos los vendedores para la nueva versión de datos
+            analyzer.compute_rfm_tables()
+
             load_time = time.time() - start_time
 
             # Debugging info
@@ -1298,12 +1324,9 @@ def update_monto_slider_config(session_data, dropdown_value, data_store):
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
 
-        # Obtener datos de ventas para calcular rangos
-        df = analyzer.filter_data(vendedor, 'Todos')
-
-        # Filtrar solo ventas reales
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        # Ventas reales del vendedor (vista compartida)
+        ventas_reales = analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty:
             return 0, 1000000, [0, 1000000], {0: '$0', 1000000: '$1M'}, 50000
@@ -1359,12 +1382,12 @@ def update_monto_slider_config(session_data, dropdown_value, data_store):
         return 0, 1000000, [0, 1000000], {0: '$0', 1000000: '$1M'}, 50000
 
 
-@callback(
-    Output('ventas-grafico-ventas-mes', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-ventas-mes',
+    key=lambda session_data, dropdown_value, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, data_store, theme: theme,
+    version=figure_version
 )
 def update_ventas_mes(session_data, dropdown_value, data_store, theme):
     """
@@ -1452,13 +1475,12 @@ def update_ventas_mes(session_data, dropdown_value, data_store, theme):
         return go.Figure()
 
 
-@callback(
-    Output('ventas-grafico-estacionalidad', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-estacionalidad',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_estacionalidad(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1555,13 +1577,12 @@ def update_estacionalidad(session_data, dropdown_value, mes, data_store, theme):
         return go.Figure()
 
 
-@callback(
-    Output('ventas-grafico-zona', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-zona',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_zona(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1657,13 +1678,12 @@ def update_zona(session_data, dropdown_value, mes, data_store, theme):
         return go.Figure()
 
 
-@callback(
-    Output('ventas-grafico-forma-pago', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-forma-pago',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_forma_pago(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -1775,19 +1795,18 @@ def hex_to_rgba(hex_color, alpha=0.5):
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
 )
 def update_comparacion_mensual(session_data, dropdown_value, data_store, theme):
     try:
         from analyzers.fidelizacion_analyzer import FidelizacionAnalyzer
         vendedor = get_selected_vendor(session_data, dropdown_value)
         theme_styles = get_theme_styles(theme)
-        is_dark = theme == 'dark'
         text_color = theme_styles['text_color']
         plot_bg = theme_styles['plot_bg']
-        border = '#4b5563' if is_dark else '#e5e7eb'
+        border = theme_styles['border_color']
 
-        fa = FidelizacionAnalyzer()
+        fa = get_analyzer(FidelizacionAnalyzer)
         comp_df = fa.get_comparacion_mensual_anual(vendedor, 'Todos')
 
         if comp_df.empty:
@@ -1847,12 +1866,12 @@ def create_empty_figure(message, theme_styles):
     return fig
 
 
-@callback(
-    Output('ventas-grafico-clientes-impactados', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-clientes-impactados',
+    key=lambda session_data, dropdown_value, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, data_store, theme: theme,
+    version=figure_version
 )
 def update_clientes_impactados(session_data, dropdown_value, data_store, theme):
     """
@@ -1950,13 +1969,12 @@ def update_clientes_impactados(session_data, dropdown_value, data_store, theme):
         return go.Figure()
 
 
-@callback(
-    Output('ventas-grafico-impactos-dia', 'figure'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+@cached_figure(
+    'ventas-grafico-impactos-dia',
+    key=lambda session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_impactos_por_dia(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -2057,7 +2075,14 @@ def update_impactos_por_dia(session_data, dropdown_value, mes, data_store, theme
     [Input('session-store', 'data'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-heatmap-vendedores-dia',
+    key=lambda session_data, mes, data_store, theme:
+        (mes,),
+    theme=lambda session_data, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_heatmap_vendedores_dia(session_data, mes, data_store, theme):
     """
@@ -2152,7 +2177,7 @@ def update_heatmap_vendedores_dia(session_data, mes, data_store, theme):
             margin=dict(t=20, b=80, l=160, r=60),
         )
 
-        return fig
+        return compact_figure(fig)
 
     except Exception as e:
         print(f"❌ [update_heatmap_vendedores_dia] Error: {e}")
@@ -2164,16 +2189,14 @@ def update_heatmap_vendedores_dia(session_data, mes, data_store, theme):
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')]
 )
-def update_treemap_transferencistas(session_data, dropdown_value, mes, data_store, theme):
+def update_treemap_transferencistas(session_data, dropdown_value, mes, data_store):
     """
     Tabla: composición de ventas del vendedor por transferencista.
     """
     try:
-        theme_styles = get_theme_styles(theme)
-        is_dark  = theme == 'dark'
+        theme_styles = AUTO_THEME
         vendedor = get_selected_vendor(session_data, dropdown_value)
 
         data = analyzer.get_ventas_por_transferencista(vendedor, mes)
@@ -2205,8 +2228,8 @@ def update_treemap_transferencistas(session_data, dropdown_value, mes, data_stor
 
         bg_paper  = theme_styles['paper_color']
         text_main = theme_styles['text_color']
-        border    = '#4b5563' if is_dark else '#e5e7eb'
-        bg_even   = 'rgba(255,255,255,0.03)' if is_dark else 'rgba(0,0,0,0.015)'
+        border    = theme_color('#e5e7eb', '#4b5563')
+        bg_even   = theme_color('rgba(0,0,0,0.015)', 'rgba(255,255,255,0.03)')
 
         columns = [
             {'name': 'Transferencista', 'id': 'transferencista', 'type': 'text'},
@@ -2266,7 +2289,7 @@ def update_treemap_transferencistas(session_data, dropdown_value, mes, data_stor
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
 )
 def update_treemap_cobertura_clientes(session_data, dropdown_value, mes, data_store, theme):
     """
@@ -2380,11 +2403,10 @@ def update_treemap_cobertura_clientes(session_data, dropdown_value, mes, data_st
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data'),
      Input('ventas-convenios-sort-dropdown', 'value'),
      Input('ventas-convenios-sort-dir', 'value')]
 )
-def update_tabla_convenios(session_data, dropdown_value, mes, data_store, theme,
+def update_tabla_convenios(session_data, dropdown_value, mes, data_store,
                            sort_col, sort_dir):
     """
     Update convenios analysis table with enhanced design and expected sales.
@@ -2393,7 +2415,7 @@ def update_tabla_convenios(session_data, dropdown_value, mes, data_store, theme,
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
         data = analyzer.get_analisis_convenios(vendedor, mes="Todos")
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
         # Columna calculada para sorting
         if not data.empty:
             data['falta_cumplir'] = (data['target_value'] - data['valor_neto']).clip(lower=0)
@@ -2647,8 +2669,15 @@ def update_tabla_convenios(session_data, dropdown_value, mes, data_store, theme,
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-vista-recaudo', 'value'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data'),
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-grafico-recaudo-temporal',
+    key=lambda session_data, dropdown_value, vista_recaudo, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), vista_recaudo, mes),
+    theme=lambda session_data, dropdown_value, vista_recaudo, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_grafico_recaudo_temporal(session_data, dropdown_value, vista_recaudo, mes, data_store, theme):
     """
@@ -2783,7 +2812,14 @@ def update_grafico_recaudo_temporal(session_data, dropdown_value, vista_recaudo,
     Output('ventas-grafico-recaudo-vendedor', 'figure'),
     [Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-grafico-recaudo-vendedor',
+    key=lambda mes, data_store, theme:
+        (mes,),
+    theme=lambda mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_grafico_recaudo_vendedor(mes, data_store, theme):
     """
@@ -2882,17 +2918,16 @@ def update_grafico_recaudo_vendedor(mes, data_store, theme):
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-devoluciones-perspectiva', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')]
 )
-def update_devoluciones(session_data, dropdown_value, mes, perspectiva, data_store, theme):
+def update_devoluciones(session_data, dropdown_value, mes, perspectiva, data_store):
     """
     Tabla de devoluciones por cliente con sorting nativo (DataTable).
     """
     try:
         perspectiva = perspectiva or 'transferencista'
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
         data = analyzer.get_devoluciones_detalle(vendedor, mes, perspectiva)
 
         label_agente = 'Vendedor'  # siempre muestra transferencista
@@ -2908,12 +2943,11 @@ def update_devoluciones(session_data, dropdown_value, mes, perspectiva, data_sto
         total_valor = data['valor_devuelto'].sum()
         total_cant = int(data['cantidad'].sum())
 
-        is_dark = theme == 'dark'
         bg_header  = '#34495e'
         bg_paper   = theme_styles.get('paper_color', '#ffffff')
         text_main  = theme_styles['text_color']
-        border_col = '#4b5563' if is_dark else '#e5e7eb'
-        bg_even    = 'rgba(239,68,68,0.07)' if not is_dark else 'rgba(239,68,68,0.13)'
+        border_col = theme_color('#e5e7eb', '#4b5563')
+        bg_even    = theme_color('rgba(239,68,68,0.07)', 'rgba(239,68,68,0.13)')
 
         table_data = [
             {
@@ -3032,7 +3066,14 @@ def update_devoluciones(session_data, dropdown_value, mes, perspectiva, data_sto
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-filtro-dias-sin-venta', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-treemap-dias-sin-venta',
+    key=lambda session_data, dropdown_value, dias_minimos, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), dias_minimos),
+    theme=lambda session_data, dropdown_value, dias_minimos, data_store, theme: theme,
+    version=figure_version
 )
 def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, data_store, theme):
     """
@@ -3241,7 +3282,7 @@ def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, da
             )
         )
 
-        return fig
+        return compact_figure(fig)
 
     except Exception as e:
         print(f"❌ [update_treemap_dias_sin_venta] Error: {e}")
@@ -3265,7 +3306,7 @@ def update_treemap_dias_sin_venta(session_data, dropdown_value, dias_minimos, da
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
 )
 def update_evolucion_cliente(
         cliente,
@@ -3595,10 +3636,9 @@ def update_evolucion_cliente(
     [Input('ventas-dropdown-cliente', 'value'),
      Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')]
 )
-def update_client_rfm_details_panel(cliente, session_data, dropdown_value, data_store, theme):
+def update_client_rfm_details_panel(cliente, session_data, dropdown_value, data_store):
     """
     Panel lateral con detalles RFM+ del cliente seleccionado.
     """
@@ -3634,7 +3674,7 @@ def update_client_rfm_details_panel(cliente, session_data, dropdown_value, data_
                 ])
 
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
 
         # Obtener detalles RFM+
         client_details = analyzer.get_client_rfm_details(cliente, vendedor)
@@ -3814,7 +3854,14 @@ def update_client_rfm_details_panel(cliente, session_data, dropdown_value, data_
     Output('ventas-grafico-comparativa-vendedores', 'figure'),
     [Input('session-store', 'data'),
      Input('ventas-data-store', 'data'),  #
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-grafico-comparativa-vendedores',
+    key=lambda session_data, data_store, theme:
+        () if can_see_all_vendors(session_data) else None,
+    theme=lambda session_data, data_store, theme: theme,
+    version=figure_version
 )
 def update_comparativa_vendedores(session_data, data_store, theme):
     """
@@ -4019,7 +4066,7 @@ def update_comparativa_vendedores(session_data, data_store, theme):
                 xanchor="center",
                 x=0.5,
                 font=dict(size=11),
-                bgcolor="rgba(255,255,255,0.8)" if theme == 'light' else "rgba(0,0,0,0.8)",
+                bgcolor=theme_styles['paper_color'],
                 bordercolor=theme_styles['line_color'],
                 borderwidth=1
             ),
@@ -4075,7 +4122,7 @@ def reset_cliente_selection(vendedor):
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data')]  #
+     Input('ventas-data-store', 'data')]
 )
 def update_titulo_recaudo(session_data, dropdown_value, mes, data_store):
     """
@@ -4123,12 +4170,6 @@ def update_recaudo_visibility(session_data, dropdown_value, vista_recaudo):
     return vendor_style, vista_style, titulo_temporal
 
 
-@callback(
-    Output('ventas-titulo-principal', 'children'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value')]
-)
 def update_title(session_data, dropdown_value, mes):
     """
     Update dashboard title based on filters.
@@ -4152,12 +4193,6 @@ def update_title(session_data, dropdown_value, mes):
         return "Vendedores"
 
 
-@callback(
-    Output('ventas-subtitulo', 'children'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value')]
-)
 def update_subtitle(session_data, dropdown_value, mes):
     """
     Update dynamic subtitle based on filters.
@@ -4216,7 +4251,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 25%, #f8fafc 50%, #f1f5f9 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#111827'
+                'color': '#111827',
+                'colorScheme': 'light'
             }
         )
 
@@ -4236,7 +4272,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #0f172a 0%, #1e293b 25%, #334155 50%, #475569 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#f8fafc'
+                'color': '#f8fafc',
+                'colorScheme': 'dark'
             }
         )
     else:
@@ -4251,7 +4288,8 @@ def toggle_theme(n_clicks, current_theme):
                 'background': 'linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 25%, #f8fafc 50%, #f1f5f9 100%)',
                 'backgroundSize': '400% 400%',
                 'animation': 'gradientShift 15s ease infinite',
-                'color': '#111827'
+                'color': '#111827',
+                'colorScheme': 'light'
             }
         )
 
@@ -4481,9 +4519,8 @@ def update_slider_clientes_config(session_data, dropdown_value, data_store):
         vendedor = get_selected_vendor(session_data, dropdown_value)
 
         # Obtener datos básicos para calcular total de clientes
-        df = analyzer.filter_data(vendedor, 'Todos')
-        ventas_reales = df[df['tipo'].str.contains(
-            'Remision', case=False, na=False)]
+        ventas_reales = analyzer.get_filtered_view(
+            vendedor, 'Todos').ventas_reales
 
         if ventas_reales.empty:
             return 200, {10: '10', 50: '50', 100: '100', 200: '200+'}
@@ -4605,16 +4642,26 @@ def update_slider_dias_sin_venta_config(
             )
 
 
-@callback(
+@background_callback(
     Output('ventas-treemap-unificado', 'figure'),
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-filtro-num-clientes', 'value'),
      Input('ventas-filtro-categoria-rfm', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')],
+    component_id='ventas-treemap-unificado',
+    cancel=[Input('url', 'pathname')]
+)
+@cached_figure(
+    'ventas-treemap-unificado',
+    key=lambda set_progress, session_data, dropdown_value, num_clientes, filtro_categoria, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), num_clientes, filtro_categoria),
+    theme=lambda set_progress, session_data, dropdown_value, num_clientes, filtro_categoria, data_store, theme: theme,
+    version=figure_version
 )
 def update_treemap_rfm_plus(
+        set_progress,
         session_data,
         dropdown_value,
         num_clientes,
@@ -4629,6 +4676,7 @@ def update_treemap_rfm_plus(
         theme_styles = get_theme_styles(theme)
 
         # Obtener datos RFM+ completos
+        set_progress("Calculando puntajes RFM+...")
         # data = analyzer.calculate_enhanced_rfm_scores(vendedor)
         data = analyzer.calculate_enhanced_rfm_scores(vendedor, use_cache=True)
 
@@ -4639,6 +4687,8 @@ def update_treemap_rfm_plus(
         if filtro_categoria and filtro_categoria != 'todas':
             data = data[data['categoria_rfm'] == filtro_categoria]
 
+        set_progress("Construyendo treemap...")
+
         # Ordenar por RFM Score numérico (mejores primero)
         data = data.sort_values('rfm_numeric', ascending=False)
 
@@ -4911,7 +4961,7 @@ def update_dropdown_styles_with_rfm(theme, session_data):
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-filtro-categoria-rfm', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
 )
 def update_rfm_insights(
         session_data,
@@ -4924,7 +4974,7 @@ def update_rfm_insights(
     """
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
 
         # 📅 Información del período de análisis
         from utils import get_ultimo_mes_finalizado
@@ -5143,7 +5193,10 @@ def update_rfm_insights(
             colors = [color_map_rfm_plus.get(
                 cat, "#6b7280") for cat in categories]
 
+            figure_styles = get_theme_styles(theme)
+
             distribution_chart = dcc.Graph(
+                id={'type': 'ventas-themed-graph', 'index': 'rfm-distribucion'},
                 figure=go.Figure(
                     data=[go.Bar(
                         y=categories,
@@ -5161,12 +5214,12 @@ def update_rfm_insights(
                 ).update_layout(
                     height=max(350, len(categories) * 35),
                     margin=dict(t=20, b=20, l=250, r=80),
-                    plot_bgcolor=theme_styles['plot_bg'],
-                    paper_bgcolor=theme_styles['plot_bg'],
+                    plot_bgcolor=figure_styles['plot_bg'],
+                    paper_bgcolor=figure_styles['plot_bg'],
                     font=dict(family="Inter",
-                              color=theme_styles['text_color']),
+                              color=figure_styles['text_color']),
                     xaxis=dict(title="% de Clientes", showgrid=True,
-                               gridcolor=theme_styles['grid_color']),
+                               gridcolor=figure_styles['grid_color']),
                     yaxis=dict(title="", showgrid=False),
                     showlegend=False
                 ),
@@ -5367,25 +5420,34 @@ def update_rfm_insights(
 )
 def clear_cache_on_vendor_change(vendedor):
     """
-    Opcional: Limpiar cache cuando cambie el vendedor principal
+    Registrar el cambio de vendedor. El cache RFM+ es por vendedor y vive en
+    el analyzer compartido, así que no se limpia aquí.
     """
     try:
-        analyzer = VentasAnalyzer()
-        analyzer.clear_rfm_cache()
-        return {'status': 'cache_cleared', 'vendor': vendedor}
+        return {'status': 'vendor_changed', 'vendor': vendedor}
     except:
         return {'status': 'error'}
 
 
-@callback(
+@background_callback(
     Output('ventas-grafico-cumplimiento-cuotas', 'figure'),
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-dropdown-mes', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')],
+    component_id='ventas-grafico-cumplimiento-cuotas',
+    cancel=[Input('url', 'pathname')]
+)
+@cached_figure(
+    'ventas-grafico-cumplimiento-cuotas',
+    key=lambda set_progress, session_data, dropdown_value, mes, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value), mes),
+    theme=lambda set_progress, session_data, dropdown_value, mes, data_store, theme: theme,
+    version=figure_version
 )
 def update_cumplimiento_cuotas_chart(
+        set_progress,
         session_data,
         dropdown_value,
         mes,
@@ -5398,6 +5460,7 @@ def update_cumplimiento_cuotas_chart(
         vendedor = get_selected_vendor(session_data, dropdown_value)
         theme_styles = get_theme_styles(theme)
 
+        set_progress("Calculando cumplimiento de cuotas...")
         data = analyzer.get_cumplimiento_cuotas(vendedor, mes)
 
         if data.empty:
@@ -5583,28 +5646,21 @@ def update_cumplimiento_cuotas_chart(
         return fig
 
 
-@callback(
-    Output('ventas-panel-info-cumplimiento', 'children'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
-)
 def update_panel_info_cumplimiento(
         session_data,
         dropdown_value,
         mes,
-        data_store,
-        theme):
+        data_store):
     """
     Panel corregido con lógica de mes finalizado y días hábiles.
     """
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
+        theme_styles = AUTO_THEME
 
-        data = analyzer.get_cumplimiento_cuotas(vendedor, mes)
+        data = request_cache(
+            ('cumplimiento_cuotas', vendedor, mes),
+            lambda: analyzer.get_cumplimiento_cuotas(vendedor, mes))
 
         if data.empty:
             return html.Div([
@@ -5911,28 +5967,24 @@ def update_panel_cumplimiento_style(theme):
     }
 
 
-@callback(
-    Output('ventas-cumplimiento-total-label', 'children'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
-)
-def update_cumplimiento_total_label(session_data, dropdown_value, mes, data_store, theme):
+def update_cumplimiento_total_label(session_data, dropdown_value, mes, data_store):
     """
     Etiqueta/badge con el cumplimiento total consolidado: valor vendido vs cuota total.
     """
     try:
         vendedor = get_selected_vendor(session_data, dropdown_value)
-        theme_styles = get_theme_styles(theme)
-        data = analyzer.get_cumplimiento_cuotas(vendedor, mes)
+        theme_styles = AUTO_THEME
+        data = request_cache(
+            ('cumplimiento_cuotas', vendedor, mes),
+            lambda: analyzer.get_cumplimiento_cuotas(vendedor, mes))
 
         if data.empty:
             return html.Div()
 
         # Valor real: misma fuente que el header de resumen
-        resumen = analyzer.get_resumen_ventas(vendedor, mes)
+        resumen = request_cache(
+            ('resumen_ventas', vendedor, mes),
+            lambda: analyzer.get_resumen_ventas(vendedor, mes))
         total_ventas = resumen.get('ventas_netas', 0)
         total_cuota = data['cuota'].sum()
         # % real: ventas_netas / cuota total (no promedio de porcentajes individuales)
@@ -5981,14 +6033,15 @@ def update_cumplimiento_total_label(session_data, dropdown_value, mes, data_stor
         return html.Div()
 
 
-@callback(
+@background_callback(
     Output('ventas-tabla-comparativa-admin', 'children'),
     [Input('session-store', 'data'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')],
+    component_id='ventas-tabla-comparativa-admin',
+    cancel=[Input('url', 'pathname')]
 )
-def update_tabla_comparativa_admin(session_data, mes, data_store, theme):
+def update_tabla_comparativa_admin(set_progress, session_data, mes, data_store):
     """
     Tabla comparativa de todos los vendedores (solo admin).
     3 colores: verde (>=esperado), naranja (cerca), rojo (lejos).
@@ -5999,8 +6052,8 @@ def update_tabla_comparativa_admin(session_data, mes, data_store, theme):
         if not can_see_all_vendors(session_data):
             return html.Div()
 
-        theme_styles = get_theme_styles(theme)
-        is_dark = theme == 'dark'
+        theme_styles = AUTO_THEME
+        set_progress("Calculando comparativa de vendedores...")
         data = analyzer.get_tabla_comparativa_admin(mes)
 
         if data.empty:
@@ -6042,8 +6095,8 @@ def update_tabla_comparativa_admin(session_data, mes, data_store, theme):
 
         bg_paper  = theme_styles['paper_color']
         text_main = theme_styles['text_color']
-        border    = '#4b5563' if is_dark else '#e5e7eb'
-        bg_even   = 'rgba(255,255,255,0.03)' if is_dark else 'rgba(0,0,0,0.015)'
+        border    = theme_color('#e5e7eb', '#4b5563')
+        bg_even   = theme_color('rgba(0,0,0,0.015)', 'rgba(255,255,255,0.03)')
 
         data_rows = table_rows
 
@@ -6180,22 +6233,16 @@ def update_tabla_comparativa_admin(session_data, mes, data_store, theme):
         return html.Div(html.P(f"Error: {e}", style={'color': '#ef4444', 'fontFamily': 'Inter'}))
 
 
-@callback(
-    Output('ventas-metrics-cards', 'children'),
-    [Input('session-store', 'data'),
-     Input('ventas-dropdown-vendedor', 'value'),
-     Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
-)
-def update_summary_panel(session_data, dropdown_value, mes, data_store, theme):
+def update_summary_panel(session_data, dropdown_value, mes, data_store):
     """
     Panel de resumen mejorado con efectividad y devoluciones detalladas
     CORREGIDO: Agregar valor monetario y cantidad de devoluciones
     """
     vendedor = get_selected_vendor(session_data, dropdown_value)
-    theme_styles = get_theme_styles(theme)
-    resumen = analyzer.get_resumen_ventas(vendedor, mes)
+    theme_styles = AUTO_THEME
+    resumen = request_cache(
+        ('resumen_ventas', vendedor, mes),
+        lambda: analyzer.get_resumen_ventas(vendedor, mes))
 
     # Calcular efectividad (basado en devoluciones por transferencista)
     dev_transf = resumen['total_devoluciones_transf']
@@ -6476,10 +6523,9 @@ def show_evaluation_container(session_data, theme):
     [Input('session-store', 'data'),
      Input('ventas-eval-metric-selector', 'value'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')]
 )
-def update_evaluation_podium(session_data, metric, mes, data_store, theme):
+def update_evaluation_podium(session_data, metric, mes, data_store):
     """
     Update podium display with new Score.
     """
@@ -6492,7 +6538,7 @@ def update_evaluation_podium(session_data, metric, mes, data_store, theme):
                 html.Div("Gráfico no disponible para vendedores",
                          style={'textAlign': 'center'})
 
-        analyzer = EvaluacionAnalyzer()
+        analyzer = get_analyzer(EvaluacionAnalyzer)
         df_ranking = analyzer.get_vendor_ranking(metric, mes)
 
         if df_ranking.empty:
@@ -6571,16 +6617,17 @@ def update_evaluation_podium(session_data, metric, mes, data_store, theme):
         return html.Div(f"Error: {str(e)}", style={'color': 'red'})
 
 
-@callback(
+@background_callback(
     Output('ventas-eval-table-container', 'children'),
     [Input('session-store', 'data'),
      Input('ventas-eval-metric-selector', 'value'),
      Input('ventas-eval-show-details', 'value'),
      Input('ventas-dropdown-mes', 'value'),
-     Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     Input('ventas-data-store', 'data')],
+    component_id='ventas-eval-table-container',
+    cancel=[Input('url', 'pathname')]
 )
-def update_evaluation_table(session_data, metric, show_details, mes, data_store, theme):
+def update_evaluation_table(set_progress, session_data, metric, show_details, mes, data_store):
     """
     Update evaluation table with Score column.
     """
@@ -6593,7 +6640,8 @@ def update_evaluation_table(session_data, metric, show_details, mes, data_store,
                 html.Div("Gráfico no disponible para vendedores",
                          style={'textAlign': 'center'})
 
-        analyzer = EvaluacionAnalyzer()
+        set_progress("Calculando ranking de vendedores...")
+        analyzer = get_analyzer(EvaluacionAnalyzer)
         df_ranking = analyzer.get_vendor_ranking(metric, mes)
 
         if df_ranking.empty:
@@ -6800,7 +6848,14 @@ def update_evaluation_table(session_data, metric, show_details, mes, data_store,
     [Input('session-store', 'data'),
      Input('ventas-dropdown-vendedor', 'value'),
      Input('ventas-data-store', 'data'),
-     Input('ventas-theme-store', 'data')]
+     State('ventas-theme-store', 'data')]
+)
+@cached_figure(
+    'ventas-efficiency-chart',
+    key=lambda session_data, dropdown_value, data_store, theme:
+        (get_selected_vendor(session_data, dropdown_value),),
+    theme=lambda session_data, dropdown_value, data_store, theme: theme,
+    version=figure_version
 )
 def update_efficiency_chart(session_data, dropdown_value, data_store, theme):
     """
@@ -6811,7 +6866,7 @@ def update_efficiency_chart(session_data, dropdown_value, data_store, theme):
             get_selected_vendor(session_data, dropdown_value)
 
         theme_styles = get_theme_styles(theme)
-        analyzer = VentasAnalyzer()
+        analyzer = get_analyzer(VentasAnalyzer)
 
         df = analyzer.get_resumen_mensual(vendedor)
 
@@ -6982,23 +7037,23 @@ def update_fletes_filters(data_store):
     Update filter options
     """
     try:
-        analyzer = VentasAnalyzer()
+        analyzer = get_analyzer(VentasAnalyzer)
 
-        df_fletes = analyzer.load_fletes_from_firebase()
+        fletes = analyzer.get_fletes_index()
 
-        if df_fletes.empty:
+        if not len(fletes):
             return [], []
 
         # Opciones de zonas únicas
-        zonas = df_fletes['zona'].unique()
+        zonas = {row['zona'] for row in fletes.rows}
         zona_options = [{'label': zona, 'value': zona}
                         for zona in sorted(zonas)]
 
         # Opciones de transportadoras únicas
         transportadoras = set()
 
-        for trans_list in df_fletes['transportadora']:
-            transportadoras.update(trans_list)
+        for row in fletes.rows:
+            transportadoras.update(row['transportadoras'])
 
         trans_options = [{'label': t, 'value': t}
                          for t in sorted(transportadoras)]
@@ -7016,16 +7071,12 @@ def update_fletes_filters(data_store):
 )
 def load_cities_options(data_store):
     try:
-        analyzer = VentasAnalyzer()
+        analyzer = get_analyzer(VentasAnalyzer)
 
-        df = analyzer.load_fletes_from_firebase()
-
-        if df.empty:
-            return []
+        fletes = analyzer.get_fletes_index()
 
         # Crear opciones para el dropdown
-        cities = df['ciudad'].unique()
-        return [{'label': city, 'value': city} for city in sorted(cities)]
+        return [{'label': city, 'value': city} for city in fletes.cities()]
 
     except:
         return []
@@ -7038,20 +7089,25 @@ def load_cities_options(data_store):
      Output('ventas-fletes-page', 'data')],
     [Input('session-store', 'data'),
      Input('ventas-fletes-search', 'value'),
+     Input('ventas-fletes-search', 'search_value'),
      Input('ventas-fletes-prev', 'n_clicks'),
-     Input('ventas-fletes-next', 'n_clicks'),
-     Input('ventas-theme-store', 'data')],
+     Input('ventas-fletes-next', 'n_clicks')],
     [State('ventas-fletes-page', 'data')]
 )
 def update_modern_fletes_table(
         session_data,
         search_value,
+        search_text,
         prev_clicks,
         next_clicks,
-        theme,
         current_page):
     """
-    Tabla moderna con header fijo y paginación
+    Tabla moderna con header fijo y paginación.
+
+    La búsqueda y la paginación se resuelven sobre el índice de fletes
+    (ciudad, departamento, zona y transportadora, por prefijo y sin tildes)
+    y solo se construyen las filas visibles. El texto que se escribe en el
+    buscador filtra la tabla mientras se escribe.
     """
     try:
         from dash import ctx
@@ -7061,40 +7117,33 @@ def update_modern_fletes_table(
         if is_admin:
             return [], html.Div("Este gráfico no está disponible para administradores", style={'padding': '40px', 'textAlign': 'center'}), "", 1
 
-        theme_styles = get_theme_styles(theme)
-        analyzer = VentasAnalyzer()
+        theme_styles = AUTO_THEME
+        analyzer = get_analyzer(VentasAnalyzer)
 
-        df = analyzer.load_fletes_from_firebase()
+        fletes = analyzer.get_fletes_index()
 
-        if df.empty:
+        if not len(fletes):
             return [], html.Div("No hay datos disponibles", style={'padding': '40px', 'textAlign': 'center'}), "", 1
 
-        # Filtrar por búsqueda
-        df_filtered = df.copy()
-        if search_value:
-            df_filtered = df_filtered[df_filtered['ciudad'] == search_value]
-
-        # Paginación
-        items_per_page = 10
-        total_items = len(df_filtered)
-        total_pages = max(
-            1, (total_items + items_per_page - 1) // items_per_page)
-
-        # Determinar página actual
-        if ctx.triggered_id == 'ventas-fletes-prev' and current_page > 1:
-            current_page -= 1
-        elif ctx.triggered_id == 'ventas-fletes-next' and current_page < total_pages:
-            current_page += 1
-        elif not ctx.triggered_id:
+        # Determinar página actual (el índice la ajusta al rango válido)
+        if ctx.triggered_id == 'ventas-fletes-prev':
+            current_page = (current_page or 1) - 1
+        elif ctx.triggered_id == 'ventas-fletes-next':
+            current_page = (current_page or 1) + 1
+        else:
             current_page = 1
 
-        # Asegurar que la página esté en rango válido
-        current_page = max(1, min(current_page, total_pages))
+        # Paginación: solo las filas visibles
+        result = fletes.page(
+            ciudad=search_value,
+            text=search_text,
+            page=current_page,
+            per_page=10
+        )
 
-        # Obtener items de la página actual
-        start_idx = (current_page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        df_page = df_filtered.iloc[start_idx:end_idx]
+        current_page = result['page']
+        total_pages = result['total_pages']
+        total_items = result['total_items']
 
         # Crear header (fijo) - MODIFICADO: todos los títulos centrados
         header_row = html.Div([
@@ -7107,7 +7156,7 @@ def update_modern_fletes_table(
                 'letterSpacing': '1px',
                 'color': '#6b7280',
                 'borderBottom': '2px solid #e5e7eb',
-                'backgroundColor': 'white' if theme == 'light' else '#1f2937',
+                'backgroundColor': theme_color('white', '#1f2937'),
                 'textAlign': 'center'  # CENTRADO
             }),
             html.Div("DEPARTAMENTO", style={
@@ -7165,21 +7214,22 @@ def update_modern_fletes_table(
                 'borderBottom': '2px solid #e5e7eb',
                 'textAlign': 'center'  # CENTRADO
             })
-        ], style={'width': '100%', 'backgroundColor': 'white' if theme == 'light' else '#1f2937'})
+        ], style={'width': '100%', 'backgroundColor': theme_color('white', '#1f2937')})
 
         # Crear filas del cuerpo
         body_rows = []
         colors = ['#3b82f6', '#10b981', '#8b5cf6',
                   '#f59e0b', '#ef4444', '#ec4899']
 
-        for idx, row in df_page.iterrows():
+        for idx, row in enumerate(result['rows']):
             # Estilo alternado de filas
-            row_bg = 'white' if (idx - start_idx) % 2 == 0 else '#f9fafb'
-            if theme == 'dark':
-                row_bg = '#1f2937' if (idx - start_idx) % 2 == 0 else '#111827'
+            if idx % 2 == 0:
+                row_bg = theme_color('white', '#1f2937')
+            else:
+                row_bg = theme_color('#f9fafb', '#111827')
 
             # Formatear transportadoras con badges modernos
-            transportadoras = row['transportadora']
+            transportadoras = row['transportadoras']
 
             trans_badges = html.Div([
                 html.Span(t, style={
@@ -7237,7 +7287,7 @@ def update_modern_fletes_table(
                         'verticalAlign': 'middle',
                         'fontSize': '13px',
                     }),
-                    html.Div(f"{format_currency_int(row['valor_pedido_minimo'])}", style={
+                    html.Div(row['pedido_minimo'], style={
                         'width': '15%',  # AUMENTADO
                         'display': 'inline-block',
                         'padding': '15px',
@@ -7247,7 +7297,7 @@ def update_modern_fletes_table(
                         'fontWeight': 'bold',
                         'verticalAlign': 'middle'
                     }),
-                    html.Div(f"{format_currency_int(row['valor_flete_unidad'])}", style={
+                    html.Div(row['flete_unidad'], style={
                         'width': '15%',  # AUMENTADO
                         'display': 'inline-block',
                         'padding': '15px',
@@ -7298,7 +7348,7 @@ def update_modern_fletes_table(
 def fidel_populate_dropdowns(session_data):
     try:
         from analyzers.fidelizacion_analyzer import FidelizacionAnalyzer
-        fa = FidelizacionAnalyzer()
+        fa = get_analyzer(FidelizacionAnalyzer)
         vendedores, clasificaciones = fa.get_listas_filtros()
         raw = fa.load_data()
 
@@ -7322,7 +7372,7 @@ def fidel_populate_dropdowns(session_data):
     [Input('session-store', 'data'),
      Input('fidel-dropdown-vendedor', 'value'),
      Input('fidel-dropdown-clasificacion', 'value'),
-     Input('ventas-theme-store', 'data')],
+     State('ventas-theme-store', 'data')],
 )
 def fidel_update_main(session_data, vendedor, clasificacion, theme):
     from analyzers.fidelizacion_analyzer import FidelizacionAnalyzer
@@ -7339,15 +7389,14 @@ def fidel_update_main(session_data, vendedor, clasificacion, theme):
         if not can_see_all_vendors(session_data):
             return _empty()
 
+        # Figura con los colores del tema actual; KPIs y tabla con AUTO_THEME
         theme_styles = get_theme_styles(theme)
-        is_dark   = theme == 'dark'
-        text_color = theme_styles['text_color']
-        plot_bg   = theme_styles['plot_bg']
-        paper_bg  = theme_styles['paper_color']
-        border    = '#4b5563' if is_dark else '#e5e7eb'
-        bg_even   = 'rgba(255,255,255,0.03)' if is_dark else 'rgba(0,0,0,0.015)'
+        text_color = AUTO_THEME['text_color']
+        paper_bg  = AUTO_THEME['paper_color']
+        border    = theme_color('#e5e7eb', '#4b5563')
+        bg_even   = theme_color('rgba(0,0,0,0.015)', 'rgba(255,255,255,0.03)')
 
-        fa  = FidelizacionAnalyzer()
+        fa  = get_analyzer(FidelizacionAnalyzer)
         vnd = vendedor or 'Todos'
         clf = clasificacion or 'Todos'
         df  = fa.get_resumen(vnd, clf)
@@ -7430,10 +7479,10 @@ def fidel_update_main(session_data, vendedor, clasificacion, theme):
                                        text=txt, showarrow=False,
                                        font=dict(size=9, color=col))
         scatter_fig.update_layout(
-            paper_bgcolor=plot_bg, plot_bgcolor=plot_bg,
-            font=dict(family='Inter', size=11, color=text_color),
-            xaxis=dict(title='Venta promedio mensual ($)', gridcolor=border, tickformat='$,.0f'),
-            yaxis=dict(title='Índice de fidelización', gridcolor=border, range=[0, 1.05]),
+            paper_bgcolor=theme_styles['plot_bg'], plot_bgcolor=theme_styles['plot_bg'],
+            font=dict(family='Inter', size=11, color=theme_styles['text_color']),
+            xaxis=dict(title='Venta promedio mensual ($)', gridcolor=theme_styles['border_color'], tickformat='$,.0f'),
+            yaxis=dict(title='Índice de fidelización', gridcolor=theme_styles['border_color'], range=[0, 1.05]),
             legend=dict(orientation='h', yanchor='bottom', y=1.01, xanchor='left', x=0),
             margin=dict(t=40, b=40, l=60, r=20), height=380,
         )
@@ -7522,7 +7571,7 @@ def fidel_update_main(session_data, vendedor, clasificacion, theme):
     [Output('fidel-evolucion-cliente', 'figure'),
      Output('fidel-panel-analisis', 'children')],
     [Input('fidel-dropdown-cliente', 'value'),
-     Input('ventas-theme-store', 'data')],
+     State('ventas-theme-store', 'data')],
 )
 def fidel_evolucion_cliente(cliente_id, theme):
     empty_fig = go.Figure()
@@ -7532,13 +7581,11 @@ def fidel_evolucion_cliente(cliente_id, theme):
     try:
         from analyzers.fidelizacion_analyzer import FidelizacionAnalyzer
         theme_styles = get_theme_styles(theme)
-        is_dark = theme == 'dark'
-        text_color = theme_styles['text_color']
-        plot_bg = theme_styles['plot_bg']
-        paper_bg = theme_styles['paper_color']
-        border = '#4b5563' if is_dark else '#e5e7eb'
+        text_color = AUTO_THEME['text_color']
+        paper_bg = AUTO_THEME['paper_color']
+        border = theme_color('#e5e7eb', '#4b5563')
 
-        fa = FidelizacionAnalyzer()
+        fa = get_analyzer(FidelizacionAnalyzer)
         raw = fa.load_data()
         cdata = raw.get(str(cliente_id), {})
         df = fa.get_evolucion_cliente(cliente_id)
@@ -7576,10 +7623,10 @@ def fidel_evolucion_cliente(cliente_id, theme):
                 text=f"<b>{cliente_nombre}</b>",
                 font=dict(size=12, family='Inter'), x=0.5,
             ),
-            paper_bgcolor=plot_bg, plot_bgcolor=plot_bg,
-            font=dict(family='Inter', size=11, color=text_color),
-            xaxis=dict(gridcolor=border, tickangle=-30),
-            yaxis=dict(title='Ventas ($)', gridcolor=border, tickformat='$,.0f'),
+            paper_bgcolor=theme_styles['plot_bg'], plot_bgcolor=theme_styles['plot_bg'],
+            font=dict(family='Inter', size=11, color=theme_styles['text_color']),
+            xaxis=dict(gridcolor=theme_styles['border_color'], tickangle=-30),
+            yaxis=dict(title='Ventas ($)', gridcolor=theme_styles['border_color'], tickformat='$,.0f'),
             legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
             margin=dict(t=50, b=40, l=70, r=20),
             height=340,
@@ -7681,3 +7728,82 @@ def fidel_evolucion_cliente(cliente_id, theme):
     except Exception as e:
         print(f"❌ [fidel_evolucion_cliente] {e}")
         return empty_fig, empty_panel
+
+
+# Paneles agrupados: cada grupo comparte filtros y se calcula en una sola
+# petición (ver register_panel_group)
+register_panel_group(
+    [Output('ventas-grafico-ventas-mes', 'figure'),
+     Output('ventas-grafico-clientes-impactados', 'figure')],
+    [Input('session-store', 'data'),
+     Input('ventas-dropdown-vendedor', 'value'),
+     Input('ventas-data-store', 'data'),
+     State('ventas-theme-store', 'data')],
+    [update_ventas_mes,
+     update_clientes_impactados]
+)
+
+register_panel_group(
+    [Output('ventas-grafico-estacionalidad', 'figure'),
+     Output('ventas-grafico-zona', 'figure'),
+     Output('ventas-grafico-forma-pago', 'figure'),
+     Output('ventas-grafico-impactos-dia', 'figure')],
+    [Input('session-store', 'data'),
+     Input('ventas-dropdown-vendedor', 'value'),
+     Input('ventas-dropdown-mes', 'value'),
+     Input('ventas-data-store', 'data'),
+     State('ventas-theme-store', 'data')],
+    [update_estacionalidad,
+     update_zona,
+     update_forma_pago,
+     update_impactos_por_dia]
+)
+
+register_panel_group(
+    [Output('ventas-metrics-cards', 'children'),
+     Output('ventas-cumplimiento-total-label', 'children'),
+     Output('ventas-panel-info-cumplimiento', 'children')],
+    [Input('session-store', 'data'),
+     Input('ventas-dropdown-vendedor', 'value'),
+     Input('ventas-dropdown-mes', 'value'),
+     Input('ventas-data-store', 'data')],
+    [update_summary_panel,
+     update_cumplimiento_total_label,
+     update_panel_info_cumplimiento]
+)
+
+register_panel_group(
+    [Output('ventas-titulo-principal', 'children'),
+     Output('ventas-subtitulo', 'children')],
+    [Input('session-store', 'data'),
+     Input('ventas-dropdown-vendedor', 'value'),
+     Input('ventas-dropdown-mes', 'value')],
+    [update_title,
+     update_subtitle]
+)
+
+# Cambio de tema en el navegador: los callbacks de datos reciben el tema como
+# State y las figuras ya renderizadas se pasan al tema nuevo sin recalcularlas
+register_theme_restyle(
+    'ventas-theme-store',
+    ['ventas-grafico-ventas-mes',
+     'ventas-grafico-clientes-impactados',
+     'ventas-grafico-estacionalidad',
+     'ventas-grafico-zona',
+     'ventas-grafico-forma-pago',
+     'ventas-grafico-impactos-dia',
+     'ventas-comparacion-mensual',
+     'ventas-heatmap-vendedores-dia',
+     'ventas-treemap-cobertura-clientes',
+     'ventas-grafico-recaudo-temporal',
+     'ventas-grafico-recaudo-vendedor',
+     'ventas-treemap-dias-sin-venta',
+     'ventas-grafico-evolucion-cliente',
+     'ventas-grafico-comparativa-vendedores',
+     'ventas-treemap-unificado',
+     'ventas-grafico-cumplimiento-cuotas',
+     'ventas-efficiency-chart',
+     'fidel-scatter',
+     'fidel-evolucion-cliente'],
+    embedded_type='ventas-themed-graph'
+)
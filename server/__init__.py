@@ -3,3 +3,6 @@ from .db import *
 from .auth_manager import *
 from .permissions import *
 from .sql import *
+from .transport import *
+from .metrics import *
+from .async_db import *
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+
+class AsyncDatabase:
+    """
+    Asyncio facade over Database.
+
+    firebase_admin only exposes a blocking client, so every call runs in a
+    dedicated thread pool; the pool size is the global concurrency bound
+    for Firebase reads issued through this class. Coroutines can await the
+    methods from any event loop. Synchronous code (Dash callbacks) uses
+    run(), which executes the coroutine on the class's own event-loop
+    thread: the caller still waits for the result, but the reads inside
+    the coroutine (e.g. get_many) run concurrently.
+    """
+
+    def __init__(self, db, max_workers: int = 4):
+        """
+        Constructor.
+
+        Args:
+            db (Database): Synchronous database instance.
+            max_workers (int): Maximum concurrent Firebase calls.
+        """
+        self.db = db
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="firebase-async"
+        )
+
+        # Event loop propio para run(): funciona aunque el hilo que llama
+        # ya tenga un loop en ejecución
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="firebase-async-loop",
+            daemon=True
+        )
+        self._loop_thread.start()
+
+    async def _run(self, method: str, *args, timeout: float | None = None, **kwargs) -> Any:
+        """
+        Run a Database method in the Firebase thread pool.
+
+        Args:
+            method (str): Database method name.
+            timeout (float | None): Seconds to wait before giving up.
+
+        Returns:
+            Any: Method result.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(getattr(self.db, method), *args, **kwargs)
+        future = loop.run_in_executor(self._executor, call)
+
+        if timeout is None:
+            return await future
+
+        return await asyncio.wait_for(future, timeout)
+
+    async def get(self, collection: str, timeout: float | None = None) -> Dict[str, Any] | None:
+        """
+        Async Database.get.
+        """
+        return await self._run("get", collection, timeout=timeout)
+
+    async def get_by_path(self, path: str, timeout: float | None = None) -> Any | None:
+        """
+        Async Database.get_by_path.
+        """
+        return await self._run("get_by_path", path, timeout=timeout)
+
+    async def get_by_key(self, collection: str, key: str, timeout: float | None = None) -> Dict[str, Any] | None:
+        """
+        Async Database.get_by_key.
+        """
+        return await self._run("get_by_key", collection, key, timeout=timeout)
+
+    async def where(self, collection: str, item: str, value: Any, timeout: float | None = None) -> Dict[str, Any] | None:
+        """
+        Async Database.where.
+        """
+        return await self._run("where", collection, item, value, timeout=timeout)
+
+    async def where_range(
+            self,
+            collection: str,
+            key: str,
+            start_value: Any,
+            end_value: Any | None,
+            timeout: float | None = None) -> Dict[str, Any] | None:
+        """
+        Async Database.where_range.
+        """
+        return await self._run("where_range", collection, key, start_value, end_value, timeout=timeout)
+
+    async def get_many(
+            self,
+            collections: List[str] | None = None,
+            paths: List[str] | None = None,
+            timeout: float | None = None) -> Dict[str, Any]:
+        """
+        Fetch several collections and/or paths concurrently.
+
+        Args:
+            collections (List[str] | None): Collection names.
+            paths (List[str] | None): Reference paths.
+            timeout (float | None): Seconds to wait for each call.
+
+        Returns:
+            Dict[str, Any]: Results keyed by collection name or path. Failed
+            calls map to None.
+        """
+        keys = list(collections or []) + list(paths or [])
+        calls = \
+            [self.get(name, timeout=timeout) for name in collections or []] + \
+            [self.get_by_path(path, timeout=timeout) for path in paths or []]
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        out = {}
+
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                logging.error(
+                    f"Error en la consulta asíncrona de {key} >>> {result}")
+                result = None
+
+            out[key] = result
+
+        return out
+
+    def run(self, coro, timeout: float | None = None):
+        """
+        Run a coroutine on the event-loop thread and wait for its result
+        from synchronous code (e.g. a Dash callback thread).
+
+        Args:
+            coro: Coroutine built with this instance.
+            timeout (float | None): Seconds to wait for the result.
+
+        Returns:
+            Any: Coroutine result.
+
+        Raises:
+            RuntimeError: if called from the event-loop thread itself
+                (await the coroutine there instead).
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            coro.close()
+            raise RuntimeError(
+                "AsyncDatabase.run no puede llamarse desde su propio event loop; usar await")
+
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def shutdown(self) -> None:
+        """
+        Stop the event-loop thread and the Firebase thread pool.
+        """
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,45 +1,132 @@
+import time
 import hashlib
+import threading
 from typing import List
 from .database_manager import get_db
 
 
+class AccountIndex:
+    """
+    Índice en memoria username -> (user_id, cuenta) de "permisos/cuentas".
+
+    Se reconstruye cuando el listener de Firebase notifica un cambio o al
+    vencer el TTL, de modo que un login es un lookup en un dict en lugar de
+    descargar y recorrer todas las cuentas.
+    """
+
+    PATH = "permisos/cuentas"
+
+    def __init__(self, ttl_seconds=300, min_refresh_seconds=30):
+        self.ttl = ttl_seconds
+        self.min_refresh = min_refresh_seconds
+        self._index = {}
+        self._loaded_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._listener_db = None
+
+    def lookup(self, db, username):
+        """
+        Busca la cuenta de un usuario.
+
+        Returns: (user_id, user_data) o (None, None)
+        """
+        self._ensure_listener(db)
+
+        age = time.time() - self._loaded_at
+
+        if self._stale or age >= self.ttl:
+            self._rebuild(db)
+
+        entry = self._index.get(username)
+
+        # Usuario recién creado y el listener no está activo: reconstruir
+        # como máximo una vez cada min_refresh segundos
+        if entry is None and time.time() - self._loaded_at >= self.min_refresh:
+            self._rebuild(db)
+            entry = self._index.get(username)
+
+        return entry or (None, None)
+
+    def invalidate(self, event=None):
+        """
+        Marca el índice para reconstrucción en el siguiente lookup.
+        """
+        self._stale = True
+
+    def _rebuild(self, db):
+        with self._lock:
+            # Otro hilo ya lo reconstruyó mientras se esperaba el lock
+            if not self._stale and time.time() - self._loaded_at < self.min_refresh:
+                return
+
+            accounts = db.get_by_path(self.PATH)
+
+            if accounts is None:
+                return
+
+            self._index = \
+                {
+                    user_data.get('username'): (user_id, user_data)
+                    for user_id, user_data in accounts.items()
+                    if isinstance(user_data, dict) and user_data.get('username')
+                }
+            self._loaded_at = time.time()
+            self._stale = False
+
+    def _ensure_listener(self, db):
+        if self._listener_db is db or not hasattr(db, 'start_path_listener'):
+            return
+
+        self._listener_db = db
+        db.start_path_listener(self.PATH, self.invalidate)
+
+
+account_index = AccountIndex()
+
+
 class AuthManager:
 
     def __init__(self):
         self.db = get_db()
 
+    def _get_db(self):
+        if self.db is None:
+            self.db = get_db()
+
+        return self.db
+
     def validate_user(self, username, password):
         """
         Validate user credentials against Firebase.
         Returns: (is_valid, user_info)
         """
         try:
-            # Obtener datos de permisos/cuentas
-            accounts = self.db.get_by_path("permisos/cuentas")
+            db = self._get_db()
 
-            if not accounts:
+            if db is None:
                 return False, None
 
-            # Buscar usuario
-            for user_id, user_data in accounts.items():
-                stored_username = user_data.get('username', '')
+            # Buscar usuario en el índice de cuentas
+            user_id, user_data = account_index.lookup(db, username)
+
+            if user_data is not None:
                 stored_password = user_data.get('password', '')
 
-                if stored_username == username:
-                    # Verify password
-                    if self._verify_password(password, stored_password):
-                        return \
-                            (
-                                True,
-                                {
-                                    'user_id': user_id,
-                                    'username': username,
-                                    'role': user_data.get('role', 'user'),
-                                    'permissions': user_data.get('permissions', {}),
-                                    'full_name': user_data.get('full_name', username),
-                                    'seller': user_data.get('seller', 'Todos')
-                                }
-                            )
+                # Verify password
+                if self._verify_password(password, stored_password):
+                    return \
+                        (
+                            True,
+                            {
+                                'user_id': user_id,
+                                'username': username,
+                                'role': user_data.get('role', 'user'),
+                                'permissions': user_data.get('permissions', {}),
+                                'full_name': user_data.get('full_name', username),
+                                'seller': user_data.get('seller', 'Todos')
+                            }
+                        )
 
             return False, None
 
@@ -66,11 +153,10 @@ class AuthManager:
         Get user permissions for dashboard access.
         """
         try:
-            accounts = self.db.get_by_path("permisos/cuentas")
+            _, user_data = account_index.lookup(self._get_db(), username)
 
-            for _, user_data in accounts.items():
-                if user_data.get('username') == username:
-                    return user_data.get('permissions', [])
+            if user_data is not None:
+                return user_data.get('permissions', [])
 
             return []
         except Exception as e:
@@ -1,24 +1,243 @@
+import time
+import threading
+import requests
+from firebase_admin import exceptions as firebase_exceptions
+from typing import Any, Dict
 from .db import Database
+from .async_db import AsyncDatabase
+
+
+# Errores de transporte/conexión: los únicos que cuentan para el circuito
+CONNECTION_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    firebase_exceptions.UnavailableError,
+    firebase_exceptions.DeadlineExceededError,
+)
+
+
+class ConnectionHealth:
+    """
+    Connection health of the Firebase singleton.
+
+    Failed connection attempts and Database calls that failed with a
+    transport error (CONNECTION_ERRORS, reported by the instrumented
+    methods) are spaced with exponential backoff instead of sleeping inside
+    the caller's thread. After `failure_threshold` consecutive failures the
+    circuit opens: get_db returns None immediately until the cooldown
+    expires, then a single trial caller (half-open) decides whether the
+    circuit closes again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self,
+            base_delay: float = 1.0,
+            max_delay: float = 60.0,
+            failure_threshold: int = 3,
+            trial_timeout: float = 30.0):
+        """
+        Constructor.
+
+        Args:
+            base_delay (float): Wait after the first failure, in seconds.
+            max_delay (float): Maximum wait between attempts, in seconds.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            trial_timeout (float): Seconds after which an unanswered half-open
+                trial is given to another caller.
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.trial_timeout = trial_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._next_attempt_at = 0.0
+        self._trial_in_progress = False
+        self._trial_started_at = 0.0
+        self._last_error = None
+        self._last_failure_at = None
+        self._last_success_at = None
+
+    @property
+    def state(self) -> str:
+        if self._failures < self.failure_threshold:
+            return ConnectionHealth.CLOSED
+
+        if self._trial_in_progress or time.time() >= self._next_attempt_at:
+            return ConnectionHealth.HALF_OPEN
+
+        return ConnectionHealth.OPEN
+
+    def allow_attempt(self) -> bool:
+        """
+        Check whether a connection attempt may run now. In half-open state
+        only one caller gets the trial.
+
+        Returns:
+            bool: True if the caller should try to connect.
+        """
+        with self._lock:
+            now = time.time()
+
+            if now < self._next_attempt_at:
+                return False
+
+            # Prueba en curso; se libera si su llamada nunca reportó resultado
+            if self._trial_in_progress and now - self._trial_started_at < self.trial_timeout:
+                return False
+
+            if self._failures >= self.failure_threshold:
+                self._trial_in_progress = True
+                self._trial_started_at = now
+
+            return True
+
+    def record_success(self) -> None:
+        """
+        Reset the failure state after a successful connection.
+        """
+        with self._lock:
+            if self._failures:
+                print("✅ Conexión a base de datos restablecida")
+
+            self._failures = 0
+            self._next_attempt_at = 0.0
+            self._trial_in_progress = False
+            self._last_error = None
+            self._last_success_at = time.time()
+
+    def record_call(self, error: Exception | None) -> None:
+        """
+        Report the outcome of a Database call. Only transport and connection
+        errors count as failures: a query the server rejected (missing
+        .indexOn, missing key, bad input) still proves the connection works.
+
+        Args:
+            error (Exception | None): Error of the call, None if it succeeded.
+        """
+        if isinstance(error, CONNECTION_ERRORS):
+            self.record_failure(error)
+        else:
+            self.record_success()
+
+    def record_failure(self, error: Exception | str) -> None:
+        """
+        Register a failed attempt and schedule the next one.
+
+        Args:
+            error (Exception | str): Failure cause.
+        """
+        with self._lock:
+            self._failures += 1
+            self._trial_in_progress = False
+            self._last_error = str(error)
+            self._last_failure_at = time.time()
+
+            delay = min(self.max_delay,
+                        self.base_delay * 2 ** (self._failures - 1))
+            self._next_attempt_at = self._last_failure_at + delay
+
+            if self._failures == self.failure_threshold:
+                print(
+                    f"🔌 Circuito de base de datos abierto tras {self._failures} fallos: {error}")
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the current health state for diagnostics.
+        """
+        with self._lock:
+            return \
+                {
+                    "state": self.state,
+                    "consecutive_failures": self._failures,
+                    "retry_in_seconds": max(0.0, round(self._next_attempt_at - time.time(), 1)),
+                    "last_error": self._last_error,
+                    "last_failure_at": self._last_failure_at,
+                    "last_success_at": self._last_success_at,
+                }
+
 
 _db_instance = None
+_db_lock = threading.Lock()
+_db_health = ConnectionHealth()
+_async_db_instance = None
+_async_db_lock = threading.Lock()
 
 
 def get_db():
+    """
+    Returns the Database singleton, or None while the connection circuit
+    is open (see ConnectionHealth). In half-open state only the trial
+    caller gets the instance. The first connection is made under a lock,
+    so concurrent first requests wait for it.
+    """
     global _db_instance
 
-    if _db_instance is None:
-        try:
-            _db_instance = Database()
-            print("✅ Singleton de base de datos inicializada")
-        except Exception as e:
-            print(f"❌ Error inicializando base de datos: {e}")
-            _db_instance = None
+    if _db_instance is not None:
+        if _db_health.state == ConnectionHealth.CLOSED:
+            return _db_instance
+
+        # Circuito abierto: nadie; semiabierto: solo la llamada de prueba
+        return _db_instance if _db_health.allow_attempt() else None
+
+    with _db_lock:
+        if _db_instance is None and _db_health.allow_attempt():
+            try:
+                _db_instance = Database(health=_db_health)
+                _db_health.record_success()
+                print("✅ Singleton de base de datos inicializada")
+            except Exception as e:
+                print(f"❌ Error inicializando base de datos: {e}")
+                _db_health.record_failure(e)
+                _db_instance = None
 
     return _db_instance
 
 
+def get_async_db():
+    """
+    Returns the AsyncDatabase wrapper of the singleton, or None while the
+    database is unavailable.
+    """
+    global _async_db_instance
+
+    db = get_db()
+
+    if db is None:
+        return None
+
+    if _async_db_instance is None or _async_db_instance.db is not db:
+        with _async_db_lock:
+            if _async_db_instance is None or _async_db_instance.db is not db:
+                # Conexión nueva: liberar el pool y el loop de la anterior
+                if _async_db_instance is not None:
+                    _async_db_instance.shutdown()
+
+                _async_db_instance = AsyncDatabase(db)
+
+    return _async_db_instance
+
+
+def get_db_health() -> Dict[str, Any]:
+    """
+    Returns the connection health state of the Database singleton.
+    """
+    return _db_health.status()
+
+
 def close_db():
-    global _db_instance
+    global _db_instance, _async_db_instance
+
+    if _async_db_instance:
+        _async_db_instance.shutdown()
+        _async_db_instance = None
 
     if _db_instance:
         _db_instance.stop_connection()
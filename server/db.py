@@ -4,6 +4,8 @@ import logging
 import firebase_admin
 from firebase_admin import db
 from typing import Callable, Any, Dict, List
+from .transport import FirebaseTransport
+from .metrics import instrumented, mark_error
 
 
 logging.basicConfig(
@@ -40,12 +42,15 @@ class Database:
             "fidelizacion"
         ]
 
-    def __init__(self):
+    def __init__(self, pooled_transport: bool = True, health=None):
         """
         Constructor.
 
         Args:
-            user_data (Dict[str, Dict[str, Any]]): User permission.
+            pooled_transport (bool): Use the larger pooled HTTP transport
+                and measure bytes per call. Defaults to True.
+            health (ConnectionHealth | None): Tracker notified of the
+                success or failure of every call (circuit breaker).
 
         Raises:
             Exception: unauthorized firebase admin session
@@ -55,6 +60,9 @@ class Database:
 
         cred_dict = json.loads(credentials)
 
+        self.transport = FirebaseTransport() if pooled_transport else None
+        self.health = health
+
         self.cred_firebase = \
             firebase_admin.credentials.Certificate(cert=cred_dict)
 
@@ -67,6 +75,9 @@ class Database:
             )
 
             if self.__app:
+                if self.transport:
+                    self.transport.install(self.__app)
+
                 self.ref = \
                     {
                         collection: db.reference(f"/{collection}/")
@@ -78,6 +89,8 @@ class Database:
                         collection: None
                         for collection in Database.COLLECTIONS
                     }
+
+                self.path_callbacks = {}
             else:
                 raise Exception("Error creating Firebase object")
 
@@ -85,6 +98,35 @@ class Database:
     def collections(self) -> List[str]:
         return Database.COLLECTIONS
 
+    def _log_transfer(self, source: str) -> None:
+        """
+        Log the bytes transferred by the last REST call of this thread.
+
+        Args:
+            source (str): Collection name or path requested.
+        """
+        if not self.transport:
+            return
+
+        record = self.transport.last_transfer()
+
+        if record:
+            logging.info(
+                f"GET {source}: {record['wire_bytes']} bytes en red, "
+                f"{record['decoded_bytes']} bytes decodificados "
+                f"({record['encoding']}, {record['elapsed_ms']:.0f} ms)"
+            )
+
+    def get_transfer_stats(self) -> Dict[str, Any]:
+        """
+        Returns the accumulated bytes-on-the-wire statistics.
+
+        Returns:
+            Dict[str, Any]: Transfer totals, empty if transport is disabled.
+        """
+        return self.transport.get_stats() if self.transport else {}
+
+    @instrumented
     def push(
             self,
             collection: str,
@@ -106,6 +148,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al insertar un nuevo dato en la colección {
                     collection} >> > {e}",
@@ -113,6 +156,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def where(
             self,
             collection: str,
@@ -145,12 +189,14 @@ class Database:
                     return out_values
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al hacer la query(where) en la colección {collection} {
                     collection} >> > {e}",
                 exc_info=True
             )
 
+    @instrumented
     def where_range(
             self,
             collection: str,
@@ -167,7 +213,8 @@ class Database:
             end_value (Any | None): To value (eg. 2). None if no range.
 
         Returns:
-            Dict[str, Any] | None: Specified value
+            Dict[str, Any] | None: Documents in range ({} if none), None
+            if the query failed.
         """
         try:
             if collection in Database.COLLECTIONS:
@@ -175,22 +222,21 @@ class Database:
                 query = self.ref[collection].order_by_child(
                     key).start_at(start_value).end_at(end_value).get()
 
-                if len(query) > 0:
-                    out_values = \
-                        {
-                            key: value
-                            for key, value in query.items()
-                        }
-
-                    return out_values
+                return \
+                    {
+                        key: value
+                        for key, value in (query or {}).items()
+                    }
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al hacer la query(where_range) en la colección {collection} {
                     collection} >> > {e}",
                 exc_info=True
             )
 
+    @instrumented
     def exists(
             self,
             collection: str,
@@ -214,6 +260,7 @@ class Database:
             return False if not values else values["estado"] != -1
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al revisar si existe un item con el valor especificado en la base de datos >> > {
                     e}",
@@ -221,6 +268,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def update_by_key(
             self,
             collection: str,
@@ -241,6 +289,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al actualizar la colección {
                     collection} de la base de datos con el key {key} >> > {e}",
@@ -248,6 +297,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def update_by_path(self, path: str, value: Any) -> bool:
         """
         Update specified reference data with given data.
@@ -266,6 +316,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al actualizar la ruta {
                     path} de la base de datos >> > {e}",
@@ -273,6 +324,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def update(self, collection: str, value: Any) -> bool:
         """
         Add all collection data in one API call 
@@ -291,6 +343,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al actualizar la colección {
                     collection} de la base de datos >> > {e}",
@@ -298,6 +351,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def insert(
             self,
             collection: str,
@@ -325,6 +379,7 @@ class Database:
                 response = True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al insertar datos en la colección {
                     collection} >> > {e}",
@@ -333,6 +388,7 @@ class Database:
 
         return response
 
+    @instrumented
     def get_by_path(self, path: str) -> Any | None:
         """
         Get specified reference data
@@ -345,15 +401,20 @@ class Database:
         """
         try:
             ref = db.reference(path)
+            result = ref.get() if ref else None
+
+            self._log_transfer(path)
 
-            return ref.get() if ref else None
+            return result
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al obtener datos de la ruta {path} >>> {e}",
                 exc_info=True
             )
 
+    @instrumented
     def get_by_key(
             self,
             collection: str,
@@ -372,12 +433,14 @@ class Database:
             return self.ref[collection].child(key).get()
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al obtener datos de la colección {
                     collection} con key: {key} >> > {e}",
                 exc_info=True
             )
 
+    @instrumented
     def get(self, collection: str) -> Dict[str, Any] | None:
         """
         Returns the information of specified collection
@@ -390,6 +453,8 @@ class Database:
                 # Get results from given collection
                 results = self.ref[collection].get()
 
+                self._log_transfer(collection)
+
                 if results:
                     return \
                         {
@@ -398,11 +463,13 @@ class Database:
                         }
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al obtener datos de la colección {collection} >>> {e}",
                 exc_info=True
             )
 
+    @instrumented
     def get_all(self) -> Dict[str, Dict[str, Any]]:
         """
         Get database data.
@@ -417,12 +484,14 @@ class Database:
                 return ref.get()
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al obtener los datos de todas las colecciones de la base de datos >> > {
                     e}",
                 exc_info=True
             )
 
+    @instrumented
     def delete_by_key(self, collection: str, key: str) -> bool:
         """
         Delete data from specified collection based con key.
@@ -441,6 +510,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al borrar el valor {
                     key} datos de la colección {collection} >> > {e}",
@@ -448,6 +518,7 @@ class Database:
             )
             return False
 
+    @instrumented
     def delete(self, collection: str) -> bool:
         """
         Delete data from specified collection based con key.
@@ -465,6 +536,7 @@ class Database:
             return True
 
         except Exception as e:
+            mark_error(e)
             logging.error(
                 f"Error al borrar la colección {collection} >>> {e}",
                 exc_info=True
@@ -494,6 +566,58 @@ class Database:
                 exc_info=True
             )
 
+    def start_path_listener(
+            self,
+            path: str,
+            callback: Callable) -> bool:
+        """
+        Subscribe a callback to real-time events on any reference path
+        (e.g. "permisos/cuentas"). A single Firebase listener is opened per
+        path and every subscribed callback receives its events.
+
+        Args:
+            path (str): Reference path.
+            callback (Callable): Callback function.
+
+        Returns:
+            bool: True if the listener is running.
+        """
+        callbacks = self.path_callbacks.setdefault(path, [])
+
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+        try:
+            if path not in self.listener:
+                self.listener[path] = db.reference(path).listen(
+                    lambda event: self.__dispatch_path_event(path, event))
+
+            return True
+
+        except Exception as e:
+            logging.error(
+                f"Error al inicializar el listener de la ruta {path} >>> {e}",
+                exc_info=True
+            )
+            return False
+
+    def __dispatch_path_event(self, path: str, event: Any) -> None:
+        """
+        Forward a path listener event to every subscribed callback.
+
+        Args:
+            path (str): Reference path.
+            event (Any): Firebase event.
+        """
+        for callback in list(self.path_callbacks.get(path, [])):
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(
+                    f"Error en el callback del listener de {path} >>> {e}",
+                    exc_info=True
+                )
+
     def start_listeners(self, callback: Callable) -> None:
         """
         Starts the listener to listen for real-time events from Firebase.
@@ -518,9 +642,9 @@ class Database:
         Stops the all the collections listener
         """
         try:
-            for collection in Database.COLLECTIONS:
-                if self.listener[collection]:
-                    self.listener[collection].close()
+            for listener in self.listener.values():
+                if listener:
+                    listener.close()
 
         except Exception as e:
             logging.error(
@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+
+_SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Error capturado por el método instrumentado en curso (ver mark_error)
+_call_state = threading.local()
+
+
+class QueryMetrics:
+    """
+    Rolling latency and payload-size statistics for Database calls.
+
+    Every instrumented call is recorded with its method, target (collection
+    or path), latency, serialized size, record count and the analyzer/page
+    function that issued it. Percentiles are computed over the last
+    `window_size` calls of each (method, target) pair.
+    """
+
+    def __init__(self, window_size: int = 200):
+        """
+        Constructor.
+
+        Args:
+            window_size (int): Calls kept per (method, target) pair.
+        """
+        self.window_size = window_size
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._windows = {}
+        self._callers = {}
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """
+        Store a call record and append it to the active trace, if any.
+
+        Args:
+            entry (Dict[str, Any]): Call record.
+        """
+        key = (entry["method"], entry["target"])
+
+        with self._lock:
+            window = self._windows.get(key)
+
+            if window is None:
+                window = deque(maxlen=self.window_size)
+                self._windows[key] = window
+
+            window.append(entry)
+
+            callers = self._callers.setdefault(key, {})
+            callers[entry["caller"]] = callers.get(entry["caller"], 0) + 1
+
+        trace = getattr(self._local, "trace", None)
+
+        if trace is not None:
+            trace.append(entry)
+
+    def start_trace(self) -> None:
+        """
+        Start collecting the calls made by the current thread.
+        """
+        self._local.trace = []
+
+    def end_trace(self) -> List[Dict[str, Any]]:
+        """
+        Stop the trace of the current thread.
+
+        Returns:
+            List[Dict[str, Any]]: Calls recorded since start_trace.
+        """
+        trace = getattr(self._local, "trace", None) or []
+        self._local.trace = None
+
+        return trace
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        """
+        Nearest-rank percentile of an already sorted list.
+        """
+        if not values:
+            return 0.0
+
+        rank = max(0, min(len(values) - 1,
+                          int(round(pct / 100 * len(values))) - 1))
+
+        return values[rank]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Rolling statistics per (method, target), slowest total first.
+
+        Returns:
+            List[Dict[str, Any]]: Statistics rows.
+        """
+        with self._lock:
+            snapshot = {key: list(window)
+                        for key, window in self._windows.items()}
+            callers = {key: dict(values)
+                       for key, values in self._callers.items()}
+
+        rows = []
+
+        for (method, target), entries in snapshot.items():
+            latencies = sorted(e["latency_ms"] for e in entries)
+            sizes = sorted(e["bytes"] for e in entries)
+
+            rows.append(
+                {
+                    "method": method,
+                    "target": target,
+                    "calls": len(entries),
+                    "total_ms": round(sum(latencies), 1),
+                    "p50_ms": round(self._percentile(latencies, 50), 1),
+                    "p95_ms": round(self._percentile(latencies, 95), 1),
+                    "p99_ms": round(self._percentile(latencies, 99), 1),
+                    "p50_bytes": self._percentile(sizes, 50),
+                    "max_bytes": sizes[-1] if sizes else 0,
+                    "last_records": entries[-1]["records"] if entries else 0,
+                    "errors": sum(1 for e in entries if e["error"]),
+                    "callers": dict(
+                        sorted(callers.get((method, target), {}).items(),
+                               key=lambda x: x[1], reverse=True)
+                    ),
+                }
+            )
+
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+
+        return rows
+
+    def reset(self) -> None:
+        """
+        Clear every recorded call.
+        """
+        with self._lock:
+            self._windows.clear()
+            self._callers.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+def get_query_metrics() -> QueryMetrics:
+    """
+    Returns the process-wide Database metrics collector.
+    """
+    return query_metrics
+
+
+def _find_caller() -> str:
+    """
+    First stack frame outside the server package, as module:function:line.
+    """
+    frame = sys._getframe(2)
+
+    while frame and os.path.dirname(
+            os.path.abspath(frame.f_code.co_filename)) == _SERVER_DIR:
+        frame = frame.f_back
+
+    if frame is None:
+        return "unknown"
+
+    module = frame.f_globals.get("__name__", "?")
+
+    return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def _payload_size(result: Any) -> int:
+    """
+    Serialized size in bytes of a call result.
+    """
+    if result is None or isinstance(result, bool):
+        return 0
+
+    try:
+        return len(json.dumps(result, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def mark_error(error: Exception) -> None:
+    """
+    Flag the instrumented call running in this thread as failed. Database
+    methods catch their own exceptions and return None/False, so they call
+    this from their except blocks for the error to reach the metrics.
+
+    Args:
+        error (Exception): Caught exception.
+    """
+    _call_state.error = error
+
+
+def instrumented(func: Callable) -> Callable:
+    """
+    Decorator for Database methods: records latency, payload size, record
+    count, caller and error state of every call in the global QueryMetrics,
+    and reports the outcome of the outermost call to the instance's `health`
+    tracker (nested calls such as exists -> where count once).
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        transport = getattr(self, "transport", None)
+        caller = _find_caller()
+
+        if transport:
+            transport.clear_last_transfer()
+
+        start = time.perf_counter()
+        result = None
+        failure = None
+
+        # Cada llamada empieza sin error marcado; el de una llamada anidada
+        # (p. ej. exists -> where) se propaga a la llamada que la contiene
+        outer_failure = getattr(_call_state, "error", None)
+        _call_state.error = None
+
+        depth = getattr(_call_state, "depth", 0)
+        _call_state.depth = depth + 1
+
+        try:
+            result = func(self, *args, **kwargs)
+            return result
+
+        except Exception as e:
+            failure = e
+            raise
+
+        finally:
+            failure = failure or _call_state.error
+            _call_state.error = outer_failure or failure
+            _call_state.depth = depth
+            error = failure is not None
+
+            # Salud de la conexión (circuit breaker), solo en la llamada externa
+            health = getattr(self, "health", None)
+
+            if health is not None and depth == 0:
+                health.record_call(failure)
+
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            # Reads report the decoded body size measured by the transport,
+            # avoiding a second serialization of multi-megabyte payloads
+            transfer = transport.last_transfer() if transport else None
+
+            if transfer:
+                size = transfer["decoded_bytes"]
+            elif isinstance(result, (dict, list, str, int, float)):
+                size = _payload_size(result)
+            else:
+                size = 0
+
+            query_metrics.record(
+                {
+                    "timestamp": time.time(),
+                    "method": func.__name__,
+                    "target": str(args[0]) if args else "/",
+                    "latency_ms": latency_ms,
+                    "bytes": size,
+                    "records": len(result) if isinstance(result, (dict, list)) else 0,
+                    "caller": caller,
+                    "error": error,
+                }
+            )
+
+    return wrapper
@@ -1,7 +1,91 @@
+import time
+import threading
+
+
+class PermissionCache:
+    """
+    Cache de permisos por user_id con TTL corto.
+
+    Compartido por todas las instancias de PermissionManager del proceso.
+    Un listener sobre "permisos/cuentas" invalida las entradas cuando
+    cambian en Firebase; el TTL cubre el caso en que el listener no esté
+    disponible.
+    """
+
+    PATH = "permisos/cuentas"
+
+    def __init__(self, ttl_seconds=60):
+        self.ttl = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listener_db = None
+
+    def get(self, db, user_id):
+        """
+        Obtiene los permisos del usuario, desde cache si están vigentes.
+        """
+        self._ensure_listener(db)
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+            if entry and time.time() < entry[0]:
+                return entry[1]
+
+        user_permissions = db.get_by_path(f"{self.PATH}/{user_id}")
+
+        # No cachear fallos de lectura (None) para reintentar en la siguiente navegación
+        if user_permissions is not None:
+            with self._lock:
+                self._entries[user_id] = (
+                    time.time() + self.ttl, user_permissions)
+
+        return user_permissions
+
+    def invalidate(self, user_id=None):
+        """
+        Invalida un usuario o todo el cache si user_id es None.
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def _ensure_listener(self, db):
+        """
+        Inicia (una vez por instancia de Database) el listener de invalidación.
+        """
+        if self._listener_db is db or not hasattr(db, 'start_path_listener'):
+            return
+
+        self._listener_db = db
+
+        if not db.start_path_listener(self.PATH, self._on_change):
+            print("⚠️ No se pudo iniciar el listener de permisos, se usará solo TTL")
+
+    def _on_change(self, event):
+        """
+        Evento de Firebase: path "/" afecta todas las cuentas,
+        "/<user_id>/..." solo a ese usuario.
+        """
+        parts = [p for p in (event.path or '/').split('/') if p]
+        self.invalidate(parts[0] if parts else None)
+
+
+permission_cache = PermissionCache()
+
+
 class PermissionManager:
     def __init__(self, db):
         self.db = db
 
+    def _get_user_permissions(self, user_id):
+        """
+        Permisos del usuario desde el cache compartido
+        """
+        return permission_cache.get(self.db, user_id)
+
     def check_dashboard_permission(self, session_data, dashboard_name):
         """
         Verifica si el usuario tiene permiso para acceder a un dashboard
@@ -20,8 +104,8 @@ class PermissionManager:
         if not user_id:
             return False
 
-        # Obtener permisos del usuario desde Firebase
-        user_permissions = self.db.get_by_path(f"permisos/cuentas/{user_id}")
+        # Obtener permisos del usuario (cache compartido)
+        user_permissions = self._get_user_permissions(user_id)
 
         if not user_permissions:
             return False
@@ -73,7 +157,7 @@ class PermissionManager:
         if not user_id:
             return []
 
-        user_permissions = self.db.get_by_path(f"permisos/cuentas/{user_id}")
+        user_permissions = self._get_user_permissions(user_id)
 
         if not user_permissions:
             return []
@@ -117,7 +201,7 @@ class PermissionManager:
         if not user_id:
             return False
 
-        user_permissions = self.db.get_by_path(f"permisos/cuentas/{user_id}")
+        user_permissions = self._get_user_permissions(user_id)
 
         if not user_permissions:
             return False
@@ -159,7 +243,7 @@ class PermissionManager:
         if not user_id:
             return []
 
-        user_permissions = self.db.get_by_path(f"permisos/cuentas/{user_id}")
+        user_permissions = self._get_user_permissions(user_id)
 
         if not user_permissions:
             return []
@@ -199,7 +283,7 @@ class PermissionManager:
         if not user_id:
             return {}
 
-        user_permissions = self.db.get_by_path(f"permisos/cuentas/{user_id}")
+        user_permissions = self._get_user_permissions(user_id)
 
         if not user_permissions:
             return {}
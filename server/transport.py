@@ -0,0 +1,174 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+import requests
+from firebase_admin import db, _http_client
+
+
+class FirebaseTransport:
+    """
+    HTTP transport tuning for the Firebase Realtime Database REST client.
+
+    The firebase_admin client already keeps a `requests` session per app
+    (which negotiates gzip and keep-alive by default). This class re-mounts
+    that session with a larger connection pool, so concurrent callbacks do
+    not discard pooled connections, and attaches a response hook that
+    records the bytes transferred on the wire for every call.
+    """
+
+    def __init__(
+            self,
+            pool_connections: int = 4,
+            pool_maxsize: int = 32,
+            history_size: int = 500):
+        """
+        Constructor.
+
+        Args:
+            pool_connections (int): Number of host pools to keep.
+            pool_maxsize (int): Maximum open connections per host pool.
+            history_size (int): Number of per-call transfer records kept.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._history = deque(maxlen=history_size)
+        self._totals = {}
+        self._sessions = set()
+
+    def install(self, app=None) -> bool:
+        """
+        Configure the HTTP session used by the Firebase database client.
+
+        Args:
+            app: Firebase app (optional). Default app when None.
+
+        Returns:
+            bool: True if the session was configured.
+        """
+        try:
+            client = db.reference(app=app)._client
+            session = client.session
+
+            if id(session) in self._sessions:
+                return True
+
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                max_retries=_http_client.DEFAULT_RETRY_CONFIG
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(self._record_response)
+
+            self._sessions.add(id(session))
+
+            return True
+
+        except Exception as e:
+            logging.error(
+                f"Error al configurar el transporte HTTP de Firebase >>> {e}",
+                exc_info=True
+            )
+            return False
+
+    def _record_response(self, response: requests.Response, *args, **kwargs):
+        """
+        Response hook: measure wire and decoded bytes of a REST call.
+        """
+        try:
+            # Force the body read so the raw stream counter is final
+            decoded_bytes = len(response.content or b"")
+            wire_bytes = response.raw.tell() if response.raw else 0
+
+            if not wire_bytes:
+                wire_bytes = int(
+                    response.headers.get("Content-Length", decoded_bytes)
+                )
+
+            record = \
+                {
+                    "timestamp": time.time(),
+                    "method": response.request.method,
+                    "path": urlparse(response.url).path,
+                    "status": response.status_code,
+                    "encoding": response.headers.get("Content-Encoding", "identity"),
+                    "wire_bytes": wire_bytes,
+                    "decoded_bytes": decoded_bytes,
+                    "elapsed_ms": response.elapsed.total_seconds() * 1000,
+                }
+
+            self._local.last = record
+
+            with self._lock:
+                self._history.append(record)
+
+                totals = self._totals.setdefault(
+                    record["path"],
+                    {"calls": 0, "wire_bytes": 0, "decoded_bytes": 0}
+                )
+                totals["calls"] += 1
+                totals["wire_bytes"] += wire_bytes
+                totals["decoded_bytes"] += decoded_bytes
+
+        except Exception as e:
+            logging.error(
+                f"Error al medir la respuesta HTTP de Firebase >>> {e}",
+                exc_info=True
+            )
+
+        return response
+
+    def last_transfer(self) -> Dict[str, Any] | None:
+        """
+        Returns the transfer record of the last call made by this thread.
+        """
+        return getattr(self._local, "last", None)
+
+    def clear_last_transfer(self) -> None:
+        """
+        Forget the last transfer record of this thread.
+        """
+        self._local.last = None
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        """
+        Returns the most recent per-call transfer records.
+        """
+        with self._lock:
+            return list(self._history)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns accumulated transfer totals grouped by REST path.
+        """
+        with self._lock:
+            by_path = {path: dict(values)
+                       for path, values in self._totals.items()}
+
+        wire = sum(v["wire_bytes"] for v in by_path.values())
+        decoded = sum(v["decoded_bytes"] for v in by_path.values())
+
+        return \
+            {
+                "calls": sum(v["calls"] for v in by_path.values()),
+                "wire_bytes": wire,
+                "decoded_bytes": decoded,
+                "compression_ratio": (decoded / wire) if wire else None,
+                "by_path": by_path,
+            }
+
+    def reset(self) -> None:
+        """
+        Clear every transfer record.
+        """
+        with self._lock:
+            self._history.clear()
+            self._totals.clear()
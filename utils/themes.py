@@ -28,6 +28,24 @@ def get_theme_styles(theme):
     return DARK_THEME if theme == 'dark' else LIGHT_THEME
 
 
+def theme_color(light, dark):
+    """
+    CSS color that follows the theme of the page: the browser picks `light`
+    or `dark` from the color-scheme of the main container, so HTML built
+    with it does not have to be regenerated when the theme changes.
+    """
+    return f'light-dark({light}, {dark})'
+
+
+# Same keys as LIGHT_THEME/DARK_THEME, for HTML content of data callbacks
+AUTO_THEME = {
+    key: theme_color(LIGHT_THEME[key], DARK_THEME[key])
+    for key in LIGHT_THEME
+}
+AUTO_THEME['card_shadow'] = \
+    f"0 8px 32px {theme_color('rgba(0, 0, 0, 0.1)', 'rgba(0, 0, 0, 0.3)')}"
+
+
 def get_dropdown_style(theme):
     """
     Get dropdown styles based on theme with glassmorphism effect.